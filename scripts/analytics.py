@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""Full-history analytics over the progress log: per-attempt metrics, weekly trend, sublevel moves.
+
+update_progress.py only keeps the latest rolling score. This module computes, for every attempt
+in the log, comprehension %, vocab retention %, WPM, attempt_score and (over reading attempts) the
+exp-decay rolling proficiency + sublevel, then aggregates them per ISO week and lists every
+sublevel transition.
+
+- Columns: the log is decoded once into a column cache next to it (progress.ndjson.columns/, one
+  binary file per field + meta.json with the covered byte offset and digest, like the checkpoint).
+  Later runs parse only the lines appended since then and read the columns with one fromfile()
+  each; the cache is rebuilt if the log was truncated or edited in a way the digest sees
+  (progress_log.prefix_unchanged(); --rebuild forces it).
+  Safe to delete.
+- Arithmetic: NumPy when installed, else the stdlib `array` columns with plain loops (same
+  results, slower). Both apply the operations of scoring.attempt_score() and
+  update_progress.rolling_proficiency() in the same order, with the current versioned weights /
+  sublevel table from scoring.py, so values are bit-identical to the scalar code (--verify
+  replays the scalar functions over the whole log and compares).
+- Only the score-based sublevel is vectorized; the coarse CEFR heuristic (infer_level) is
+  stateful and stays in update_progress.py (--recompute-all).
+
+Usage:
+  python scripts/analytics.py                        # last 12 weeks + last 10 sublevel transitions
+  python scripts/analytics.py --weeks 52 --transitions 50 --json trend.json --csv weekly.csv
+  python scripts/analytics.py --learner stu-0042
+  python scripts/analytics.py --progress-dir backup/progress --learner stu-0042
+  python scripts/analytics.py --log exported.ndjson  # any single log file (ad-hoc copies)
+  python scripts/analytics.py --verify --no-numpy    # check against the scalar rules
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import learners
+import metrics
+import scoring
+from progress_log import (
+    SKILLS,
+    atomic_write_text,
+    decode_line,
+    iter_appended,
+    iter_records,
+    prefix_unchanged,
+    read_range,
+    span_digest,
+)
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+LOG_FILE = Path("data/progress/progress.ndjson")
+CACHE_VERSION = 1
+FLUSH_ROWS = 65536  # rows buffered per column before appending to the cache files
+# name -> array typecode; "off" is the logical byte offset of the line (to fetch attempt_id later)
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("off", "q"),
+    ("ts", "d"),
+    ("skill", "b"),
+    ("comp_total", "d"),
+    ("comp_correct", "d"),
+    ("vocab_presented", "d"),
+    ("vocab_mastered", "d"),
+    ("tokens", "d"),
+    ("time_sec", "d"),
+    ("inf_err", "d"),
+    ("other_err", "d"),
+)
+READING = SKILLS.index("reading") + 1
+WEIGHTS = scoring.SCORING_WEIGHTS[scoring.SCORING_VERSION]
+# map_sublevel(): score < bound -> code
+SUBLEVEL_BOUNDS = tuple(b for b, _code, _cefr in scoring.SUBLEVEL_TABLES[scoring.SUBLEVEL_VERSION] if b is not None)
+SUBLEVEL_CODES = tuple(code for _b, code, _cefr in scoring.SUBLEVEL_TABLES[scoring.SUBLEVEL_VERSION])
+WINDOW = 7  # rolling_proficiency window
+DECAY = 0.85
+
+
+def _decay_weights() -> Tuple[List[float], List[float]]:
+    """Per-lag weights (built by repeated multiplication, as rolling_proficiency does) and the
+    weight sum for each window length, summed in the same order."""
+    w, lag_w = 1.0, []
+    for _ in range(WINDOW):
+        lag_w.append(w)
+        w *= DECAY
+    den = [1.0] + [sum(list(reversed(lag_w[:m]))) or 1 for m in range(1, WINDOW + 1)]
+    return lag_w, den
+
+
+LAG_W, DEN = _decay_weights()
+
+
+def cache_dir(log: Path) -> Path:
+    return log.with_name(log.name + ".columns")
+
+
+def _num(v: Any) -> float:
+    return v if type(v) in (int, float) else 0  # None / junk -> 0, like `a.get(k) or 0`
+
+
+def _epoch(ts: Any) -> float:
+    if not isinstance(ts, str):
+        return math.nan
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def record_row(rec: Dict[str, Any], off: int) -> Tuple[Any, ...]:
+    errors = rec.get("errors_types") or {}
+    if isinstance(errors, dict):
+        inf = _num(errors.get("inference", 0))
+        other = sum(_num(v) for k, v in errors.items() if k != "inference")
+    else:
+        inf = other = 0
+    skill = rec.get("skill_focus")
+    return (
+        off,
+        _epoch(rec.get("timestamp")),
+        SKILLS.index(skill) + 1 if skill in SKILLS else 0,
+        _num(rec.get("comp_questions_total")),
+        _num(rec.get("comp_questions_correct")),
+        _num(rec.get("vocab_items_presented")),
+        _num(rec.get("vocab_items_mastered")),
+        _num(rec.get("input_tokens")),
+        _num(rec.get("time_spent_sec")),
+        inf,
+        other,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Column cache
+# ---------------------------------------------------------------------------
+
+def _read_meta(d: Path) -> Optional[Dict[str, Any]]:
+    try:
+        meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and meta.get("version") == CACHE_VERSION else None
+
+
+def sync_columns(log: Path, rebuild: bool = False) -> Tuple[Path, int]:
+    """Bring the column cache up to date with the log; returns (cache dir, rows)."""
+    d = cache_dir(log)
+    meta = None if rebuild else _read_meta(d)
+    if meta is not None and not prefix_unchanged(log, meta["offset"], meta.get("digest")):
+        print("[INFO] Progress log truncated or edited; rebuilding analytics columns", file=sys.stderr)
+        meta = None
+    if meta is None:
+        meta = {"version": CACHE_VERSION, "offset": 0, "digest": "", "rows": 0, "malformed": 0}
+    d.mkdir(parents=True, exist_ok=True)
+    rows = meta["rows"]
+    files = {}
+    for name, code in COLUMNS:
+        f = (d / f"{name}.{code}").open("a+b")
+        f.truncate(rows * array(code).itemsize)  # drop rows appended after the last meta write
+        files[name] = f
+    buf = [array(code) for _name, code in COLUMNS]
+
+    def flush() -> None:
+        for (name, _code), col in zip(COLUMNS, buf):
+            col.tofile(files[name])
+            del col[:]
+
+    offset = start = meta["offset"]
+    parsed = malformed = 0
+    try:
+        for offset, raw in iter_appended(log, offset):
+            rec = decode_line(raw)
+            if rec is None:
+                malformed += bool(raw.strip())
+            else:
+                for col, v in zip(buf, record_row(rec, start)):
+                    col.append(v)
+                parsed += 1
+                if len(buf[0]) >= FLUSH_ROWS:
+                    flush()
+            start = offset
+        flush()
+    finally:
+        for f in files.values():
+            f.close()
+    metrics.count("analytics_lines_parsed", parsed)
+    if offset != meta["offset"]:
+        meta.update(offset=offset, digest=span_digest(log, offset), rows=rows + parsed, malformed=meta["malformed"] + malformed)
+        atomic_write_text(d / "meta.json", json.dumps(meta) + "\n")
+    return d, meta["rows"]
+
+
+def load_columns(log: Path, use_numpy: bool = True, rebuild: bool = False) -> Dict[str, Any]:
+    """Column name -> numpy array (or array.array without NumPy), all of equal length."""
+    with metrics.span("sync_columns"):
+        d, rows = sync_columns(log, rebuild)
+    cols: Dict[str, Any] = {}
+    with metrics.span("read_columns"):
+        for name, code in COLUMNS:
+            path = d / f"{name}.{code}"
+            if use_numpy:
+                cols[name] = np.fromfile(path, dtype=np.dtype(code), count=rows)
+            else:
+                a = array(code)
+                with path.open("rb") as f:
+                    a.fromfile(f, rows)
+                cols[name] = a
+    return cols
+
+
+# ---------------------------------------------------------------------------
+# Per-attempt metrics (same operation order as scoring.attempt_score)
+# ---------------------------------------------------------------------------
+
+def attempt_metrics_numpy(c: Dict[str, Any]) -> Dict[str, Any]:
+    """comp / vocab / wpm (NaN without speed data) / score for float64 raw-field columns."""
+    tot, cor = c["comp_total"], c["comp_correct"]
+    pres, mast = c["vocab_presented"], c["vocab_mastered"]
+    tokens, secs = c["tokens"], c["time_sec"]
+    comp = np.divide(cor, tot, out=np.zeros_like(tot), where=tot != 0) * 100
+    vocab = np.divide(mast, pres, out=np.zeros_like(pres), where=pres != 0) * 100
+    has_speed = (tokens > 0) & (secs > 0)
+    wpm = np.divide(tokens, secs, out=np.zeros_like(tokens), where=has_speed) * 60
+    W = WEIGHTS
+    speed_norm = np.clip((wpm - W["wpm_floor"]) / (W["wpm_ceiling"] - W["wpm_floor"]), 0.0, 1.0) * 100
+    base = np.where(
+        has_speed,
+        W["comp"] * comp + W["vocab"] * vocab + W["speed"] * speed_norm,
+        W["comp_no_speed"] * comp + W["vocab_no_speed"] * vocab,
+    )
+    total_q = np.where(tot != 0, tot, 1.0)
+    error_pen = ((c["inf_err"] * W["inference_penalty"]) + (c["other_err"] * W["other_penalty"])) / total_q * W["penalty_scale"]
+    score = np.maximum(0.0, base - error_pen)
+    return {"comp": comp, "vocab": vocab, "wpm": np.where(has_speed, wpm, np.nan), "score": score}
+
+
+def metrics_numpy(c: Dict[str, Any]) -> Dict[str, Any]:
+    out = attempt_metrics_numpy(c)
+    score = out["score"]
+    reading = np.flatnonzero(c["skill"] == READING)
+    s = score[reading]
+    acc = np.zeros(len(s))
+    for k in range(WINDOW - 1, -1, -1):  # oldest term first, as sum() adds them
+        if k < len(s):
+            acc[k:] += s[: len(s) - k] * LAG_W[k]
+    window = np.minimum(np.arange(1, len(s) + 1), WINDOW)
+    prof = acc / np.asarray(DEN)[window]
+    sub = np.searchsorted(np.asarray(SUBLEVEL_BOUNDS, dtype=float), prof, side="right")
+    out.update(reading=reading, prof=prof, sub=sub)
+    return out
+
+
+def metrics_array(c: Dict[str, Any]) -> Dict[str, Any]:
+    W = WEIGHTS
+    n = len(c["ts"])
+    comp, vocab, wpm, score = array("d", bytes(8 * n)), array("d", bytes(8 * n)), array("d", [math.nan]) * n, array("d", bytes(8 * n))
+    reading = array("q")
+    for i in range(n):
+        tot, cor = c["comp_total"][i], c["comp_correct"][i]
+        pres, mast = c["vocab_presented"][i], c["vocab_mastered"][i]
+        tokens, secs = c["tokens"][i], c["time_sec"][i]
+        cp = (cor / tot) * 100 if tot else 0.0
+        vp = (mast / pres) * 100 if pres else 0.0
+        if tokens > 0 and secs > 0:
+            w = (tokens / secs) * 60
+            wpm[i] = w
+            speed_norm = max(0.0, min(1.0, (w - W["wpm_floor"]) / (W["wpm_ceiling"] - W["wpm_floor"]))) * 100
+            base = W["comp"] * cp + W["vocab"] * vp + W["speed"] * speed_norm
+        else:
+            base = W["comp_no_speed"] * cp + W["vocab_no_speed"] * vp
+        pen = ((c["inf_err"][i] * W["inference_penalty"]) + (c["other_err"][i] * W["other_penalty"])) / (tot or 1) * W["penalty_scale"]
+        comp[i], vocab[i], score[i] = cp, vp, max(0.0, base - pen)
+        if c["skill"][i] == READING:
+            reading.append(i)
+    prof = array("d", bytes(8 * len(reading)))
+    sub = array("b", bytes(len(reading)))
+    for j in range(len(reading)):
+        m = min(j + 1, WINDOW)
+        acc = 0.0
+        for k in range(m - 1, -1, -1):
+            acc += score[reading[j - k]] * LAG_W[k]
+        p = acc / DEN[m]
+        prof[j] = p
+        sub[j] = sum(1 for b in SUBLEVEL_BOUNDS if p >= b)
+    return {"comp": comp, "vocab": vocab, "wpm": wpm, "score": score, "reading": reading, "prof": prof, "sub": sub}
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def week_of(ts: float) -> int:
+    """Monday-based week number since the epoch (1970-01-01 was a Thursday)."""
+    return (int(ts // 86400) + 3) // 7
+
+
+def week_start(week: int) -> str:
+    return (date(1970, 1, 1) + timedelta(days=week * 7 - 3)).isoformat()
+
+
+def weekly(c: Dict[str, Any], m: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per week with attempts: counts, reading averages, proficiency/sublevel at week end."""
+    acc: Dict[int, Dict[str, Any]] = {}
+    ts = c["ts"]
+    for i in range(len(ts)):  # all skills: attempt counts
+        t = ts[i]
+        if t == t:  # not NaN
+            acc.setdefault(week_of(t), {"attempts": 0, "reading": []})["attempts"] += 1
+    for j, i in enumerate(m["reading"]):
+        t = ts[i]
+        if t == t:
+            acc[week_of(t)]["reading"].append((int(i), j))
+    out = []
+    for wk in sorted(acc):
+        a = acc[wk]
+        rd = a["reading"]
+        row: Dict[str, Any] = {"week": week_start(wk), "attempts": a["attempts"], "reading": len(rd)}
+        if rd:
+            idx = [i for i, _j in rd]
+            vocab = [m["vocab"][i] for i in idx if c["vocab_presented"][i] > 0]
+            wpm = [m["wpm"][i] for i in idx if m["wpm"][i] == m["wpm"][i]]
+            last = rd[-1][1]
+            row.update(
+                comp_avg=round(sum(m["comp"][i] for i in idx) / len(idx), 1),
+                vocab_avg=round(sum(vocab) / len(vocab), 1) if vocab else None,
+                wpm_avg=round(sum(wpm) / len(wpm), 1) if wpm else None,
+                score_avg=round(sum(m["score"][i] for i in idx) / len(idx), 1),
+                proficiency=round(float(m["prof"][last]), 2),
+                sublevel=SUBLEVEL_CODES[int(m["sub"][last])],
+            )
+        out.append(row)
+    return out
+
+
+def weekly_numpy(c: Dict[str, Any], m: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ts = c["ts"]
+    ok = ~np.isnan(ts)
+    if not ok.any():
+        return []
+    wk_all = (np.floor_divide(ts[ok], 86400).astype(np.int64) + 3) // 7
+    w0 = int(wk_all.min())
+    size = int(wk_all.max()) - w0 + 1
+    attempts = np.bincount(wk_all - w0, minlength=size)
+    r = m["reading"]
+    r_ok = ok[r]
+    ri = r[r_ok]
+    g = (np.floor_divide(ts[ri], 86400).astype(np.int64) + 3) // 7 - w0
+    n_read = np.bincount(g, minlength=size)
+    comp_sum = np.bincount(g, weights=m["comp"][ri], minlength=size)
+    score_sum = np.bincount(g, weights=m["score"][ri], minlength=size)
+    has_v = c["vocab_presented"][ri] > 0
+    v_n = np.bincount(g[has_v], minlength=size)
+    v_sum = np.bincount(g[has_v], weights=m["vocab"][ri][has_v], minlength=size)
+    wpm = m["wpm"][ri]
+    has_w = ~np.isnan(wpm)
+    w_n = np.bincount(g[has_w], minlength=size)
+    w_sum = np.bincount(g[has_w], weights=wpm[has_w], minlength=size)
+    last = np.full(size, -1, dtype=np.int64)
+    np.maximum.at(last, g, np.flatnonzero(r_ok))  # position in the reading sequence
+    weeks = np.flatnonzero(attempts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        starts = (np.datetime64("1970-01-01") + ((weeks + w0) * 7 - 3)).astype(str)
+        cols = zip(
+            starts.tolist(), attempts[weeks].tolist(), n_read[weeks].tolist(),
+            (comp_sum / n_read)[weeks].tolist(), (v_sum / v_n)[weeks].tolist(),
+            (w_sum / w_n)[weeks].tolist(), (score_sum / n_read)[weeks].tolist(),
+            m["prof"][last][weeks].tolist(), m["sub"][last][weeks].tolist(),
+            v_n[weeks].tolist(), w_n[weeks].tolist(),
+        )
+        out = []
+        for start, att, nr, comp, vocab, wpm, score, prof, sub, vn, wn in cols:
+            row: Dict[str, Any] = {"week": start, "attempts": att, "reading": nr}
+            if nr:
+                row.update(
+                    comp_avg=round(comp, 1),
+                    vocab_avg=round(vocab, 1) if vn else None,
+                    wpm_avg=round(wpm, 1) if wn else None,
+                    score_avg=round(score, 1),
+                    proficiency=round(prof, 2),
+                    sublevel=SUBLEVEL_CODES[sub],
+                )
+            out.append(row)
+    return out
+
+
+def transition_points(m: Dict[str, Any], use_numpy: bool) -> List[int]:
+    """Positions in the reading sequence where the sublevel differs from the previous attempt."""
+    sub = m["sub"]
+    if not len(sub):
+        return []
+    if use_numpy:
+        return [0] + (np.flatnonzero(sub[1:] != sub[:-1]) + 1).tolist()
+    return [0] + [j for j in range(1, len(sub)) if sub[j] != sub[j - 1]]
+
+
+def transitions(log: Path, c: Dict[str, Any], m: Dict[str, Any], points: Sequence[int]) -> List[Dict[str, Any]]:
+    out = []
+    for j in points:
+        i = int(m["reading"][j])
+        off = int(c["off"][i])
+        rec = decode_line(read_range(log, off, off + 4096).split(b"\n", 1)[0]) or {}
+        out.append({
+            "timestamp": rec.get("timestamp"),
+            "attempt_id": rec.get("attempt_id"),
+            "from": SUBLEVEL_CODES[int(m["sub"][j - 1])] if j else None,
+            "to": SUBLEVEL_CODES[int(m["sub"][j])],
+            "proficiency": round(float(m["prof"][j]), 2),
+            "reading_index": j,
+        })
+    return out
+
+
+def verify(log: Path, m: Dict[str, Any]) -> int:
+    """Replay scoring.attempt_score / update_progress.rolling_proficiency / map_sublevel; count mismatches."""
+    import update_progress as up
+
+    bad = 0
+    scores: List[float] = []
+    j = 0
+    for i, rec in enumerate(iter_records(log)):
+        s = up.attempt_score(rec)
+        if s != m["score"][i]:
+            bad += 1
+        if rec.get("skill_focus") != "reading":
+            continue
+        scores.append(s)
+        prof, _prov = up.rolling_proficiency([{"attempt_score": x} for x in scores[-WINDOW:]])
+        if prof != m["prof"][j] or up.map_sublevel(prof)[0] != SUBLEVEL_CODES[int(m["sub"][j])]:
+            bad += 1
+        j += 1
+    return bad
+
+
+def print_report(weeks: List[Dict[str, Any]], trans: List[Dict[str, Any]], n_weeks: int) -> None:
+    print(f"{'week':<10} {'att':>5} {'read':>5} {'comp%':>6} {'vocab%':>6} {'wpm':>6} {'score':>6} {'prof':>6}  sublevel")
+    for r in weeks[-n_weeks:] if n_weeks else []:
+        def f(k: str) -> str:
+            v = r.get(k)
+            return "-" if v is None else f"{v}"
+        print(f"{r['week']:<10} {r['attempts']:>5} {r['reading']:>5} {f('comp_avg'):>6} {f('vocab_avg'):>6} "
+              f"{f('wpm_avg'):>6} {f('score_avg'):>6} {f('proficiency'):>6}  {r.get('sublevel', '-')}")
+    if trans:
+        print("\nSublevel transitions:")
+        for t in trans:
+            print(f"  {t['timestamp']} {t['attempt_id']}: {t['from'] or '-'} -> {t['to']} (prof {t['proficiency']})")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Weekly trend + sublevel transitions over the whole progress log")
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument("--progress-dir", default=str(LOG_FILE.parent))
+    where.add_argument("--log", metavar="FILE", help="Analyse this log file instead (ad-hoc copies / exports)")
+    ap.add_argument("--learner", help="Learner id (see learners.py)")
+    ap.add_argument("--weeks", type=int, default=12, help="Weeks to print (0 = none)")
+    ap.add_argument("--transitions", type=int, default=10, help="Last N sublevel transitions to list (0 = all)")
+    ap.add_argument("--json", metavar="FILE", help="Write all weeks + the listed transitions as JSON")
+    ap.add_argument("--csv", metavar="FILE", help="Write the weekly table as CSV")
+    ap.add_argument("--no-numpy", action="store_true", help="Use the stdlib array fallback")
+    ap.add_argument("--rebuild", action="store_true", help="Re-decode the whole log (after editing old lines in place)")
+    ap.add_argument("--verify", action="store_true", help="Compare every value with the scalar update_progress functions")
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.log and ns.learner:
+        ap.error("--log names the file directly; drop --learner")
+    if ns.learner:
+        try:
+            ns.progress_dir = str(learners.learner_dir(ns.learner, Path(ns.progress_dir)))
+        except ValueError as e:
+            ap.error(str(e))
+    if not ns.log:
+        ns.log = str(Path(ns.progress_dir) / learners.LOG_NAME)
+    return ns
+
+
+def run(ns: argparse.Namespace) -> int:
+    log = Path(ns.log)
+    if not log.exists():
+        print(f"[ERROR] No progress log at {log}", file=sys.stderr)
+        return 1
+    use_numpy = np is not None and not ns.no_numpy
+    cols = load_columns(log, use_numpy, ns.rebuild)
+    with metrics.span("attempt_metrics"):
+        m = metrics_numpy(cols) if use_numpy else metrics_array(cols)
+    with metrics.span("weekly"):
+        weeks = weekly_numpy(cols, m) if use_numpy else weekly(cols, m)
+    with metrics.span("transitions"):
+        points = transition_points(m, use_numpy)
+        trans = transitions(log, cols, m, points[-ns.transitions:] if ns.transitions else points)
+    metrics.count("attempts", len(cols["ts"]))
+    metrics.count("reading_attempts", len(m["reading"]))
+    print_report(weeks, trans, ns.weeks)
+    print(f"\n{len(cols['ts'])} attempts ({len(m['reading'])} reading), {len(weeks)} weeks, "
+          f"{len(points)} sublevel changes [{'numpy' if use_numpy else 'array'}]")
+    if ns.json:
+        Path(ns.json).write_text(json.dumps({"weeks": weeks, "transitions": trans}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if ns.csv:
+        fields = ["week", "attempts", "reading", "comp_avg", "vocab_avg", "wpm_avg", "score_avg", "proficiency", "sublevel"]
+        with Path(ns.csv).open("w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=fields)
+            w.writeheader()
+            w.writerows(weeks)
+    if ns.verify:
+        with metrics.span("verify"):
+            bad = verify(log, m)
+        print(f"verify: {bad} mismatch(es) against update_progress", file=sys.stderr)
+        return 1 if bad else 0
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("analytics", ns):
+        return run(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
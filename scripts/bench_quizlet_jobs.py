@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark serial vs parallel TSV parsing in prepare-quizlet.py (--jobs).
+
+Generates synthetic passage TSVs (fixed seed) in a temp dir for several file counts, then times
+parse+merge serially and with process/thread pools, checking the merged output is identical.
+
+Usage:
+  python scripts/bench_quizlet_jobs.py
+  python scripts/bench_quizlet_jobs.py --files 500 2000 8000 --jobs 2 4 8 --rows 150
+"""
+from __future__ import annotations
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+HERE = Path(__file__).resolve().parent
+
+
+def load_prepare_quizlet():
+    spec = importlib.util.spec_from_file_location("prepare_quizlet", HERE / "prepare-quizlet.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["prepare_quizlet"] = mod  # process pools pickle functions by module name
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def make_corpus(base: Path, n_files: int, rows: int, seed: int) -> List[Path]:
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(max(1000, n_files * rows // 4))]
+    files = []
+    for i in range(n_files):
+        p = base / f"passage-{i:06d}-vocab.tsv"
+        with p.open("w", encoding="utf-8") as f:
+            for _ in range(rows):
+                w = rng.choice(vocab)
+                f.write(f"{w}\tnghĩa của {w}; example sentence using {w} in context ({rng.choice('AB')}{rng.choice('12')})\n")
+        files.append(p)
+    return files
+
+
+def timed_merge(pq, files: List[Path], jobs: int, threads: bool) -> tuple[float, List[str]]:
+    t = time.perf_counter()
+    out = list(pq.merge_stream(pq.iter_tsv_rows(files, jobs, threads), True))
+    return time.perf_counter() - t, out
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmark prepare-quizlet --jobs")
+    ap.add_argument("--files", type=int, nargs="+", default=[200, 1000, 4000])
+    ap.add_argument("--jobs", type=int, nargs="+", default=[2, 4])
+    ap.add_argument("--rows", type=int, default=100, help="Lines per synthetic TSV")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    pq = load_prepare_quizlet()
+    print(f"cpus={os.cpu_count()} rows/file={ns.rows}")
+    print("files\tmode\tjobs\tsec\tspeedup")
+    ok = True
+    for n in ns.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            files = make_corpus(Path(tmp), n, ns.rows, ns.seed)
+            base_t, base_out = timed_merge(pq, files, 1, False)
+            print(f"{n}\tserial\t1\t{base_t:.3f}\t1.00")
+            for threads in (False, True):
+                for j in ns.jobs:
+                    t, out = timed_merge(pq, files, j, threads)
+                    same = out == base_out
+                    ok &= same
+                    mode = "thread" if threads else "process"
+                    print(f"{n}\t{mode}\t{j}\t{t:.3f}\t{base_t / t:.2f}{'' if same else '  OUTPUT DIFFERS'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
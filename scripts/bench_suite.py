@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for update_progress.py, recommend_vocab.py and prepare-quizlet.py.
+
+Generates a seeded synthetic workspace (synth_data.py) in a temp dir, then runs one worker
+subprocess per script inside it, so peak RSS is measured per script. Each worker times the
+stages of the script's main() path and the full main() call, and reports wall time, items,
+throughput and peak-RSS growth per stage plus the process peak RSS. A stage's rss_growth_kb is how
+far it raised the process peak (ru_maxrss): 0 when it stayed below the peak of an earlier stage, so
+it is a lower bound on the stage's own memory.
+
+Results are JSON. With --baseline, every stage is compared against the stored results and the
+suite exits 1 when a stage is slower (or peak RSS larger) than baseline * (1 + threshold);
+stages faster than --min-seconds in both runs are ignored as noise.
+
+Usage:
+  python scripts/bench_suite.py --out bench_results.json
+  python scripts/bench_suite.py --attempts 1000000 --entries 300000 --passages 5000 --out big.json
+  python scripts/bench_suite.py --baseline bench_results.json --threshold 0.25
+  python scripts/bench_suite.py --only recommend_vocab --keep /tmp/bench-ws
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import synth_data
+
+SCRIPTS = ["update_progress", "recommend_vocab", "prepare_quizlet"]
+RESULTS_VERSION = 2
+
+
+def peak_rss_kb() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS reports bytes
+
+
+class Stages:
+    """Collects per-stage wall time / items / throughput / peak-RSS growth for one worker."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, name: str, fn: Callable[[], Any], items: int | None = None) -> Any:
+        rss0 = peak_rss_kb()
+        with contextlib.redirect_stdout(io.StringIO()):
+            t = time.perf_counter()
+            out = fn()
+            wall = time.perf_counter() - t
+        rss1 = peak_rss_kb()
+        st: Dict[str, Any] = {"wall_s": round(wall, 6), "rss_growth_kb": None if rss0 is None else rss1 - rss0}
+        if items is not None:
+            st["items"] = items
+            st["per_s"] = round(items / wall, 1) if wall > 0 else None
+        self.stages[name] = st
+        return out
+
+
+def _count_lines(path: Path) -> int:
+    with path.open("rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+
+def worker_update_progress(st: Stages, ns: argparse.Namespace) -> None:
+    import exposure_index
+    import update_progress as up
+
+    n = _count_lines(up.LOG_FILE)
+    cp = st.run("checkpoint_cold_sync", lambda: up.sync_checkpoint(up.load_checkpoint()), n)
+    st.run("checkpoint_save", lambda: up.save_checkpoint(cp))
+    st.run("checkpoint_warm_sync", lambda: up.sync_checkpoint(up.load_checkpoint()))
+    st.run("exposure_index_cold_sync", lambda: exposure_index.sync_dir(up.PROGRESS_DIR), n)
+    argv = ["--skill", "reading", "--attempt-id", "bench-1", "--comp-total", "13", "--comp-correct", "10",
+            "--vocab-presented", "20", "--vocab-mastered", "15", "--new-words", "alpha", "beta"]
+    st.run("main_append", lambda: up.main(argv), 1)
+    batch = Path("bench-ingest.ndjson")
+    k = synth_data.write_progress(batch, max(1, min(n // 10, 50000)), synth_data.word_list(ns.words, ns.seed), ns.seed + 7)
+    st.run("main_ingest", lambda: up.main(["--ingest", str(batch)]), k)
+
+
+def worker_recommend_vocab(st: Stages, ns: argparse.Namespace) -> None:
+    import random
+    import recommend_vocab as rv
+    import vocab_store
+
+    vocab_dir = Path("vocab")
+    entries = ns.entries
+    st.run("store_compile", lambda: vocab_store.compile_store(vocab_dir), entries)
+    store = st.run("store_open_fresh", lambda: vocab_store.open_store(vocab_dir))
+    exposures = st.run("load_exposures", rv.load_progress_exposures)
+    level = rv.load_level()
+    with store:
+        st.run("recommend_store", lambda: rv.recommend_store(level, store, 15, exposures, False, 3, random.Random(ns.seed)), 15)
+    st.run("main_store", lambda: rv.main(["--seed", str(ns.seed)]), 15)
+    st.run("main_json", lambda: rv.main(["--seed", str(ns.seed), "--no-store"]), 15)
+
+
+def worker_prepare_quizlet(st: Stages, ns: argparse.Namespace) -> None:
+    from bench_quizlet_jobs import load_prepare_quizlet
+
+    pq = load_prepare_quizlet()
+    base = Path("vocab")
+    files = pq.gather(pq.VOCAB_GLOB, base) + pq.gather(pq.COLLOC_GLOB, base)
+    rows = sum(_count_lines(f) for f in files)
+    jobs = max(2, min(4, os.cpu_count() or 1))
+    st.run("parse_merge_serial", lambda: sum(1 for _ in pq.merge_stream(pq.iter_tsv_rows(files), False)), rows)
+    st.run(f"parse_merge_jobs{jobs}", lambda: sum(1 for _ in pq.merge_stream(pq.iter_tsv_rows(files, jobs), False)), rows)
+    st.run("main_full", lambda: pq.main(["--full"]), rows)
+    st.run("main_noop", lambda: pq.main([]))
+    synth_data.write_passages(base / "extra", 1, ns.rows, synth_data.word_list(ns.words, ns.seed), ns.seed + 9)
+    for p in (base / "extra").iterdir():
+        p.rename(base / p.name.replace("synthetic-passage", "synthetic-extra"))
+    st.run("main_incremental", lambda: pq.main([]))
+    st.run("main_delta", lambda: pq.main(["--delta"]))
+
+
+WORKERS = {
+    "update_progress": worker_update_progress,
+    "recommend_vocab": worker_recommend_vocab,
+    "prepare_quizlet": worker_prepare_quizlet,
+}
+
+
+def run_worker(name: str, ns: argparse.Namespace) -> int:
+    st = Stages()
+    sys.argv = [name]  # scripts fall back to sys.argv when main() gets an empty argv
+    t = time.perf_counter()
+    WORKERS[name](st, ns)
+    result = {"wall_s": round(time.perf_counter() - t, 6), "peak_rss_kb": peak_rss_kb(), "stages": st.stages}
+    print(json.dumps(result))
+    return 0
+
+
+def make_workspace(ws: Path, ns: argparse.Namespace) -> Dict[str, float]:
+    """Generate the synthetic inputs; returns generation time per dataset."""
+    words = synth_data.word_list(ns.words, ns.seed)
+    timings = {}
+    t = time.perf_counter()
+    synth_data.write_progress(ws / "data/progress/progress.ndjson", ns.attempts, words, ns.seed)
+    timings["progress"] = time.perf_counter() - t
+    t = time.perf_counter()
+    synth_data.write_lexicon(ws / "vocab", ns.entries, ns.lexicon_files, words, ns.seed)
+    timings["lexicon"] = time.perf_counter() - t
+    t = time.perf_counter()
+    synth_data.write_passages(ws / "vocab", ns.passages, ns.rows, words, ns.seed)
+    timings["passages"] = time.perf_counter() - t
+    return {k: round(v, 3) for k, v in timings.items()}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_seconds: float) -> List[str]:
+    """Human-readable regressions of `current` against `baseline`."""
+    out: List[str] = []
+    limit = 1.0 + threshold
+    for script, res in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(script)
+        if not base:
+            continue
+        for stage, cur in res["stages"].items():
+            old = base["stages"].get(stage)
+            if not old or max(cur["wall_s"], old["wall_s"]) < min_seconds:
+                continue
+            if cur["wall_s"] > old["wall_s"] * limit:
+                out.append(f"{script}.{stage}: {old['wall_s']:.3f}s -> {cur['wall_s']:.3f}s (x{cur['wall_s'] / old['wall_s']:.2f})")
+        if res.get("peak_rss_kb") and base.get("peak_rss_kb") and res["peak_rss_kb"] > base["peak_rss_kb"] * limit:
+            out.append(f"{script}.peak_rss: {base['peak_rss_kb']} KiB -> {res['peak_rss_kb']} KiB")
+    return out
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmark the tracking scripts on synthetic data")
+    ap.add_argument("--attempts", type=int, default=10000, help="Attempts in the synthetic progress log")
+    ap.add_argument("--entries", type=int, default=50000, help="Lexicon entries (vocab/*.json)")
+    ap.add_argument("--lexicon-files", type=int, default=10)
+    ap.add_argument("--passages", type=int, default=1000, help="Passages (vocab + collocation TSV per passage)")
+    ap.add_argument("--rows", type=int, default=60, help="Vocab lines per passage TSV")
+    ap.add_argument("--words", type=int, default=50000, help="Pseudo-word vocabulary size")
+    ap.add_argument("--seed", type=int, default=synth_data.DEFAULT_SEED)
+    ap.add_argument("--only", nargs="+", choices=SCRIPTS, help="Benchmark only these scripts")
+    ap.add_argument("--out", help="Write results JSON here")
+    ap.add_argument("--baseline", help="Compare against this results JSON")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio before failing (0.25 = +25%%)")
+    ap.add_argument("--min-seconds", type=float, default=0.05, help="Ignore stages faster than this in both runs")
+    ap.add_argument("--keep", help="Use (and keep) this workspace dir instead of a temp dir")
+    ap.add_argument("--worker", choices=SCRIPTS, help=argparse.SUPPRESS)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    if ns.worker:
+        return run_worker(ns.worker, ns)
+    with contextlib.ExitStack() as stack:
+        if ns.keep:
+            ws = Path(ns.keep).resolve()
+            ws.mkdir(parents=True, exist_ok=True)
+        else:
+            ws = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="ielts-bench-")))
+        gen = make_workspace(ws, ns)
+        print(f"Workspace {ws} (generated in {gen})", file=sys.stderr)
+        results: Dict[str, Any] = {}
+        sizing = ["--attempts", str(ns.attempts), "--entries", str(ns.entries), "--rows", str(ns.rows),
+                  "--words", str(ns.words), "--seed", str(ns.seed)]
+        for name in ns.only or SCRIPTS:
+            proc = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--worker", name, *sizing],
+                                  cwd=ws, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"[WARN] {name} worker failed:\n{proc.stderr}", file=sys.stderr)
+                continue
+            results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{name}\t{results[name]['wall_s']:.3f}s\tpeak_rss={results[name]['peak_rss_kb']} KiB")
+            for stage, st in results[name]["stages"].items():
+                rate = f"\t{st['per_s']:.0f}/s" if st.get("per_s") else ""
+                grew = f"\t+{st['rss_growth_kb']} KiB" if st.get("rss_growth_kb") else ""
+                print(f"  {stage}\t{st['wall_s']:.3f}s{rate}{grew}")
+    report = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {k: getattr(ns, k) for k in ("attempts", "entries", "lexicon_files", "passages", "rows", "words", "seed")},
+        "generate_s": gen,
+        "results": results,
+    }
+    if ns.out:
+        Path(ns.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"[WROTE] results -> {ns.out}")
+    if len(results) != len(ns.only or SCRIPTS):
+        return 1
+    if ns.baseline:
+        baseline = json.loads(Path(ns.baseline).read_text(encoding="utf-8"))
+        if baseline.get("params") != report["params"]:
+            print("[WARN] Baseline was recorded with different parameters; comparison may be meaningless", file=sys.stderr)
+        regressions = compare(report, baseline, ns.threshold, ns.min_seconds)
+        for r in regressions:
+            print(f"[REGRESSION] {r}")
+        if regressions:
+            return 1
+        print(f"No regressions vs {ns.baseline} (threshold +{ns.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Long-lived local server answering log_attempt / recommend / level from memory (asyncio).
+
+Every CLI call pays interpreter startup, imports, and re-opens the lexicon, checkpoint and
+exposure index. The daemon keeps them loaded:
+
+- lexicon: the compiled vocab store (vocab_store.py), re-checked for changes at most once a second;
+  when serving, the check and any recompile run in a worker thread and the current store keeps
+  answering until the new one is swapped in. A store generation compiled by a CLI run is picked
+  up the same way; the old mapping is closed, so that generation file can be removed.
+- per learner (default data/progress/, or learners.py dirs): the update_progress checkpoint
+  (rolling-score ring), current level, exposure counts and the exposure/SRS sqlite connection.
+- writes go through update_progress.record_attempt(), so progress.ndjson, the checkpoint,
+  current_level.json and exposures.sqlite stay exactly as the CLI would leave them.
+- in-memory exposure counts follow the offset exposures.sqlite is synced to: after a sync only the
+  words of the lines indexed since the last one are re-read from sqlite (a full reload if the log
+  was rewritten), so lines other writers appended around our own are counted too.
+- files changed by someone else (CLI run without the daemon, manual edit) are noticed by stat
+  (size, mtime) on the next request and reloaded incrementally. The stat key is taken before the
+  files are read, so a change racing the reload shows up again on the next request.
+
+Protocol: newline-delimited JSON over a Unix socket (default data/progress/daemon.sock) or
+localhost TCP (--port). One request object per line, one response per line:
+
+  {"op": "recommend", "count": 15, "seed": 1, "learner": "stu-0042"}
+  -> {"ok": true, "level": "B2", "plan": [{"word": ..., "cefr": ..., "exposures": 0, "definition": ...}]}
+  {"op": "log_attempt", "attempt": {"attempt_id": "...", "skill_focus": "reading", ...}}
+  -> {"ok": true, "level": {...}, "lines": ["Level updated -> ..."]}
+  {"op": "level"}  /  {"op": "ping"}
+  errors -> {"ok": false, "error": "..."}
+
+Requests are handled one at a time on the event loop (each is a few ms of synchronous work), so
+daemon writes never interleave. Clients: daemon_client.py, or --daemon on update_progress.py /
+recommend_vocab.py; `ielts.py batch` drives a Daemon in-process through handle().
+
+Usage:
+  python scripts/daemon.py                       # Unix socket data/progress/daemon.sock
+  python scripts/daemon.py --port 8765           # 127.0.0.1:8765
+  python scripts/daemon_client.py bench -n 2000  # latency percentiles
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import exposure_index
+import learners
+import recommend_vocab
+import selection
+import srs
+import update_progress
+import vocab_store
+from progress_log import SKILLS, decode_line, iter_appended, prefix_unchanged
+
+PROGRESS_DIR = Path("data/progress")
+SOCKET_PATH = PROGRESS_DIR / "daemon.sock"
+RELOAD_CHECK_SEC = 1.0  # min interval between lexicon freshness checks
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class Lexicon:
+    """Compiled vocab store, reopened when a lexicon source (JSON / TSV / Markdown) changes."""
+
+    def __init__(self, vocab_dir: Path):
+        self.vocab_dir = vocab_dir
+        self.store: Optional[vocab_store.VocabStore] = None
+        self.generation = 0
+        self.checked = 0.0
+        self.background = False  # set while serving: poll() refreshes in a worker thread
+        self.refreshing: Optional[asyncio.Future] = None
+        self.install(vocab_store.open_store(vocab_dir))
+
+    def install(self, store: Optional[vocab_store.VocabStore]) -> None:
+        if self.store is not None:
+            self.store.close()
+        self.store = store
+        self.generation += 1
+        self.checked = time.monotonic()
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        if now - self.checked < RELOAD_CHECK_SEC:
+            return False
+        self.checked = now
+        return True
+
+    def _open_if_stale(self) -> Optional[vocab_store.VocabStore]:
+        # fresh, but maybe compiled by another process into a newer generation than the one mapped
+        if vocab_store.is_fresh(self.vocab_dir) and self.store is not None and vocab_store.current_store(self.vocab_dir) == self.store.path:
+            return None
+        print(f"[INFO] {self.vocab_dir} changed; reopening the lexicon store", file=sys.stderr)
+        return vocab_store.open_store(self.vocab_dir)
+
+    def get(self) -> Optional[vocab_store.VocabStore]:
+        if not self.background and self._due():
+            store = self._open_if_stale()
+            if store is not None:
+                self.install(store)
+        return self.store
+
+    def poll(self) -> None:
+        """Start a freshness check + recompile in the default executor if one is due; the new
+        store is installed on the event loop when it is ready (between requests)."""
+        if self.refreshing is not None or not self._due():
+            return
+        self.refreshing = asyncio.get_running_loop().run_in_executor(None, self._open_if_stale)
+        self.refreshing.add_done_callback(self._refreshed)
+
+    def _refreshed(self, fut: asyncio.Future) -> None:
+        self.refreshing = None
+        try:
+            store = fut.result()
+        except Exception as e:  # noqa: BLE001 - keep serving the current store
+            print(f"[WARN] lexicon recompile failed: {e}", file=sys.stderr)
+            return
+        if store is not None:
+            self.install(store)
+
+
+class LearnerState:
+    """In-memory view of one progress dir, kept in step with its files."""
+
+    def __init__(self, progress_dir: Path, lex: Lexicon):
+        self.dir = progress_dir
+        self.lex = lex
+        self.log = progress_dir / "progress.ndjson"
+        self.level_file = progress_dir / "current_level.json"
+        self.conn = None
+        self.cp: Dict[str, Any] = {}
+        self.level: Dict[str, Any] = {}
+        self.exposures: Dict[str, int] = {}
+        self.exposure_of: Optional[Dict[int, int]] = None
+        self.exposure_gen = 0
+        self.exposure_at: Optional[Tuple[int, str]] = None  # index (offset, digest) self.exposures reflects
+        self.index: Optional[selection.SelectionIndex] = None
+        self.index_key: Any = None
+        self.key: Any = ()
+
+    def _file_key(self) -> Any:
+        return _stat_key(self.log), _stat_key(self.level_file)
+
+    def activate(self) -> None:
+        """Point update_progress at this dir and reload whatever changed on disk."""
+        update_progress.use_progress_dir(self.dir)
+        key = self._file_key()
+        if key == self.key:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if self.conn is None:
+            self.conn = exposure_index.connect(self.dir)
+        self.cp = update_progress.sync_checkpoint(update_progress.load_checkpoint())
+        self.level = update_progress.load_level()
+        self.sync_exposures()
+        self.key = key
+
+    def sync_exposures(self) -> None:
+        """Sync exposures.sqlite with the log and bring self.exposures to the offset it covers."""
+        if self.log.exists():
+            exposure_index.sync(self.conn, self.log)
+        at = exposure_index.covered(self.conn)
+        prev, self.exposure_at = self.exposure_at, at
+        if prev is None or at[0] < prev[0] or not prefix_unchanged(self.log, *prev):
+            self.exposures = exposure_index.all_counts(self.conn)
+            self.exposure_of = None
+            self.index = None
+            return
+        words = set()
+        for end, raw in iter_appended(self.log, prev[0]):
+            if end > at[0]:
+                break
+            rec = decode_line(raw)
+            if rec is not None:
+                words.update(exposure_index.attempt_words(rec))
+        if words:
+            counts = exposure_index.lookup(self.conn, words)
+            for w in words:
+                self._set_exposure(w, counts.get(w, 0))
+
+    def _set_exposure(self, word: str, count: int) -> None:
+        self.exposures[word] = count
+        if self.exposure_of is None or self.lex.generation != self.exposure_gen:
+            return  # ids are recomputed from self.exposures on the next recommend
+        for i in self.lex.store.find(word):
+            self.exposure_of[i] = count
+            if self.index is not None:
+                self.index.set_exposure(i, count)
+
+    def selection_index(self, level: str, lex: Lexicon, store: vocab_store.VocabStore, rng: random.Random) -> selection.SelectionIndex:
+        """Cached (band, exposure-tier) index for `level`; rebuilt when level or lexicon change."""
+        if self.exposure_of is None or self.exposure_gen != lex.generation:
+            self.exposure_of = recommend_vocab.exposure_ids(store, self.exposures)
+            self.exposure_gen = lex.generation
+            self.index = None
+        if self.index is None or self.index_key != (level, lex.generation):
+            # the index owns its copy: set_exposure() keeps it in step incrementally
+            self.index = recommend_vocab.store_index(level, store, dict(self.exposure_of), rng)
+            self.index_key = (level, lex.generation)
+        self.index.reset(rng)
+        return self.index
+
+    def log_attempt(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        self.activate()
+        self.cp, self.level, lines = update_progress.record_attempt(fields, self.cp, self.level)
+        # Other writers may have appended before our lock (lines record_attempt folded on disk) or
+        # since: read forward from what this state last saw, with the stat key taken first.
+        self.key = self._file_key()
+        self.cp = update_progress.sync_checkpoint(self.cp)
+        self.level = update_progress.load_level()
+        self.sync_exposures()
+        return {"level": self.level, "lines": lines}
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+
+
+class Daemon:
+    def __init__(self, vocab_dir: Path, progress_dir: Path = PROGRESS_DIR):
+        self.progress_dir = progress_dir
+        self.lexicon = Lexicon(vocab_dir)
+        self.states: Dict[Optional[str], LearnerState] = {}
+
+    def state(self, learner: Optional[str]) -> LearnerState:
+        st = self.states.get(learner)
+        if st is None:
+            d = learners.learner_dir(learner, self.progress_dir) if learner else self.progress_dir
+            st = self.states[learner] = LearnerState(d, self.lexicon)
+        st.activate()
+        return st
+
+    def op_ping(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "learners": len(self.states)}
+
+    def op_level(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return {"level": self.state(req.get("learner")).level}
+
+    def op_log_attempt(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        fields = req.get("attempt")
+        if not isinstance(fields, dict):
+            raise ValueError("'attempt' must be an object")
+        if fields.get("skill_focus") not in SKILLS or not fields.get("attempt_id"):
+            raise ValueError(f"attempt needs attempt_id and skill_focus in {list(SKILLS)}")
+        unknown = set(fields) - set(update_progress.ATTEMPT_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown attempt fields: {sorted(unknown)}")
+        return self.state(req.get("learner")).log_attempt(fields)
+
+    def op_recommend(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        st = self.state(req.get("learner"))
+        store = self.lexicon.get()
+        if store is None or not len(store):
+            raise ValueError("No vocab entries found")
+        level = req.get("level_override") or st.level.get("current_cefr", "B1")
+        count = int(req.get("count", 15))
+        review_share = float(req.get("review_share", 0.0))
+        due_ids = []
+        if review_share > 0:
+            due_ids = [i for w, _ in srs.due_words(st.conn, limit=count * 10) for i in store.find(w)]
+        index = st.selection_index(level, self.lexicon, store, random.Random(req.get("seed")))
+        ids = selection.plan(
+            index,
+            recommend_vocab.band_needs(level, count),
+            count,
+            bool(req.get("include_mastered", False)),
+            int(req.get("mastery_threshold", 3)),
+            due=due_ids,
+            review_share=review_share,
+        )
+        plan = []
+        for i in ids:
+            e = store.entry(i)
+            plan.append({
+                "word": e.get("word"),
+                "cefr": e.get("cefr"),
+                "exposures": st.exposures.get((e.get("word") or "").lower(), 0),
+                "definition": recommend_vocab.build_definition(e),
+            })
+        return {"level": level, "plan": plan}
+
+    def handle(self, req: Any) -> Dict[str, Any]:
+        if not isinstance(req, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        fn = getattr(self, f"op_{req.get('op')}", None)
+        if fn is None:
+            return {"ok": False, "error": f"unknown op {req.get('op')!r}"}
+        try:
+            return {"ok": True, **fn(req)}
+        except Exception as e:  # noqa: BLE001 - report to the client, keep serving
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.lexicon.poll()
+                try:
+                    resp = self.handle(json.loads(line))
+                except json.JSONDecodeError as e:
+                    resp = {"ok": False, "error": f"bad JSON: {e}"}
+                writer.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            print(f"[WARN] client dropped: {e}", file=sys.stderr)
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        for st in self.states.values():
+            st.close()
+        if self.lexicon.store is not None:
+            self.lexicon.store.close()
+
+
+async def serve(daemon: Daemon, socket_path: Path | None, host: str, port: int | None) -> None:
+    daemon.lexicon.background = True
+    if port is not None:
+        server = await asyncio.start_server(daemon.serve_client, host, port)
+        where = f"{host}:{port}"
+    else:
+        if socket_path.exists():
+            socket_path.unlink()  # stale socket from a previous run
+        server = await asyncio.start_unix_server(daemon.serve_client, str(socket_path))
+        where = str(socket_path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, AttributeError, RuntimeError):  # Windows
+            pass
+    print(f"Serving on {where} (pid {os.getpid()})", file=sys.stderr)
+    async with server:
+        await stop.wait()
+    if port is None and socket_path.exists():
+        socket_path.unlink()
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Serve recommend/log_attempt/level from memory")
+    ap.add_argument("--vocab-dir", default="vocab")
+    ap.add_argument("--socket", default=str(SOCKET_PATH), help="Unix socket path")
+    ap.add_argument("--port", type=int, help="Listen on localhost TCP instead of a Unix socket")
+    ap.add_argument("--host", default="127.0.0.1")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    if ns.port is None and not hasattr(asyncio, "start_unix_server"):
+        print("[ERROR] Unix sockets unavailable on this platform; use --port", file=sys.stderr)
+        return 2
+    with closing(Daemon(Path(ns.vocab_dir))) as daemon:
+        asyncio.run(serve(daemon, Path(ns.socket), ns.host, ns.port))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
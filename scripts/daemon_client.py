@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Thin blocking client for daemon.py (newline-delimited JSON over a Unix socket or TCP).
+
+An address is a Unix socket path (default data/progress/daemon.sock) or HOST:PORT.
+update_progress.py and recommend_vocab.py use request() for their --daemon mode.
+
+Usage:
+  python scripts/daemon_client.py ping
+  python scripts/daemon_client.py level --learner stu-0042
+  python scripts/daemon_client.py recommend --count 15 --seed 1
+  python scripts/daemon_client.py bench -n 2000 --op recommend   # p50/p99 latency
+"""
+from __future__ import annotations
+import argparse
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_ADDRESS = str(Path("data/progress") / "daemon.sock")
+TIMEOUT_SEC = 30.0
+
+
+class DaemonError(RuntimeError):
+    """Daemon unreachable or returned {"ok": false}."""
+
+
+def _parse_address(address: str) -> Tuple[int, Any]:
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address and "\\" not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+class Connection:
+    """One persistent connection; send() is a synchronous request/response round trip."""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = TIMEOUT_SEC):
+        family, addr = _parse_address(address)
+        try:
+            self.sock = socket.socket(family, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(addr)
+        except (OSError, AttributeError) as e:  # AttributeError: no AF_UNIX on Windows
+            raise DaemonError(f"cannot reach daemon at {address}: {e}") from e
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+
+    def send(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            self.sock.sendall(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+            line = self.file.readline()
+        except OSError as e:
+            raise DaemonError(f"daemon connection failed: {e}") from e
+        if not line:
+            raise DaemonError("daemon closed the connection")
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise DaemonError(resp.get("error") or "request failed")
+        return resp
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> "Connection":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def request(req: Dict[str, Any], address: str = DEFAULT_ADDRESS) -> Dict[str, Any]:
+    """Single request on a fresh connection."""
+    with Connection(address) as conn:
+        return conn.send(req)
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))]
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Talk to daemon.py")
+    ap.add_argument("--daemon", default=DEFAULT_ADDRESS, help="Socket path or HOST:PORT")
+    ap.add_argument("--learner")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("ping")
+    sub.add_parser("level")
+    rc = sub.add_parser("recommend")
+    rc.add_argument("--count", type=int, default=15)
+    rc.add_argument("--seed", type=int)
+    rc.add_argument("--review-share", type=float, default=0.0)
+    b = sub.add_parser("bench", help="Latency percentiles over one persistent connection")
+    b.add_argument("-n", type=int, default=1000)
+    b.add_argument("--op", choices=["recommend", "level", "ping"], default="recommend")
+    b.add_argument("--count", type=int, default=15)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    base: Dict[str, Any] = {"learner": ns.learner} if ns.learner else {}
+    try:
+        if ns.cmd == "bench":
+            req = {**base, "op": ns.op, "count": ns.count}
+            times: List[float] = []
+            with Connection(ns.daemon) as conn:
+                conn.send(req)  # warm-up: loads learner state / lexicon
+                for _ in range(ns.n):
+                    t = time.perf_counter()
+                    conn.send(req)
+                    times.append((time.perf_counter() - t) * 1000)
+            times.sort()
+            print(f"{ns.op} x{ns.n}: p50={percentile(times, 50):.3f}ms p90={percentile(times, 90):.3f}ms "
+                  f"p99={percentile(times, 99):.3f}ms max={times[-1]:.3f}ms")
+            return 0
+        if ns.cmd == "recommend":
+            resp = request({**base, "op": "recommend", "count": ns.count, "seed": ns.seed, "review_share": ns.review_share}, ns.daemon)
+            print(f"Level: {resp['level']} | Requested: {ns.count} | Provided: {len(resp['plan'])}")
+            for e in resp["plan"]:
+                print(f"{e['word']}\t{e['cefr']}\t{e['exposures']}\t{e['definition'][:80]}")
+            return 0
+        resp = request({**base, "op": ns.cmd}, ns.daemon)
+        resp.pop("ok", None)
+        print(json.dumps(resp, ensure_ascii=False, indent=2))
+    except DaemonError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
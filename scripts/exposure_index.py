@@ -0,0 +1,270 @@
+"""Persistent word-exposure index over the progress log (stdlib sqlite3).
+
+Replaces the full log scan in recommend_vocab.load_progress_exposures(): for every word seen in
+`new_words_added` (lowercased) the index keeps count, first_seen, last_seen and one reference row
+per attempt (attempt_id, timestamp, byte offset of the log line).
+
+The index remembers the log byte offset it covers (+ progress_log.span_digest(), as the
+update_progress checkpoint does). sync() parses only lines appended since then; if the log was
+truncated, or edited in a way the digest sees (progress_log.prefix_unchanged()), it rebuilds from
+scratch. After a same-length edit in the middle of the log use `rebuild`.
+update_progress.append_attempt() syncs after every write, so lookups normally cost a few indexed
+queries.
+
+The same database holds the spaced-repetition review state (srs.py), updated per attempt here.
+
+File: data/progress/exposures.sqlite (derived; safe to delete).
+
+Usage:
+  python scripts/exposure_index.py rebuild   # drop & rebuild from progress.ndjson
+  python scripts/exposure_index.py check     # compare index against a full log scan
+  python scripts/exposure_index.py show pivotal emerge
+"""
+from __future__ import annotations
+import argparse
+import json
+import sqlite3
+import sys
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import metrics
+import srs
+from progress_log import iter_appended, iter_records, prefix_unchanged, span_digest
+
+PROGRESS_DIR = Path("data/progress")
+LOG_NAME = "progress.ndjson"
+INDEX_NAME = "exposures.sqlite"
+LOOKUP_CHUNK = 500  # stay below SQLITE_MAX_VARIABLE_NUMBER
+INDEX_VERSION = "2"  # bump when derived tables change; older indexes are rebuilt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS words (
+    word TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    first_seen TEXT,
+    last_seen TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS refs (
+    word TEXT NOT NULL,
+    attempt_id TEXT,
+    timestamp TEXT,
+    log_offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_word ON refs (word);
+"""
+
+
+def connect(progress_dir: Path = PROGRESS_DIR) -> sqlite3.Connection:
+    conn = sqlite3.connect(progress_dir / INDEX_NAME)
+    conn.executescript(SCHEMA)
+    srs.ensure_schema(conn)
+    return conn
+
+
+def _meta(conn: sqlite3.Connection, key: str, default: str = "") -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def attempt_words(attempt: Dict[str, Any]) -> List[str]:
+    """Lowercased exposure keys for one attempt (same normalization as recommend_vocab)."""
+    return [w.lower() for w in (attempt.get("new_words_added") or []) if isinstance(w, str)]
+
+
+def _text(value: Any) -> Any:
+    """Bindable column value; a list/object in a broken record (see validate_log.py) is kept as JSON."""
+    return value if value is None or isinstance(value, (str, int, float)) else json.dumps(value)
+
+
+def add_attempt(conn: sqlite3.Connection, attempt: Dict[str, Any], log_offset: int) -> None:
+    ts = _text(attempt.get("timestamp"))
+    words = attempt_words(attempt)
+    srs.record_review(conn, dict.fromkeys(words), attempt)
+    for w in words:
+        conn.execute(
+            "INSERT INTO words (word, count, first_seen, last_seen) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(word) DO UPDATE SET count = count + 1, "
+            "first_seen = COALESCE(first_seen, excluded.first_seen), "
+            "last_seen = COALESCE(excluded.last_seen, last_seen)",
+            (w, ts, ts),
+        )
+        conn.execute(
+            "INSERT INTO refs (word, attempt_id, timestamp, log_offset) VALUES (?, ?, ?, ?)",
+            (w, _text(attempt.get("attempt_id")), ts, log_offset),
+        )
+
+
+def clear(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM words")
+    conn.execute("DELETE FROM refs")
+    conn.execute("DELETE FROM meta")
+    srs.clear(conn)
+
+
+def sync(conn: sqlite3.Connection, log_path: Path) -> int:
+    """Fold log lines appended since the last sync; rebuild if the covered prefix changed.
+
+    Returns number of attempts indexed.
+    """
+    n = malformed = 0
+    with conn:
+        # take the write lock before reading the covered offset: concurrent writers each syncing
+        # after their append must not index the same lines twice
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        offset = int(_meta(conn, "offset", "0"))
+        if _meta(conn, "version") != INDEX_VERSION:
+            clear(conn)
+            offset = 0
+        elif not prefix_unchanged(log_path, offset, _meta(conn, "digest")):
+            print("[INFO] Progress log truncated or edited; rebuilding exposure index", file=sys.stderr)
+            clear(conn)
+            offset = 0
+        start = offset
+        for end, raw in iter_appended(log_path, offset):
+            line = raw.strip()
+            if line:
+                try:
+                    obj = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    obj = None
+                if isinstance(obj, dict):
+                    add_attempt(conn, obj, start)
+                    n += 1
+                else:
+                    malformed += 1
+            start = end
+        _set_meta(conn, "version", INDEX_VERSION)
+        if start != offset:
+            _set_meta(conn, "offset", str(start))
+            _set_meta(conn, "digest", span_digest(log_path, start))
+    metrics.count("index_lines_parsed", n + malformed)
+    metrics.count("index_malformed_skipped", malformed)
+    return n
+
+
+def covered(conn: sqlite3.Connection) -> Tuple[int, str]:
+    """(log offset, digest) the index is synced to."""
+    return int(_meta(conn, "offset", "0")), _meta(conn, "digest")
+
+
+def sync_dir(progress_dir: Path = PROGRESS_DIR) -> int:
+    log_path = progress_dir / LOG_NAME
+    if not log_path.exists():
+        return 0
+    with closing(connect(progress_dir)) as conn:
+        return sync(conn, log_path)
+
+
+def lookup(conn: sqlite3.Connection, words: Iterable[str]) -> Dict[str, int]:
+    """Exposure counts for the given (lowercased) words; absent words are omitted."""
+    out: Dict[str, int] = {}
+    batch = sorted({w.lower() for w in words if isinstance(w, str)})
+    for i in range(0, len(batch), LOOKUP_CHUNK):
+        chunk = batch[i : i + LOOKUP_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        out.update(conn.execute(f"SELECT word, count FROM words WHERE word IN ({marks})", chunk).fetchall())
+    return out
+
+
+def all_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    return dict(conn.execute("SELECT word, count FROM words").fetchall())
+
+
+def scan_log(log_path: Path) -> Dict[str, Dict[str, Any]]:
+    """Reference full scan: word -> {count, first_seen, last_seen}."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for obj in iter_records(log_path):
+        ts = obj.get("timestamp")
+        for w in attempt_words(obj):
+            st = stats.get(w)
+            if st is None:
+                stats[w] = {"count": 1, "first_seen": ts, "last_seen": ts}
+            else:
+                st["count"] += 1
+                if st["first_seen"] is None:
+                    st["first_seen"] = ts
+                if ts is not None:
+                    st["last_seen"] = ts
+    return stats
+
+
+def check(progress_dir: Path = PROGRESS_DIR) -> List[str]:
+    """Compare the (synced) index with a full log scan; returns human-readable mismatches."""
+    log_path = progress_dir / LOG_NAME
+    expected = scan_log(log_path)
+    problems: List[str] = []
+    with closing(connect(progress_dir)) as conn:
+        sync(conn, log_path)
+        rows = conn.execute("SELECT word, count, first_seen, last_seen FROM words").fetchall()
+        ref_counts = dict(conn.execute("SELECT word, COUNT(*) FROM refs GROUP BY word").fetchall())
+    seen = set()
+    for word, count, first, last in rows:
+        seen.add(word)
+        exp = expected.get(word)
+        if exp is None:
+            problems.append(f"{word}: in index ({count}) but not in log")
+            continue
+        if (count, first, last) != (exp["count"], exp["first_seen"], exp["last_seen"]):
+            problems.append(f"{word}: index=({count}, {first}, {last}) log=({exp['count']}, {exp['first_seen']}, {exp['last_seen']})")
+        if ref_counts.get(word, 0) != count:
+            problems.append(f"{word}: {ref_counts.get(word, 0)} refs for count {count}")
+    for word in expected.keys() - seen:
+        problems.append(f"{word}: in log ({expected[word]['count']}) but missing from index")
+    return problems
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Maintain the word-exposure index for progress.ndjson")
+    ap.add_argument("--progress-dir", default=str(PROGRESS_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="Drop and rebuild the index from the log")
+    sub.add_parser("sync", help="Index lines appended since the last sync")
+    sub.add_parser("check", help="Verify the index against a full log scan")
+    sh = sub.add_parser("show", help="Print index entries for words")
+    sh.add_argument("words", nargs="+")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    progress_dir = Path(ns.progress_dir)
+    log_path = progress_dir / LOG_NAME
+    if ns.cmd == "rebuild":
+        with closing(connect(progress_dir)) as conn:
+            with conn:
+                clear(conn)
+            n = sync(conn, log_path)
+        print(f"Indexed {n} attempts -> {progress_dir / INDEX_NAME}")
+    elif ns.cmd == "sync":
+        print(f"Indexed {sync_dir(progress_dir)} new attempts")
+    elif ns.cmd == "check":
+        problems = check(progress_dir)
+        for p in problems[:50]:
+            print(f"[MISMATCH] {p}")
+        if problems:
+            print(f"{len(problems)} mismatches (run 'rebuild' to fix)")
+            return 1
+        print("Exposure index consistent with log")
+    elif ns.cmd == "show":
+        with closing(connect(progress_dir)) as conn:
+            sync(conn, log_path)
+            for w in ns.words:
+                row = conn.execute("SELECT count, first_seen, last_seen FROM words WHERE word = ?", (w.lower(),)).fetchone()
+                if not row:
+                    print(f"{w}\t0")
+                    continue
+                refs = conn.execute("SELECT attempt_id FROM refs WHERE word = ? ORDER BY log_offset", (w.lower(),)).fetchall()
+                print(f"{w}\t{row[0]}\tfirst={row[1]}\tlast={row[2]}\tattempts={','.join(r[0] or '?' for r in refs)}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Single entry point for the tracker: ielts <command> [options].
+
+Commands:
+  log             log an attempt (update_progress.py options)
+  recommend       recommend vocab (recommend_vocab.py options)
+  export-quizlet  merge passage TSVs for Quizlet (prepare-quizlet.py options)
+  level           print the current level (current_level.json)
+  batch FILE|-    run one command per line in this interpreter
+
+Startup: only sys is imported up front; a command imports its module when it runs, so `level`
+does not load the scoring / log / sqlite modules and `log` does not load the lexicon. Within the
+scripts, the daemon client, learners, srs and the sqlite index load only on the paths that use them
+(--daemon, --learner, --review-share, a local run).
+
+Batch:
+- One command per line, written as after `ielts` (POSIX shell quoting, # comments, blank lines skipped).
+- log / recommend / level lines are answered by an in-process daemon.Daemon: the lexicon store,
+  checkpoint, level and exposure counts are loaded once and kept in step, and the files written
+  are the same as with separate runs. Lines using options the daemon does not cover (--ingest,
+  --recompute-all, --no-store, another --vocab-dir, --daemon, profiling) and export-quizlet
+  lines run the module's main() in the same interpreter instead.
+- A failing line is reported as "[ERROR] line N: ..." and the batch continues; exit status 1 if
+  any line failed.
+
+Usage:
+  python scripts/ielts.py log --skill reading --attempt-id read-001 --comp-total 10 --comp-correct 8
+  python scripts/ielts.py recommend --count 15 --tsv recommended.tsv
+  python scripts/ielts.py export-quizlet --delta
+  python scripts/ielts.py level --learner stu-0042 --json
+  python scripts/ielts.py batch commands.txt
+  printf 'log --skill reading --attempt-id r1 --comp-total 10 --comp-correct 8\\nlevel\\n' | python scripts/ielts.py batch -
+"""
+from __future__ import annotations
+import sys
+
+PROGRESS_DIR = "data/progress"
+MODULES = {
+    "log": "update_progress",
+    "recommend": "recommend_vocab",
+    "export-quizlet": "prepare-quizlet",
+}
+USAGE = "usage: ielts {log,recommend,export-quizlet,level,batch} [options]  (ielts <command> -h for help)"
+
+
+def module(cmd: str):
+    import importlib
+
+    return importlib.import_module(MODULES[cmd])
+
+
+def run_main(cmd: str, args: list[str]) -> int:
+    """Run a script's main() as `ielts <cmd> args` (argparse reads sys.argv for prog / empty argv)."""
+    sys.argv = [f"ielts {cmd}", *args]
+    return module(cmd).main(args)
+
+
+def format_level(level: dict) -> str:
+    text = f"{level.get('current_cefr', 'B1')} ({level.get('sublevel_code')}) score={level.get('proficiency_score') or 0.0:.1f}"
+    if level.get("provisional"):
+        text += " provisional"
+    return text + f" last_update={level.get('last_update')}"
+
+
+def print_level(level: dict, as_json: bool) -> None:
+    if as_json:
+        import json
+
+        print(json.dumps(level, ensure_ascii=False, indent=2))
+    else:
+        print(format_level(level))
+
+
+def level_parser():
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="ielts level", description="Print the current level")
+    ap.add_argument("--learner", help="Learner id (see learners.py)")
+    ap.add_argument("--json", action="store_true", help="Print current_level.json as is")
+    return ap
+
+
+def cmd_level(args: list[str]) -> int:
+    import json
+    from pathlib import Path
+
+    ns = level_parser().parse_args(args)
+    progress_dir = Path(PROGRESS_DIR)
+    if ns.learner:
+        import learners
+
+        try:
+            progress_dir = learners.learner_dir(ns.learner, progress_dir)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 2
+    level = {"current_cefr": "B1", "last_update": None}
+    path = progress_dir / "current_level.json"
+    if path.exists():
+        try:
+            level = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            print(f"[WARN] unreadable {path}: {e}", file=sys.stderr)
+    print_level(level, ns.json)
+    return 0
+
+
+class Batch:
+    """Runs batch lines against one in-process daemon.Daemon (created on first use)."""
+
+    def __init__(self, vocab_dir: str):
+        self.vocab_dir = vocab_dir
+        self._daemon = None
+
+    @property
+    def daemon(self):
+        if self._daemon is None:
+            import daemon
+            from pathlib import Path
+
+            self._daemon = daemon.Daemon(Path(self.vocab_dir), Path(PROGRESS_DIR))
+        return self._daemon
+
+    def close(self) -> None:
+        if self._daemon is not None:
+            self._daemon.close()
+
+    def fallback(self, cmd: str, args: list[str]) -> int:
+        """module main() for this line; the daemon may have pointed the modules at a learner dir."""
+        from pathlib import Path
+
+        for name in ("update_progress", "recommend_vocab"):
+            if name in sys.modules:
+                sys.modules[name].use_progress_dir(Path(PROGRESS_DIR))
+        return run_main(cmd, args)
+
+    def ask(self, req: dict) -> dict:
+        resp = self.daemon.handle(req)
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error"))
+        return resp
+
+    def run(self, args: list[str]) -> int:
+        if not args:
+            return 0
+        cmd, rest = args[0], args[1:]
+        if cmd == "level":
+            ns = level_parser().parse_args(rest)
+            print_level(self.ask({"op": "level", "learner": ns.learner})["level"], ns.json)
+            return 0
+        if cmd not in MODULES:
+            raise ValueError(f"unknown command {cmd!r} (batch runs log, recommend, export-quizlet, level)")
+        if cmd == "export-quizlet":
+            return self.fallback(cmd, rest)
+        sys.argv = [f"ielts {cmd}", *rest]
+        mod = module(cmd)
+        ns = mod.parse_args(rest)
+        if ns.daemon is not None or ns.profile or ns.metrics_out or ns.cprofile:
+            return self.fallback(cmd, rest)
+        if cmd == "log":
+            if ns.ingest or ns.recompute_all:
+                return self.fallback(cmd, rest)
+            for line in self.ask(mod.daemon_request(ns))["lines"]:
+                print(line)
+            return 0
+        if ns.no_store or ns.vocab_dir != self.vocab_dir:
+            return self.fallback(cmd, rest)
+        mod.write_response(ns, self.ask(mod.daemon_request(ns)))
+        return 0
+
+
+def cmd_batch(args: list[str]) -> int:
+    import argparse
+    import shlex
+    import time
+
+    ap = argparse.ArgumentParser(prog="ielts batch", description="Run one ielts command per line in this interpreter")
+    ap.add_argument("file", help="Command file, or - for stdin")
+    ap.add_argument("--vocab-dir", default="vocab", help="Lexicon served to recommend lines (others fall back to a full run)")
+    ns = ap.parse_args(args)
+    src = sys.stdin if ns.file == "-" else open(ns.file, encoding="utf-8")
+    batch = Batch(ns.vocab_dir)
+    done = failed = 0
+    t0 = time.perf_counter()
+    try:
+        for lineno, line in enumerate(src, 1):
+            try:
+                words = shlex.split(line, comments=True)
+            except ValueError as e:
+                print(f"[ERROR] line {lineno}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            if not words:
+                continue
+            done += 1
+            try:
+                status = batch.run(words)
+            except SystemExit as e:  # argparse error / --help on this line
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:  # noqa: BLE001 - report the line, keep going
+                print(f"[ERROR] line {lineno}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            finally:
+                sys.stdout.flush()
+            if status:
+                failed += 1
+                print(f"[ERROR] line {lineno}: exit status {status}", file=sys.stderr)
+    finally:
+        batch.close()
+        if src is not sys.stdin:
+            src.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] batch: {done} commands, {failed} failed, {elapsed * 1000:.0f} ms", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__ if args else USAGE, file=sys.stdout if args else sys.stderr)
+        return 0 if args else 2
+    cmd, rest = args[0], args[1:]
+    if cmd == "level":
+        return cmd_level(rest)
+    if cmd == "batch":
+        return cmd_batch(rest)
+    if cmd in MODULES:
+        return run_main(cmd, rest)
+    print(f"[ERROR] unknown command {cmd!r}\n{USAGE}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Per-learner progress directories for running the tracker for a whole cohort.
+
+Each learner gets a private progress dir (same files as the single-learner data/progress/:
+progress.ndjson, current_level.json, checkpoint, exposure index), sharded by the first two hex
+digits of sha1(learner id) so no directory holds more than ~1/256 of the cohort:
+
+  data/progress/learners/<shard>/<learner-id>/progress.ndjson
+
+update_progress.py / recommend_vocab.py take --learner ID to work on that directory;
+`update_progress.py --recompute-all` rebuilds every learner's level in a process pool.
+Without --learner the scripts keep using data/progress/ directly.
+
+Usage:
+  python scripts/learners.py path stu-0042
+  python scripts/learners.py list
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+PROGRESS_DIR = Path("data/progress")
+LEARNERS_DIRNAME = "learners"
+LOG_NAME = "progress.ndjson"
+LEVEL_NAME = "current_level.json"
+LEARNER_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+def shard(learner_id: str) -> str:
+    return hashlib.sha1(learner_id.encode("utf-8")).hexdigest()[:2]
+
+
+def learner_dir(learner_id: str, root: Path = PROGRESS_DIR) -> Path:
+    """Progress dir of one learner (not created). Raises ValueError for ids unsafe as dir names."""
+    if not LEARNER_ID_RE.match(learner_id):
+        raise ValueError(f"invalid learner id {learner_id!r} (letters, digits, . _ - ; max 64 chars)")
+    return root / LEARNERS_DIRNAME / shard(learner_id) / learner_id
+
+
+def iter_learners(root: Path = PROGRESS_DIR) -> Iterator[Tuple[str, Path]]:
+    """(learner_id, dir) for every learner with a progress log, sorted by id."""
+    base = root / LEARNERS_DIRNAME
+    if not base.is_dir():
+        return
+    found = [(d.name, d) for s in base.iterdir() if s.is_dir() for d in s.iterdir() if (d / LOG_NAME).exists()]
+    yield from sorted(found)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Locate / list per-learner progress directories")
+    ap.add_argument("--progress-dir", default=str(PROGRESS_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("path", help="Print the progress dir of a learner")
+    p.add_argument("learner")
+    sub.add_parser("list", help="List learners with their current level")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    root = Path(ns.progress_dir)
+    if ns.cmd == "path":
+        try:
+            print(learner_dir(ns.learner, root))
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 2
+        return 0
+    for lid, d in iter_learners(root):
+        level = {}
+        if (d / LEVEL_NAME).exists():
+            try:
+                level = json.loads((d / LEVEL_NAME).read_text(encoding="utf-8"))
+            except Exception:  # noqa: BLE001
+                pass
+        print(f"{lid}\t{level.get('current_cefr', '?')}\t{level.get('sublevel_code') or '-'}\t{level.get('proficiency_score', '-')}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
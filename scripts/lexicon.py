@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Unified lexicon ingestion: vocab/*.json, *-vocab.tsv and Markdown word lists -> one entry list.
+
+Every source is normalized to the JSON entry shape used by recommend_vocab.py / vocab_store.py:
+
+    {"word", "pos", "cefr", "meanings": [...], "collocations": [...], "examples": [...], ...}
+
+- JSON (*.json): lists of entry dicts; other fields (ipa, synonyms, ...) are kept, "CEFR" -> "cefr".
+- TSV (*-vocab.tsv): TERM<TAB>DEFINITION as generated per passage. The CEFR label at the end of the
+  definition ("... (B2)") becomes cefr; "meaning – example" (or "meaning; example") is split into
+  meanings / examples; a POS marker on the term ("approximate (v)") becomes pos. The
+  *-collocations.tsv files are phrase lists, not word entries, and are not read here.
+- Markdown (*.md except README.md): the "### word: ..." blocks described in vocab/README.md with
+  "- key: value" lines ("pos: adjective | CEFR: B2 | IPA: ..." may share a line).
+
+Text sources are streamed line by line with precompiled patterns. Entries are deduplicated with
+the lowercase-term key of prepare-quizlet's merge(): the first occurrence wins (JSON, then
+Markdown, then TSV files, each in sorted name order) and its empty fields are filled from later
+duplicates.
+
+Cache: the normalized entries of each TSV / Markdown source are stored in
+<vocab-dir>/.lexicon/parsed/<name>.json keyed by mtime_ns + size (and PARSER_VERSION), so repeated
+runs reparse only changed files (2000 passage TSVs: 440 ms parsed, 190 ms from cache). Cache files
+are written through unique temp files (_replace_atomic, shared with vocab_store), so concurrent
+loaders do not collide; a failed cache write only costs the next run a reparse. vocab_store
+compiles its memory-mapped store from load_entries(); recommend_vocab.py --no-store reads it directly.
+
+Usage:
+  python scripts/lexicon.py stats --vocab-dir vocab
+  python scripts/lexicon.py show regulate sustainable --vocab-dir vocab
+  python scripts/lexicon.py dump --vocab-dir vocab --out lexicon.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+
+PARSER_VERSION = 1  # bump when normalization changes; cached parses are then discarded
+CACHE_DIRNAME = ".lexicon"  # shared with vocab_store.py
+PARSED_DIRNAME = "parsed"
+JSON_GLOB = "*.json"
+TSV_GLOB = "*-vocab.tsv"
+MD_GLOB = "*.md"
+SKIP_FILES = {"README.md"}
+
+CEFR_TAIL_RE = re.compile(r"\s*\(\s*((?:A1|A2|B1|B2|C1|C2)[+-]?)\s*\)\s*\.?\s*$", re.IGNORECASE)
+POS_MARK_RE = re.compile(r"^(.*\S)\s*\(\s*(n|v|adj|adv|prep|conj|phr\.?\s*v|phrasal verb|noun|verb|adjective|adverb)\.?\s*\)$", re.IGNORECASE)
+EXAMPLE_SPLIT_RE = re.compile(r"\s+[–—-]\s+")  # "meaning – example"
+MD_WORD_RE = re.compile(r"^#{2,4}\s*word\s*:\s*(.+?)\s*$", re.IGNORECASE)
+MD_FIELD_RE = re.compile(r"^\s*[-*]\s+(.*\S)\s*$")
+MD_PAIR_RE = re.compile(r"^\s*([A-Za-z ]+?)\s*:\s*(.*?)\s*$")
+POS_NAMES = {"n": "noun", "v": "verb", "adj": "adjective", "adv": "adverb", "prep": "preposition", "conj": "conjunction", "phrv": "phrasal verb", "phr v": "phrasal verb", "phr. v": "phrasal verb"}
+MD_KEYS = {
+    "pos": "pos", "part of speech": "pos", "cefr": "cefr", "level": "cefr", "ipa": "ipa",
+    "meaning": "meanings", "meanings": "meanings", "definition": "meanings",
+    "collocation": "collocations", "collocations": "collocations",
+    "example": "examples", "examples": "examples",
+    "synonym": "synonyms", "synonyms": "synonyms", "antonym": "antonyms", "antonyms": "antonyms",
+}
+MD_LIST_KEYS = {"meanings", "collocations", "examples", "synonyms", "antonyms"}
+
+
+def term_key(word: str) -> str:
+    """Dedup key: the lowercase term, as prepare-quizlet's merge() uses."""
+    return word.lower()
+
+
+def source_files(vocab_dir: Path) -> List[Path]:
+    """All lexicon sources in dedup precedence order: JSON, Markdown, TSV (each sorted)."""
+    out: List[Path] = []
+    for pattern in (JSON_GLOB, MD_GLOB, TSV_GLOB):
+        out.extend(p for p in sorted(vocab_dir.glob(pattern)) if p.name not in SKIP_FILES)
+    return out
+
+
+def _split_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(";") if v.strip()]
+
+
+def parse_json(path: Path) -> Iterator[Dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON list of entries")
+    for e in data:
+        if not isinstance(e, dict) or not isinstance(e.get("word"), str) or not e["word"].strip():
+            continue
+        if "CEFR" in e and "cefr" not in e:
+            e = dict(e)
+            e["cefr"] = e.pop("CEFR")
+        yield e
+
+
+def parse_tsv_definition(term: str, definition: str) -> Dict[str, Any]:
+    """Entry for one TSV row: "điều chỉnh – regulate planting and harvesting (B2)"."""
+    entry: Dict[str, Any] = {"word": term}
+    m = POS_MARK_RE.match(term)
+    if m:
+        abbr = re.sub(r"\s+", " ", m.group(2).lower())
+        entry["word"], entry["pos"] = m.group(1), POS_NAMES.get(abbr, abbr)
+    m = CEFR_TAIL_RE.search(definition)
+    if m:
+        entry["cefr"] = m.group(1).upper()
+        definition = definition[: m.start()]
+    parts = EXAMPLE_SPLIT_RE.split(definition, maxsplit=1)
+    if len(parts) == 1:
+        parts = definition.split("; ", 1)
+    meaning = parts[0].strip()
+    entry["meanings"] = [meaning] if meaning else []
+    entry["collocations"] = []
+    entry["examples"] = [parts[1].strip()] if len(parts) > 1 and parts[1].strip() else []
+    return entry
+
+
+def parse_tsv(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as fh:
+        for n, line in enumerate(fh):
+            term, sep, definition = line.rstrip("\r\n").partition("\t")
+            term = term.strip()
+            if not sep or not term:
+                if line.strip():
+                    metrics.count("lexicon_malformed_skipped")
+                continue
+            if n == 0 and term.lower() in ("term", "word", "vocabulary", "collocation/expression"):
+                continue  # header row
+            yield parse_tsv_definition(term, definition.strip())
+
+
+def parse_markdown(path: Path) -> Iterator[Dict[str, Any]]:
+    entry: Optional[Dict[str, Any]] = None
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            m = MD_WORD_RE.match(line)
+            if m:
+                if entry is not None:
+                    yield entry
+                entry = {"word": m.group(1), "meanings": [], "collocations": [], "examples": []}
+                continue
+            if entry is None:
+                continue
+            if line.startswith("#"):  # any other heading ends the block
+                yield entry
+                entry = None
+                continue
+            m = MD_FIELD_RE.match(line)
+            if not m:
+                continue
+            for part in m.group(1).split(" | "):
+                pair = MD_PAIR_RE.match(part)
+                if not pair:
+                    continue
+                field = MD_KEYS.get(pair.group(1).lower())
+                value = pair.group(2)
+                if field is None or not value:
+                    continue
+                if field in MD_LIST_KEYS:
+                    entry.setdefault(field, []).extend([value] if field in ("meanings", "examples") else _split_list(value))
+                else:
+                    entry[field] = value.upper() if field == "cefr" else value
+    if entry is not None:
+        yield entry
+
+
+PARSERS = {".json": parse_json, ".tsv": parse_tsv, ".md": parse_markdown}
+
+
+def parse_file(path: Path) -> List[Dict[str, Any]]:
+    """Normalized entries of one source (empty, with a warning, if it cannot be read)."""
+    try:
+        return list(PARSERS[path.suffix.lower()](path))
+    except Exception as e:  # noqa: BLE001
+        metrics.count("lexicon_files_skipped")
+        print(f"[WARN] skip {path}: {e}", file=sys.stderr)
+        return []
+
+
+def _cache_path(vocab_dir: Path, path: Path) -> Path:
+    return vocab_dir / CACHE_DIRNAME / PARSED_DIRNAME / (path.name + ".json")
+
+
+def _replace_atomic(path: Path, *chunks: bytes) -> None:
+    """Write to a unique temp file next to `path`, then os.replace() it over `path` (concurrent
+    writers never share a temp file; the last replace wins)."""
+    import tempfile  # imported here: only cache misses / store rebuilds write
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def cached_entries(vocab_dir: Path, path: Path) -> List[Dict[str, Any]]:
+    """parse_file() through the per-file cache (reparsed when mtime / size changed).
+
+    JSON sources are already in entry form: loading a cached copy is no faster, so they are read
+    directly. A cache that cannot be written (read-only dir, full disk) is only a miss.
+    """
+    if path.suffix.lower() == ".json":
+        return parse_file(path)
+    st = path.stat()
+    key = {"parser": PARSER_VERSION, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    cache = _cache_path(vocab_dir, path)
+    try:
+        with cache.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("key") == key:
+            metrics.count("lexicon_cache_hits")
+            return data["entries"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    metrics.count("lexicon_files_parsed")
+    entries = parse_file(path)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        _replace_atomic(cache, json.dumps({"key": key, "entries": entries}, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    except OSError:
+        metrics.count("lexicon_cache_write_failed")
+    return entries
+
+
+def prune_cache(vocab_dir: Path, files: Iterable[Path]) -> None:
+    """Drop cached parses of sources that no longer exist."""
+    parsed = vocab_dir / CACHE_DIRNAME / PARSED_DIRNAME
+    if not parsed.is_dir():
+        return
+    keep = {p.name + ".json" for p in files}
+    for c in parsed.glob("*.json"):
+        if c.name not in keep:
+            c.unlink(missing_ok=True)
+
+
+def merge_entries(groups: Iterable[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Deduplicate by term_key (first occurrence wins, gaps filled) -> (entries, duplicates dropped)."""
+    out: List[Dict[str, Any]] = []
+    first: Dict[str, Dict[str, Any]] = {}
+    dups = 0
+    for entries in groups:
+        for e in entries:
+            key = term_key(e["word"].strip())
+            kept = first.get(key)
+            if kept is None:
+                first[key] = e
+                out.append(e)
+                continue
+            dups += 1
+            for field, value in e.items():
+                if value and not kept.get(field):
+                    kept[field] = value
+    return out, dups
+
+
+def load_entries(vocab_dir: Path, files: Optional[List[Path]] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """All lexicon entries under vocab_dir, normalized and deduplicated."""
+    files = source_files(vocab_dir) if files is None else files
+    if use_cache:
+        prune_cache(vocab_dir, files)
+        groups = (cached_entries(vocab_dir, p) for p in files)
+    else:
+        groups = (parse_file(p) for p in files)
+    entries, dups = merge_entries(groups)
+    metrics.count("lexicon_duplicates_dropped", dups)
+    return entries
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Inspect the unified lexicon (JSON + TSV + Markdown sources)")
+    ap.add_argument("cmd", choices=["stats", "show", "dump"])
+    ap.add_argument("words", nargs="*", help="Words to show")
+    ap.add_argument("--vocab-dir", default="vocab")
+    ap.add_argument("--out", help="dump: write the entry list here (default stdout)")
+    ap.add_argument("--no-cache", action="store_true", help="Reparse every source")
+    metrics.add_arguments(ap)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def run(ns: argparse.Namespace) -> int:
+    vocab_dir = Path(ns.vocab_dir)
+    files = source_files(vocab_dir)
+    if not files:
+        print(f"No lexicon sources under {vocab_dir}", file=sys.stderr)
+        return 1
+    with metrics.span("load_entries"):
+        entries = load_entries(vocab_dir, files, use_cache=not ns.no_cache)
+    if ns.cmd == "stats":
+        by_kind: Dict[str, int] = {}
+        for p in files:
+            by_kind[p.suffix.lower()] = by_kind.get(p.suffix.lower(), 0) + 1
+        cefr: Dict[str, int] = {}
+        for e in entries:
+            label = e.get("cefr") or "UNK"
+            cefr[label] = cefr.get(label, 0) + 1
+        print(f"{len(entries)} entries from {len(files)} file(s) ({', '.join(f'{k[1:]}={v}' for k, v in sorted(by_kind.items()))})")
+        print("cefr: " + ", ".join(f"{k}={v}" for k, v in sorted(cefr.items())))
+    elif ns.cmd == "show":
+        wanted = {term_key(w) for w in ns.words}
+        for e in entries:
+            if term_key(e["word"]) in wanted:
+                print(json.dumps(e, ensure_ascii=False))
+    else:
+        text = json.dumps(entries, ensure_ascii=False, indent=2) + "\n"
+        if ns.out:
+            Path(ns.out).write_text(text, encoding="utf-8")
+            print(f"[WROTE] {len(entries)} entries -> {ns.out}")
+        else:
+            sys.stdout.write(text)
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("lexicon", ns):
+        return run(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
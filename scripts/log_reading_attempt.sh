@@ -2,6 +2,7 @@
 # Quick helper to append a reading attempt & auto-use timestamp for attempt id.
 # Usage: ./scripts/log_reading_attempt.sh source_id 10 7 10 6 780 295 "new words list"
 # Args: source comp_total comp_correct vocab_presented vocab_mastered time_sec tokens "new words space-separated"
+# Set IELTS_DAEMON=<socket path or host:port> to log through a running scripts/daemon.py.
 set -euo pipefail
 if [ $# -lt 8 ]; then
   echo "Usage: $0 source comp_total comp_correct vocab_presented vocab_mastered time_sec tokens 'new words'" >&2
@@ -10,6 +11,10 @@ fi
 src=$1; comp_total=$2; comp_correct=$3; vp=$4; vm=$5; t=$6; tokens=$7; shift 7; new_words=$*
 stamp=$(date -u +%Y-%m-%dT%H%M%SZ)
 attempt_id="read-${stamp}"
-python3 scripts/update_progress.py --skill reading --attempt-id "$attempt_id" --source "$src" \
+daemon_args=()
+if [ -n "${IELTS_DAEMON:-}" ]; then
+  daemon_args=(--daemon "$IELTS_DAEMON")
+fi
+python3 scripts/ielts.py log ${daemon_args[@]+"${daemon_args[@]}"} --skill reading --attempt-id "$attempt_id" --source "$src" \
   --comp-total "$comp_total" --comp-correct "$comp_correct" --vocab-presented "$vp" \
   --vocab-mastered "$vm" --time "$t" --tokens "$tokens" --new-words $new_words
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Compact the progress log into immutable compressed segments with a time / source index.
+
+progress.ndjson only grows. `compact` moves every line before the current time window (default:
+this calendar month, UTC) out of the active file into progress.ndjson.segments/:
+
+- <window>.<n>.ndjson.gz (or .xz with --codec xz): the lines of one window, byte-for-byte, as a
+  sequence of independently compressed blocks of whole lines (~BLOCK_RAW bytes each). The file
+  is a valid multi-member gzip / xz stream (zcat / xzcat print the lines).
+- index.json: base (logical bytes compacted so far), last seq, and per segment its logical start
+  offset, sizes, timestamp range and blocks [file_offset, length, raw_offset, raw_length,
+  first_ts, last_ts] (timestamp range of the block; first/last = min/max).
+- sources.json: source_id -> [[segment, block], ...], read only by `query --source`.
+
+The active file keeps the current window as plain NDJSON and appends go there as before.
+progress_log.py reads segments + active file as one logical stream, so update_progress.py,
+recommend_vocab.py, the exposure index and the checkpoint see the same bytes at the same offsets
+as before compaction (nothing is rebuilt).
+
+Compaction holds the append lock. It writes the segments, then the index with a "trim" marker
+(length + digest of the compacted prefix), then atomically replaces the active file with its
+remainder, then drops the marker; readers skip a still-present prefix while the marker matches, so
+a crash at any point never shows a line twice.
+
+Timestamps are compared as their first 19 characters (YYYY-MM-DDTHH:MM:SS, UTC as written by
+update_progress.py). --since is inclusive, --until exclusive; both accept any prefix (2025-08,
+2025-08-11, 2025-08-11T09).
+
+Usage:
+  python scripts/log_segments.py compact                          # everything before this month
+  python scripts/log_segments.py compact --window week --before 2025-09-01 --codec xz
+  python scripts/log_segments.py query --since 2025-08 --until 2025-09
+  python scripts/log_segments.py query --source cam16-test2-p1 --stats
+  python scripts/log_segments.py info
+"""
+from __future__ import annotations
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from progress_log import (
+    DIGEST_SPAN,
+    LOG_FILE,
+    SEGMENT_INDEX,
+    atomic_write_text,
+    decode_line,
+    file_lock,
+    lock_path,
+    log_layout,
+    read_segment_block,
+    segment_index,
+    segments_dir,
+)
+
+INDEX_VERSION = 1
+SOURCES_NAME = "sources.json"
+BLOCK_RAW = 64 * 1024  # uncompressed bytes per block (unit of random access)
+WINDOWS = ("day", "week", "month", "year")
+CODECS = {
+    "gzip": (lambda b: gzip.compress(b, compresslevel=6, mtime=0), ".gz"),
+    "xz": (lzma.compress, ".xz"),
+}
+
+Record = Dict[str, Any]
+
+
+def ts_key(rec: Optional[Record]) -> Optional[str]:
+    ts = rec.get("timestamp") if rec is not None else None
+    return ts[:19] if isinstance(ts, str) and len(ts) >= 10 else None
+
+
+def window_key(ts: str, window: str) -> str:
+    if window == "day":
+        return ts[:10]
+    if window == "month":
+        return ts[:7]
+    if window == "year":
+        return ts[:4]
+    y, w, _ = date.fromisoformat(ts[:10]).isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def window_start(today: date, window: str) -> str:
+    """ISO prefix where the window containing `today` starts (lines before it get compacted)."""
+    if window == "day":
+        return today.isoformat()
+    if window == "month":
+        return today.isoformat()[:7]
+    if window == "year":
+        return today.isoformat()[:4]
+    return (today - timedelta(days=today.weekday())).isoformat()
+
+
+def empty_index() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "base": 0, "last_seq": None, "segments": []}
+
+
+def load_sources(log: Path) -> Dict[str, List[List[int]]]:
+    p = segments_dir(log) / SOURCES_NAME
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+
+def _fsync_dir(d: Path) -> None:
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_segment(seg_dir: Path, key: str, lines: List[Tuple[bytes, Optional[Record]]], codec: str) -> Tuple[Dict[str, Any], Dict[str, List[int]]]:
+    """Write one immutable segment; returns (index entry without 'start', source -> block numbers)."""
+    compress, ext = CODECS[codec]
+    n = 0
+    while (seg_dir / f"{key}.{n:03d}.ndjson{ext}").exists():
+        n += 1
+    final = seg_dir / f"{key}.{n:03d}.ndjson{ext}"
+    tmp = seg_dir / f".{final.name}.tmp"
+    blocks: List[List[Any]] = []
+    sources: Dict[str, List[int]] = {}
+    seqs = [rec["seq"] for _raw, rec in lines if rec is not None and type(rec.get("seq")) is int]
+    raw_off = 0
+    with tmp.open("wb") as f:
+        i = 0
+        while i < len(lines):
+            chunk: List[bytes] = []
+            size = 0
+            first = last = None
+            while i < len(lines) and (not chunk or size + len(lines[i][0]) <= BLOCK_RAW):
+                raw, rec = lines[i]
+                chunk.append(raw)
+                size += len(raw)
+                ts = ts_key(rec)
+                if ts is not None:
+                    first = ts if first is None or ts < first else first
+                    last = ts if last is None or ts > last else last
+                src = rec.get("source_id") if rec is not None else None
+                if isinstance(src, str) and src:
+                    blist = sources.setdefault(src, [])
+                    if not blist or blist[-1] != len(blocks):
+                        blist.append(len(blocks))
+                i += 1
+            data = compress(b"".join(chunk))
+            blocks.append([f.tell(), len(data), raw_off, size, first, last])
+            f.write(data)
+            raw_off += size
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, final)
+    stamps = [b[4] for b in blocks if b[4]] + [b[5] for b in blocks if b[5]]
+    entry = {
+        "file": final.name,
+        "codec": codec,
+        "window": key,
+        "raw_bytes": raw_off,
+        "stored_bytes": final.stat().st_size,
+        "records": sum(1 for _raw, rec in lines if rec is not None),
+        "first_ts": min(stamps) if stamps else None,
+        "last_ts": max(stamps) if stamps else None,
+        "first_seq": seqs[0] if seqs else None,
+        "last_seq": seqs[-1] if seqs else None,
+        "blocks": blocks,
+    }
+    return entry, sources
+
+
+def _split_prefix(log: Path, before: str) -> Tuple[int, List[Tuple[bytes, Optional[Record]]]]:
+    """Complete lines at the head of the active file up to the first record at/after `before`."""
+    lines: List[Tuple[bytes, Optional[Record]]] = []
+    cut = 0
+    with log.open("rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            rec = decode_line(raw)
+            ts = ts_key(rec)
+            if ts is not None and ts >= before:
+                break
+            lines.append((raw, rec))
+            cut += len(raw)
+    return cut, lines
+
+
+def compact(log: Path, before: str, window: str = "month", codec: str = "gzip") -> Dict[str, Any]:
+    """Move the active-file prefix before `before` into segments. Returns a summary."""
+    seg_dir = segments_dir(log)
+    with file_lock(lock_path(log)):
+        if not log.exists():
+            return {"segments": 0, "records": 0, "raw_bytes": 0, "stored_bytes": 0}
+        idx, base, skip = log_layout(log)
+        idx = copy.deepcopy(idx) if idx else empty_index()
+        if idx.get("trim"):  # an earlier compaction stopped before rewriting the active file
+            _finish_trim(log, seg_dir, idx, skip)
+        cut, lines = _split_prefix(log, before)
+        if not lines:
+            return {"segments": 0, "records": 0, "raw_bytes": 0, "stored_bytes": 0}
+        seg_dir.mkdir(parents=True, exist_ok=True)
+
+        # one segment per window; late (out-of-order) and undated lines stay in the current segment
+        groups: List[List[Any]] = []
+        for raw, rec in lines:
+            ts = ts_key(rec)
+            key = window_key(ts, window) if ts else None
+            if not groups:
+                groups.append([key, []])
+            elif key is not None:
+                if groups[-1][0] is None:
+                    groups[-1][0] = key
+                elif key > groups[-1][0]:
+                    groups.append([key, []])
+            groups[-1][1].append((raw, rec))
+
+        sources = load_sources(log)
+        start = idx["base"]
+        new_entries = []
+        for key, group in groups:
+            entry, seg_sources = write_segment(seg_dir, key or "undated", group, codec)
+            entry["start"] = start
+            start += entry["raw_bytes"]
+            seg_no = len(idx["segments"]) + len(new_entries)
+            for src, blist in seg_sources.items():
+                sources.setdefault(src, []).extend([seg_no, b] for b in blist)
+            new_entries.append(entry)
+        _fsync_dir(seg_dir)
+
+        with log.open("rb") as f:
+            f.seek(max(0, cut - DIGEST_SPAN))
+            tail_digest = hashlib.sha1(f.read(min(cut, DIGEST_SPAN))).hexdigest()
+        idx["segments"].extend(new_entries)
+        idx["base"] = start
+        seqs = [e["last_seq"] for e in new_entries if e["last_seq"] is not None]
+        if seqs:
+            idx["last_seq"] = seqs[-1]
+        idx["trim"] = {"bytes": cut, "digest": tail_digest}
+        atomic_write_text(seg_dir / SOURCES_NAME, json.dumps(sources, ensure_ascii=False, separators=(",", ":")) + "\n")
+        atomic_write_text(seg_dir / SEGMENT_INDEX, json.dumps(idx, ensure_ascii=False, separators=(",", ":")) + "\n")
+        _finish_trim(log, seg_dir, idx, cut)
+        return {
+            "segments": len(new_entries),
+            "records": sum(e["records"] for e in new_entries),
+            "raw_bytes": sum(e["raw_bytes"] for e in new_entries),
+            "stored_bytes": sum(e["stored_bytes"] for e in new_entries),
+        }
+
+
+def _finish_trim(log: Path, seg_dir: Path, idx: Dict[str, Any], skip: int) -> None:
+    """Drop the compacted prefix from the active file, then the trim marker from the index."""
+    if skip:
+        tmp = log.with_name(f".{log.name}.compact.tmp")
+        st = log.stat()
+        with log.open("rb") as src, tmp.open("wb") as dst:
+            src.seek(skip)
+            while True:
+                chunk = src.read(1 << 20)
+                if not chunk:
+                    break
+                dst.write(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+        # same logical bytes: keep the mtime, which span_digest() records to notice in-place rewrites
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, log)
+    idx.pop("trim", None)
+    atomic_write_text(seg_dir / SEGMENT_INDEX, json.dumps(idx, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def _overlaps(first: Optional[str], last: Optional[str], since: Optional[str], until: Optional[str]) -> bool:
+    if since is None and until is None:
+        return True
+    if first is None:
+        return False  # no timestamps in this block: nothing can match a time filter
+    return (since is None or last >= since) and (until is None or first < until)
+
+
+def _matches(rec: Record, since: Optional[str], until: Optional[str], source: Optional[str]) -> bool:
+    if source is not None and rec.get("source_id") != source:
+        return False
+    if since is None and until is None:
+        return True
+    ts = ts_key(rec)
+    return ts is not None and (since is None or ts >= since) and (until is None or ts < until)
+
+
+def query(log: Path, since: str | None = None, until: str | None = None, source: str | None = None, stats: Dict[str, int] | None = None) -> Iterator[Record]:
+    """Records matching the filters, in log order, reading only the segment blocks that can match."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("bytes_read", 0)
+    stats.setdefault("blocks_read", 0)
+    idx, _base, skip = log_layout(log)
+    if idx:
+        wanted = None
+        if source is not None:
+            wanted = {(s, b) for s, b in load_sources(log).get(source, [])}
+        for s_no, seg in enumerate(idx["segments"]):
+            if not _overlaps(seg["first_ts"], seg["last_ts"], since, until):
+                continue
+            with (segments_dir(log) / seg["file"]).open("rb") as f:
+                for b_no, block in enumerate(seg["blocks"]):
+                    if wanted is not None and (s_no, b_no) not in wanted:
+                        continue
+                    if not _overlaps(block[4], block[5], since, until):
+                        continue
+                    stats["bytes_read"] += block[1]
+                    stats["blocks_read"] += 1
+                    for raw in read_segment_block(log, seg, block, f).split(b"\n"):
+                        rec = decode_line(raw)
+                        if rec is not None and _matches(rec, since, until, source):
+                            yield rec
+    if log.exists():
+        with log.open("rb") as f:
+            f.seek(skip)
+            for raw in f:
+                stats["bytes_read"] += len(raw)
+                rec = decode_line(raw)
+                if rec is not None and _matches(rec, since, until, source):
+                    yield rec
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Compact / query the progress log as compressed segments")
+    ap.add_argument("--log", default=str(LOG_FILE))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="Move lines before the current window into segments")
+    c.add_argument("--window", choices=WINDOWS, default="month")
+    c.add_argument("--before", help="Compact records before this ISO date/prefix (default: start of the current window)")
+    c.add_argument("--codec", choices=sorted(CODECS), default="gzip")
+    q = sub.add_parser("query", help="Print matching attempts as NDJSON")
+    q.add_argument("--since", help="Inclusive ISO prefix, e.g. 2025-08")
+    q.add_argument("--until", help="Exclusive ISO prefix, e.g. 2025-09")
+    q.add_argument("--source", help="source_id")
+    q.add_argument("--stats", action="store_true", help="Report bytes read to stderr")
+    sub.add_parser("info", help="Segment summary and compression ratio")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    log = Path(ns.log)
+    if ns.cmd == "compact":
+        before = ns.before or window_start(datetime.now(timezone.utc).date(), ns.window)
+        res = compact(log, before, ns.window, ns.codec)
+        ratio = res["raw_bytes"] / res["stored_bytes"] if res["stored_bytes"] else 0
+        print(f"Compacted {res['records']} records before {before} into {res['segments']} segment(s): "
+              f"{res['raw_bytes']} -> {res['stored_bytes']} bytes ({ratio:.1f}x)")
+        return 0
+    if ns.cmd == "query":
+        stats: Dict[str, int] = {}
+        n = 0
+        out = sys.stdout
+        for rec in query(log, ns.since, ns.until, ns.source, stats):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1
+        if ns.stats:
+            idx = segment_index(log)
+            stored = sum(s["stored_bytes"] for s in idx["segments"]) if idx else 0
+            active = log.stat().st_size if log.exists() else 0
+            print(f"[INFO] {n} records; read {stats['bytes_read']} of {stored + active} bytes on disk "
+                  f"({stats['blocks_read']} segment blocks)", file=sys.stderr)
+        return 0
+    idx = segment_index(log)
+    active = log.stat().st_size if log.exists() else 0
+    if not idx:
+        print(f"No segments; active file {active} bytes")
+        return 0
+    raw = sum(s["raw_bytes"] for s in idx["segments"])
+    stored = sum(s["stored_bytes"] for s in idx["segments"])
+    recs = sum(s["records"] for s in idx["segments"])
+    print(f"{len(idx['segments'])} segments, {recs} records: {raw} -> {stored} bytes ({raw / max(stored, 1):.1f}x); "
+          f"active file {active} bytes; last seq {idx.get('last_seq')}")
+    for s in idx["segments"][-5:]:
+        print(f"  {s['file']}\t{s['first_ts']} .. {s['last_ts']}\t{s['records']} records\t{s['stored_bytes']} bytes")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,167 @@
+"""Opt-in stage metrics for the CLI scripts (--profile / --metrics-out / --cprofile).
+
+Scripts wrap pipeline stages in `metrics.span("name")` and bump counters with
+`metrics.count("name", n)`. Both go to the active recorder, which is a no-op object unless a
+session was started with one of the options, so instrumented code costs one attribute lookup and
+call per stage when profiling is off. Hot loops keep local counts and report them once.
+tracemalloc / cProfile are only imported when a session starts.
+
+With a session:
+- spans record monotonic wall time (time.perf_counter) and, via tracemalloc, net allocated bytes
+  and peak traced memory during the span; nested spans are named "outer/inner".
+- --metrics-out FILE appends JSON lines: one "span" record per span, one "counters" record and one
+  "run" summary, all tagged with the script name and a run id.
+- --profile prints the same summary to stderr.
+- --cprofile FILE dumps cProfile stats (open with `python -m pstats FILE`).
+
+Usage (any instrumented script):
+  python scripts/recommend_vocab.py --count 15 --profile
+  python scripts/update_progress.py ... --metrics-out metrics.ndjson --cprofile up.prof
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+_NULL_SPAN = nullcontext()
+
+
+class NullRecorder:
+    enabled = False
+
+    def span(self, name: str):
+        return _NULL_SPAN
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+
+class Recorder:
+    enabled = True
+
+    def __init__(self, script: str, trace_alloc: bool = True):
+        self.script = script
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.trace_alloc = trace_alloc
+        if trace_alloc:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self._stack: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        path = "/".join([s["name"] for s in self._stack] + [name])
+        rec: Dict[str, Any] = {"name": path, "depth": len(self._stack), "_child_peak": 0}
+        if self.trace_alloc:
+            rec["_mem0"] = self._tracemalloc.get_traced_memory()[0]
+            self._tracemalloc.reset_peak()
+        self._stack.append(rec)
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t
+            self._stack.pop()
+            rec["start_s"] = round(t - self.t0, 6)
+            rec["wall_s"] = round(wall, 6)
+            if self.trace_alloc:
+                cur, peak = self._tracemalloc.get_traced_memory()
+                peak = max(peak, rec.pop("_child_peak"))
+                mem0 = rec.pop("_mem0")
+                rec["alloc_bytes"] = cur - mem0
+                rec["peak_bytes"] = peak - mem0
+                if self._stack:  # reset_peak() in this span hid the peak from the parent
+                    parent = self._stack[-1]
+                    parent["_child_peak"] = max(parent["_child_peak"], peak)
+            else:
+                rec.pop("_child_peak")
+            self.spans.append(rec)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def records(self) -> List[Dict[str, Any]]:
+        tag = {"script": self.script, "run": self.run_id}
+        out = [{**tag, "type": "span", **s} for s in sorted(self.spans, key=lambda s: s["start_s"])]
+        out.append({**tag, "type": "counters", "counters": dict(sorted(self.counters.items()))})
+        run = {**tag, "type": "run", "wall_s": round(time.perf_counter() - self.t0, 6), "argv": sys.argv[1:]}
+        if self.trace_alloc:
+            run["traced_peak_bytes"] = self._tracemalloc.get_traced_memory()[1]
+        out.append(run)
+        return out
+
+    def summary(self) -> str:
+        lines = [f"[PROFILE] {self.script} run {self.run_id}"]
+        for s in sorted(self.spans, key=lambda s: s["start_s"]):
+            mem = f"  alloc={s['alloc_bytes'] / 1024:.0f}KiB peak={s['peak_bytes'] / 1024:.0f}KiB" if "alloc_bytes" in s else ""
+            lines.append(f"  {'  ' * s['depth']}{s['name'].rsplit('/', 1)[-1]:<{28 - 2 * s['depth']}} {s['wall_s'] * 1000:9.2f} ms{mem}")
+        for k, v in sorted(self.counters.items()):
+            lines.append(f"  #{k} = {v}")
+        return "\n".join(lines)
+
+
+_active: NullRecorder | Recorder = NullRecorder()
+
+
+def span(name: str):
+    """Context manager timing one pipeline stage (no-op unless a session is active)."""
+    return _active.span(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    _active.count(name, n)
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    g = ap.add_argument_group("profiling")
+    g.add_argument("--profile", action="store_true", help="Print per-stage timings, allocations and counters to stderr")
+    g.add_argument("--metrics-out", metavar="FILE", help="Append per-stage metrics as JSON lines")
+    g.add_argument("--cprofile", metavar="FILE", help="Write cProfile stats for the whole run")
+
+
+@contextmanager
+def session(script: str, ns: argparse.Namespace) -> Iterator[None]:
+    """Activate a recorder for the duration of main() if any profiling option was given."""
+    global _active
+    if not (ns.profile or ns.metrics_out or ns.cprofile):
+        yield
+        return
+    import tracemalloc
+
+    trace = (ns.profile or ns.metrics_out) and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    rec = Recorder(script, trace_alloc=tracemalloc.is_tracing())
+    prof = None
+    if ns.cprofile:
+        import cProfile
+
+        prof = cProfile.Profile()
+    prev, _active = _active, rec
+    try:
+        if prof is not None:
+            prof.enable()
+        with rec.span("main"):
+            yield
+    finally:
+        if prof is not None:
+            prof.disable()
+            prof.dump_stats(ns.cprofile)
+        _active = prev
+        if ns.metrics_out:
+            with Path(ns.metrics_out).open("a", encoding="utf-8") as f:
+                for r in rec.records():
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        if ns.profile:
+            print(rec.summary(), file=sys.stderr)
+        if trace:
+            tracemalloc.stop()
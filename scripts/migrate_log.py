@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Upgrade progress log records to the current schema / scoring version, in place.
+
+Streams the active progress.ndjson line by line and rewrites every record whose derived block
+is missing, was computed with another scoring version, or no longer matches its raw fields
+(scoring.materialize: schema_version + derived appended, all other keys and their order kept).
+Current records, blank / malformed lines and a torn final line are copied byte for byte.
+
+The rewrite holds the state lock and the append lock, goes to a temp file in the same dir, is
+fsync'ed and then os.replace()d over the log, so a crash leaves either the old or the new file and
+concurrent appends wait for it. Because byte offsets move, the derived caches (checkpoint,
+exposure index, analytics columns) are dropped and rebuilt, and the level is re-decided if it was
+computed with older scoring / sublevel versions.
+
+Compacted segments (log_segments.py) are immutable and are not rewritten: readers recompute the
+derived metrics for those records (scoring.derived()). Stop daemon.py while migrating.
+
+Usage:
+  python scripts/migrate_log.py --dry-run          # count stale records only
+  python scripts/migrate_log.py
+  python scripts/migrate_log.py --learner stu-0042
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import sys
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List
+
+import analytics
+import exposure_index
+import learners
+import metrics
+import update_progress
+from progress_log import decode_line, file_lock, lock_path, log_layout
+from scoring import SCHEMA_VERSION, SCORING_VERSION, is_current, materialize
+
+
+def migrate_lines(src, dst, stats: Dict[str, int]) -> None:
+    """Copy lines from src to dst (binary files), upgrading stale records."""
+    for raw in src:
+        rec = decode_line(raw) if raw.endswith(b"\n") else None
+        if rec is None:
+            if raw.strip():
+                stats["malformed"] += 1
+            if dst is not None:
+                dst.write(raw)
+            continue
+        try:
+            current = is_current(rec)
+        except (AttributeError, TypeError) as e:  # e.g. errors_types not a mapping
+            stats["unscorable"] += 1
+            print(f"[WARN] Keeping unscorable record {rec.get('attempt_id')!r} as is: {e}", file=sys.stderr)
+            current = True
+        if current:
+            stats["current"] += 1
+            if dst is not None:
+                dst.write(raw)
+            continue
+        stats["stale_scoring" if "derived" in rec else "backfilled"] += 1
+        if dst is not None:
+            dst.write((json.dumps(materialize(rec), ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def _fsync_dir(d: Path) -> None:
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def drop_derived_state(progress_dir: Path, log: Path) -> None:
+    """Forget caches keyed by log byte offsets (they are rebuilt from the rewritten log)."""
+    update_progress.CHECKPOINT_FILE.unlink(missing_ok=True)
+    if (progress_dir / exposure_index.INDEX_NAME).exists():
+        with closing(exposure_index.connect(progress_dir)) as conn, conn:
+            exposure_index.clear(conn)
+    shutil.rmtree(analytics.cache_dir(log), ignore_errors=True)
+
+
+def migrate(progress_dir: Path, dry_run: bool = False) -> Dict[str, int]:
+    update_progress.use_progress_dir(progress_dir)
+    log = update_progress.LOG_FILE
+    stats = {"current": 0, "backfilled": 0, "stale_scoring": 0, "malformed": 0, "unscorable": 0, "segments": 0}
+    if not log.exists():
+        return stats
+    with update_progress.state_lock(), file_lock(lock_path(log)):
+        idx, _base, skip = log_layout(log)
+        stats["segments"] = len(idx["segments"]) if idx else 0
+        tmp = log.with_name(f".{log.name}.migrate.tmp")
+        with log.open("rb") as src:
+            src.seek(skip)  # prefix already in segments (interrupted compaction)
+            if dry_run:
+                migrate_lines(src, None, stats)
+                return stats
+            with tmp.open("wb") as dst:
+                migrate_lines(src, dst, stats)
+                dst.flush()
+                os.fsync(dst.fileno())
+        if not (stats["backfilled"] or stats["stale_scoring"] or skip):
+            tmp.unlink()
+            return stats
+        os.replace(tmp, log)
+        _fsync_dir(log.parent)
+        drop_derived_state(progress_dir, log)
+    return stats
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description=f"Rewrite progress log records to schema v{SCHEMA_VERSION} / scoring v{SCORING_VERSION}")
+    ap.add_argument("--progress-dir", default=str(update_progress.PROGRESS_DIR))
+    ap.add_argument("--learner", help="Learner id (see learners.py)")
+    ap.add_argument("--dry-run", action="store_true", help="Only count records that would be rewritten")
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.learner:
+        try:
+            ns.progress_dir = str(learners.learner_dir(ns.learner, Path(ns.progress_dir)))
+        except ValueError as e:
+            ap.error(str(e))
+    return ns
+
+
+def run(ns: argparse.Namespace) -> int:
+    progress_dir = Path(ns.progress_dir)
+    with metrics.span("migrate"):
+        stats = migrate(progress_dir, ns.dry_run)
+    for k, v in stats.items():
+        metrics.count(f"migrate_{k}", v)
+    changed = stats["backfilled"] + stats["stale_scoring"]
+    verb = "would rewrite" if ns.dry_run else "rewrote"
+    print(
+        f"{update_progress.LOG_FILE}: {verb} {changed} record(s) "
+        f"({stats['backfilled']} backfilled, {stats['stale_scoring']} rescored), "
+        f"{stats['current']} current, {stats['malformed']} malformed line(s) kept"
+    )
+    if stats["segments"]:
+        print(f"[INFO] {stats['segments']} compacted segment(s) left as is; their metrics are recomputed on read", file=sys.stderr)
+    if not ns.dry_run:
+        with metrics.span("refresh_state"):
+            for line in update_progress.refresh_state():
+                print(line)
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("migrate_log", ns):
+        return run(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -6,92 +6,402 @@ Output files default: quizlet_vocab_all.tsv / quizlet_collocations_all.tsv (in p
 
 Deduplication: keep first occurrence of a term (case‑insensitive). Optionally append new unique senses with suffix (use --allow-duplicate-senses).
 
+Change-aware rebuild:
+- Files are streamed line by line (generator), merged against an on-disk key set and appended to
+  the output through a buffered writer; nothing holds the whole corpus in memory.
+- A manifest (name, size, mtime, sha1 per source) lives in <base-dir>/.quizlet/state.sqlite with
+  the key set. Unchanged sources -> no-op. Only new source files -> just their new terms are merged
+  and appended. A modified/removed source, a changed --allow-duplicate-senses or an output file
+  that no longer matches what was written -> full rebuild (same result as a fresh run).
+- Appended terms follow the existing ones even if the new file sorts earlier; --full rebuilds
+  in sorted-file order.
+
+Delta export (--delta):
+- The state db also keeps an "already exported" index keyed by the lowercase output term (the
+  merge() key, incl. a " (2)" sense suffix) and the output byte offset covered by the last export.
+- --delta writes only not-yet-exported terms, split into --chunk-size files under --delta-dir
+  (<kind>-delta-<timestamp>-NN.tsv); each run reads only the output bytes added since the last
+  export. The index is updated in one transaction after all chunk files were written.
+
+Parallel parsing (--jobs N): source files are parsed in a process pool (--threads: thread pool,
+better for network-backed disks); results are consumed in sorted-file order, so dedup and
+--allow-duplicate-senses numbering are byte-identical to the serial path.
+Benchmark: python scripts/bench_quizlet_jobs.py
+
 Usage examples:
   python scripts/prepare-quizlet.py
   python scripts/prepare-quizlet.py --vocab-output export/my_vocab.tsv --colloc-output export/my_colloc.tsv
+  python scripts/prepare-quizlet.py --full --jobs 8
+  python scripts/prepare-quizlet.py --delta --chunk-size 200 --delta-dir export/delta
 
 After running: open Quizlet > Create set > Paste entire TSV (it auto splits by TAB).
 """
 from __future__ import annotations
 import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
 from pathlib import Path
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 VOCAB_GLOB = "*-vocab.tsv"
 COLLOC_GLOB = "*-collocations.tsv"
+STATE_DIRNAME = ".quizlet"
+STATE_NAME = "state.sqlite"
+WRITE_BUFFER = 1 << 16
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    kind TEXT NOT NULL, name TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, sha1 TEXT,
+    PRIMARY KEY (kind, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    kind TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS outputs (
+    kind TEXT PRIMARY KEY, path TEXT, size INTEGER, allow_dup INTEGER, lines INTEGER
+);
+CREATE TABLE IF NOT EXISTS exported (
+    kind TEXT NOT NULL, key TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS export_cursor (
+    kind TEXT PRIMARY KEY, path TEXT, offset INTEGER NOT NULL
+);
+"""
+DEFAULT_CHUNK = 500
 
-def read_tsv_lines(files: List[Path]) -> List[Tuple[str, str, Path]]:
-    rows: List[Tuple[str, str, Path]] = []
-    for f in files:
-        try:
-            for line in f.read_text(encoding="utf-8").splitlines():
+
+def parse_tsv_file(f: Path) -> Tuple[List[Tuple[str, str]], str, int]:
+    """Parse one TSV -> ([(term, definition)], warning, malformed lines skipped).
+
+    Top-level so process pools can pickle it.
+    """
+    rows: List[Tuple[str, str]] = []
+    skipped = 0
+    try:
+        with f.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.rstrip("\r\n")
                 if not line.strip():
                     continue
                 if "\t" not in line:
+                    skipped += 1
                     continue  # skip malformed
                 term, definition = line.split("\t", 1)
-                rows.append((term.strip(), definition.strip(), f))
-        except Exception as e:  # noqa: BLE001
-            print(f"[WARN] Failed reading {f}: {e}")
-    return rows
+                rows.append((term.strip(), definition.strip()))
+    except Exception as e:  # noqa: BLE001
+        return rows, f"[WARN] Failed reading {f}: {e}", skipped
+    return rows, "", skipped
 
 
-def merge(rows: List[Tuple[str, str, Path]], allow_dup_senses: bool) -> List[str]:
-    out: List[str] = []
-    seen_terms: set[str] = set()
-    term_counts: dict[str, int] = {}
+def _parsed(rows: List[Tuple[str, str]], warn: str, skipped: int) -> None:
+    if warn:
+        print(warn)
+    metrics.count("files_parsed")
+    metrics.count("rows_parsed", len(rows))
+    metrics.count("malformed_skipped", skipped)
+
+
+def _make_pool(jobs: int, threads: bool) -> Executor:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # only --jobs > 1 pays for it
+
+    return ThreadPoolExecutor(max_workers=jobs) if threads else ProcessPoolExecutor(max_workers=jobs)
+
+
+def iter_tsv_rows(files: Iterable[Path], jobs: int = 1, threads: bool = False) -> Iterator[Tuple[str, str, Path]]:
+    """Stream (term, definition, source) in file order; jobs > 1 parses files in parallel."""
+    files = list(files)
+    if jobs <= 1 or len(files) < 2:
+        for f in files:
+            rows, warn, skipped = parse_tsv_file(f)
+            _parsed(rows, warn, skipped)
+            for term, definition in rows:
+                yield term, definition, f
+        return
+    chunksize = max(1, len(files) // (jobs * 8))
+    with _make_pool(jobs, threads) as pool:
+        # Executor.map yields in submission (= sorted file) order, keeping merge deterministic
+        for f, (rows, warn, skipped) in zip(files, pool.map(parse_tsv_file, files, chunksize=chunksize)):
+            _parsed(rows, warn, skipped)
+            for term, definition in rows:
+                yield term, definition, f
+
+
+def read_tsv_lines(files: List[Path]) -> List[Tuple[str, str, Path]]:
+    return list(iter_tsv_rows(files))
+
+
+class KeySet:
+    """Term-key -> occurrence count backed by the state db; reads and writes are cached per run."""
+
+    def __init__(self, conn: sqlite3.Connection, kind: str):
+        self.conn = conn
+        self.kind = kind
+        self._cache: Dict[str, Optional[int]] = {}
+        self._dirty: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[int]:
+        if key not in self._cache:
+            row = self.conn.execute("SELECT count FROM terms WHERE kind = ? AND key = ?", (self.kind, key)).fetchone()
+            self._cache[key] = row[0] if row else None
+        return self._cache[key]
+
+    def set(self, key: str, count: int) -> None:
+        self._cache[key] = count
+        self._dirty[key] = count
+
+    def flush(self) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO terms (kind, key, count) VALUES (?, ?, ?)",
+            ((self.kind, k, c) for k, c in self._dirty.items()),
+        )
+        self._dirty.clear()
+
+
+def merge_stream(rows: Iterable[Tuple[str, str, Path]], allow_dup_senses: bool, seen: KeySet | None = None) -> Iterator[str]:
+    """Yield output lines; `seen` carries first-occurrence state across runs (in-memory if None)."""
+    counts: Dict[str, int] = {}
+    get = seen.get if seen is not None else counts.get
+    put = seen.set if seen is not None else counts.__setitem__
     for term, definition, _src in rows:
         key = term.lower()
-        if key not in seen_terms:
-            seen_terms.add(key)
-            term_counts[key] = 1
-            out.append(f"{term}\t{definition}")
-        else:
-            if allow_dup_senses:
-                term_counts[key] += 1
-                out.append(f"{term} ({term_counts[key]})\t{definition}")
-            # else skip duplicate term
-    return out
+        n = get(key)
+        if n is None:
+            put(key, 1)
+            yield f"{term}\t{definition}"
+        elif allow_dup_senses:
+            put(key, n + 1)
+            yield f"{term} ({n + 1})\t{definition}"
+        # else skip duplicate term
 
 
-def write_output(lines: List[str], path: Path) -> int:
+def merge(rows: List[Tuple[str, str, Path]], allow_dup_senses: bool) -> List[str]:
+    return list(merge_stream(rows, allow_dup_senses))
+
+
+def write_lines(lines: Iterable[str], path: Path, append: bool = False) -> int:
+    """Buffered incremental write; returns number of lines written."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    return len(lines)
+    n = 0
+    with path.open("a" if append else "w", encoding="utf-8", buffering=WRITE_BUFFER, newline="\n") as f:
+        for line in lines:
+            f.write(line + "\n")
+            n += 1
+    return n
+
+
+def write_output(lines: List[str], path: Path) -> int:
+    return write_lines(lines, path)
 
 
 def gather(pattern: str, base: Path) -> List[Path]:
     return sorted(base.glob(pattern))
 
 
-def parse_args() -> argparse.Namespace:
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def open_state(state_dir: Path) -> sqlite3.Connection:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(state_dir / STATE_NAME)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def plan_sources(conn: sqlite3.Connection, kind: str, files: List[Path]) -> Tuple[List[Path], bool]:
+    """Compare files with the manifest -> (files to merge, full_rebuild_needed)."""
+    recorded = {
+        name: (size, mtime, sha1)
+        for name, size, mtime, sha1 in conn.execute("SELECT name, size, mtime_ns, sha1 FROM sources WHERE kind = ?", (kind,))
+    }
+    current = {f.name for f in files}
+    if set(recorded) - current:
+        return files, True  # a source disappeared
+    new: List[Path] = []
+    for f in files:
+        rec = recorded.get(f.name)
+        if rec is None:
+            new.append(f)
+            continue
+        st = f.stat()
+        if (st.st_size, st.st_mtime_ns) == rec[:2]:
+            continue
+        if st.st_size != rec[0] or _sha1(f) != rec[2]:
+            return files, True  # edited source: earlier first occurrences may change
+        conn.execute("UPDATE sources SET mtime_ns = ? WHERE kind = ? AND name = ?", (st.st_mtime_ns, kind, f.name))
+    return new, False
+
+
+def export_kind(conn: sqlite3.Connection, kind: str, files: List[Path], output: Path, allow_dup: bool, full: bool, jobs: int = 1, threads: bool = False) -> Tuple[int, int, bool]:
+    """Merge `files` into `output`. Returns (lines written this run, total lines, rebuilt)."""
+    with metrics.span("plan_sources"):
+        todo, rebuild = plan_sources(conn, kind, files)
+    row = conn.execute("SELECT path, size, allow_dup, lines FROM outputs WHERE kind = ?", (kind,)).fetchone()
+    out_size = output.stat().st_size if output.exists() else None
+    if full or row is None or row[0] != str(output) or row[1] != out_size or bool(row[2]) != allow_dup:
+        rebuild = True
+    if rebuild:
+        todo = files
+        conn.execute("DELETE FROM terms WHERE kind = ?", (kind,))
+        conn.execute("DELETE FROM sources WHERE kind = ?", (kind,))
+        conn.execute("DELETE FROM export_cursor WHERE kind = ?", (kind,))  # rescan; exported keys still filter
+    total_before = 0 if rebuild else row[3]
+    if not todo and not rebuild:
+        conn.commit()
+        return 0, total_before, False
+    seen = KeySet(conn, kind)
+    lines = merge_stream(iter_tsv_rows(todo, jobs, threads), allow_dup, seen)
+    with metrics.span("parse_merge_write"):
+        if rebuild:
+            tmp = output.with_name(output.name + ".tmp")
+            n = write_lines(lines, tmp)
+            os.replace(tmp, output)
+        else:
+            n = write_lines(lines, output, append=True)
+    metrics.count("terms_written", n)
+    with metrics.span("save_state"):
+        seen.flush()
+        conn.executemany(
+        "INSERT OR REPLACE INTO sources (kind, name, size, mtime_ns, sha1) VALUES (?, ?, ?, ?, ?)",
+            ((kind, f.name, f.stat().st_size, f.stat().st_mtime_ns, _sha1(f)) for f in todo),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO outputs (kind, path, size, allow_dup, lines) VALUES (?, ?, ?, ?, ?)",
+            (kind, str(output), output.stat().st_size, int(allow_dup), total_before + n),
+        )
+        conn.commit()
+    return n, total_before + n, rebuild
+
+
+def iter_output_since(output: Path, offset: int) -> Iterator[Tuple[int, str]]:
+    """(offset_after_line, line) for complete output lines written after `offset`."""
+    with output.open("rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                return
+            offset += len(raw)
+            yield offset, raw.decode("utf-8").rstrip("\n")
+
+
+def export_delta(conn: sqlite3.Connection, kind: str, output: Path, delta_dir: Path, chunk_size: int, stamp: str) -> List[Tuple[Path, int]]:
+    """Write not-yet-exported terms of `output` as chunk files; returns [(path, lines)]."""
+    row = conn.execute("SELECT path, offset FROM export_cursor WHERE kind = ?", (kind,)).fetchone()
+    offset = row[1] if row and row[0] == str(output) else 0
+    if not output.exists() or output.stat().st_size < offset:
+        offset = 0
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Tuple[Path, int]] = []
+    new_keys: List[str] = []
+    batch: set[str] = set()
+    buf: List[str] = []
+    end = offset
+
+    seq = 0
+
+    def flush_chunk() -> None:
+        nonlocal seq
+        path = None
+        while path is None or path.exists():  # never overwrite an earlier export from the same second
+            seq += 1
+            path = delta_dir / f"{kind}-delta-{stamp}-{seq:02d}.tsv"
+        tmp = path.with_name(path.name + ".tmp")
+        write_lines(buf, tmp)
+        os.replace(tmp, path)
+        written.append((path, len(buf)))
+        buf.clear()
+
+    for end, line in iter_output_since(output, offset):
+        term = line.split("\t", 1)[0]
+        key = term.lower()
+        if key in batch or conn.execute("SELECT 1 FROM exported WHERE kind = ? AND key = ?", (kind, key)).fetchone():
+            continue
+        batch.add(key)
+        new_keys.append(key)
+        buf.append(line)
+        if len(buf) >= chunk_size:
+            flush_chunk()
+    if buf:
+        flush_chunk()
+    metrics.count("delta_terms", len(new_keys))
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO exported (kind, key) VALUES (?, ?)", ((kind, k) for k in new_keys))
+        conn.execute(
+            "INSERT OR REPLACE INTO export_cursor (kind, path, offset) VALUES (?, ?, ?)", (kind, str(output), end)
+        )
+    return written
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     ap = argparse.ArgumentParser(description="Merge vocab & collocation TSVs for Quizlet upload")
     ap.add_argument("--base-dir", default="vocab", help="Directory containing generated TSVs")
     ap.add_argument("--vocab-output", default="quizlet_vocab_all.tsv")
     ap.add_argument("--colloc-output", default="quizlet_collocations_all.tsv")
     ap.add_argument("--allow-duplicate-senses", action="store_true", help="Keep duplicate term with numbered suffix")
-    return ap.parse_args()
+    ap.add_argument("--state-dir", help="Manifest/key-set location (default: <base-dir>/.quizlet)")
+    ap.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild outputs from scratch")
+    ap.add_argument("--jobs", type=int, default=1, help="Parse source files with N parallel workers")
+    ap.add_argument("--threads", action="store_true", help="With --jobs: use threads instead of processes")
+    ap.add_argument("--delta", action="store_true", help="Also export only terms not exported before, in chunk files")
+    ap.add_argument("--delta-dir", default="export/delta", help="Directory for --delta chunk files")
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="Terms per --delta chunk file")
+    metrics.add_arguments(ap)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("prepare_quizlet", ns):
+        return run(ns)
 
 
-def main() -> int:
-    ns = parse_args()
+def run(ns: argparse.Namespace) -> int:
     base = Path(ns.base_dir)
-    vocab_files = gather(VOCAB_GLOB, base)
-    colloc_files = gather(COLLOC_GLOB, base)
+    with metrics.span("gather"):
+        vocab_files = gather(VOCAB_GLOB, base)
+        colloc_files = gather(COLLOC_GLOB, base)
     if not vocab_files and not colloc_files:
         print(f"No TSV files found under {base}")
         return 1
-    if vocab_files:
-        vocab_rows = read_tsv_lines(vocab_files)
-        vocab_out = merge(vocab_rows, ns.allow_duplicate_senses)
-        c = write_output(vocab_out, Path(ns.vocab_output))
-        print(f"Wrote {c} vocab terms -> {ns.vocab_output}")
-    if colloc_files:
-        colloc_rows = read_tsv_lines(colloc_files)
-        colloc_out = merge(colloc_rows, ns.allow_duplicate_senses)
-        c2 = write_output(colloc_out, Path(ns.colloc_output))
-        print(f"Wrote {c2} collocations -> {ns.colloc_output}")
+    state_dir = Path(ns.state_dir) if ns.state_dir else base / STATE_DIRNAME
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    with closing(open_state(state_dir)) as conn:
+        for kind, files, output, label in (
+            ("vocab", vocab_files, Path(ns.vocab_output), "vocab terms"),
+            ("colloc", colloc_files, Path(ns.colloc_output), "collocations"),
+        ):
+            if not files:
+                continue
+            with metrics.span(f"export_{kind}"):
+                n, total, rebuilt = export_kind(conn, kind, files, output, ns.allow_duplicate_senses, ns.full, ns.jobs, ns.threads)
+            if rebuilt:
+                print(f"Wrote {total} {label} -> {output}")
+            elif n:
+                print(f"Appended {n} new {label} -> {output} ({total} total)")
+            else:
+                print(f"{output} up to date ({total} {label})")
+            if ns.delta:
+                with metrics.span(f"delta_{kind}"):
+                    chunks = export_delta(conn, kind, output, Path(ns.delta_dir), max(1, ns.chunk_size), stamp)
+                for path, c in chunks:
+                    print(f"[DELTA] {c} new {label} -> {path}")
+                if not chunks:
+                    print(f"[DELTA] no new {label} to export")
     return 0
 
 
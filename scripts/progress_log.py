@@ -0,0 +1,724 @@
+"""Shared readers for the NDJSON progress log (data/progress/progress.ndjson).
+
+- iter_records(): forward stream of parsed attempts (malformed lines skipped).
+- iter_appended(): complete lines after a byte offset, with the offset reached after each line
+  (used by the update_progress checkpoint).
+- iter_lines_reverse() / tail_records(): block-wise reverse reader seeking from EOF; returns the
+  last N records (optionally matching a predicate) without touching older bytes. A partially
+  written final line (no trailing newline, not valid JSON) is ignored.
+- validate_record(): checks an attempt against the schema in data/progress/README.md.
+- iter_import_file(): streams attempts from an NDJSON or CSV export (bulk ingest).
+- atomic_write_text(): temp file + fsync + os.replace for derived state (level, checkpoint).
+- append_durable(): locked, seq-numbered, group-committed append (see below).
+- check_sequence(): stream the log and report gaps / repeats in the seq numbers.
+
+Concurrent writers (append_durable):
+- Appends hold an exclusive lock on progress.ndjson.lock (flock; msvcrt on Windows), so lines from
+  different processes never interleave. A torn final line left by a crashed writer is terminated
+  before the next batch (readers skip it as malformed).
+- Every record gets "seq" = previous seq + 1, assigned under the lock, so readers can detect lost
+  or duplicated records. Records written before seq numbers existed have none; numbering starts at 1.
+- Group commit: a writer that finds the lock free commits at once. If the lock is busy it drops
+  its lines into progress.ndjson.spool/ and polls; whoever gets the lock next drains the whole spool
+  into one write + one fsync and removes the spool files, and waiters that find their spool file
+  gone were committed by that batch. Under N concurrent writers the number of fsyncs per record
+  therefore drops towards 1/N.
+- A spool file is removed only after the fsync that made its lines durable. Spooled lines carry a
+  "spool_id" (spool file name + line number) into the log, and every writer drains the spool as soon
+  as it holds the lock (also group=False appends and update_progress --ingest), so lines left behind
+  by a committer that died between write and unlink are the last ones in the log: the next
+  committer reads back as many lines as it has spooled and skips ids already there. Identical
+  records from different spool entries have different ids and are all written.
+
+Compacted logs (log_segments.py):
+- Old lines may live in immutable compressed segments (progress.ndjson.segments/) in front of the
+  active file. All readers here see segments + active file as one logical byte stream: offsets,
+  digests and records are the same as before compaction, so checkpoints and indexes stay valid.
+- Segments are sequences of independently compressed blocks of whole lines; the sidecar
+  index.json gives each block's file offset, logical offset and timestamp range, so reads starting
+  at an offset decompress only the blocks from there on.
+
+Usage (peek):
+  python scripts/progress_log.py tail -n 5
+  python scripts/progress_log.py tail -n 5 --skill reading
+  python scripts/progress_log.py seq-check
+
+Pure stdlib.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_FILE = Path("data/progress/progress.ndjson")
+BLOCK_SIZE = 64 * 1024
+DIGEST_SPAN = 4096  # bytes before a stored offset (and at the head) used to detect edits/truncation
+SEQ_PREFIX = '{"seq": '
+SPOOL_ID = "spool_id"
+GROUP_POLL_MIN = 0.0001  # seconds; group-commit waiters back off from here ...
+GROUP_POLL_MAX = 0.002  # ... to here between lock attempts
+TAIL_BLOCK = 8 * 1024  # reverse-read block when looking up the last seq under the append lock
+SEGMENT_INDEX = "index.json"
+DECOMPRESS = {"gzip": gzip.decompress, "xz": lzma.decompress}
+
+Record = Dict[str, Any]
+
+# Schema (data/progress/README.md)
+REQUIRED_FIELDS = ("timestamp", "attempt_id", "skill_focus")
+SKILLS = ("reading", "vocab", "grammar", "writing", "mixed")
+# field -> (min, max) inclusive; None = unbounded
+INT_FIELDS: Dict[str, Tuple[int, Optional[int]]] = {
+    "input_tokens": (0, None),
+    "self_rating_difficulty": (1, 5),
+    "time_spent_sec": (0, None),
+    "comp_questions_total": (0, None),
+    "comp_questions_correct": (0, None),
+    "vocab_items_presented": (0, None),
+    "vocab_items_mastered": (0, None),
+    "schema_version": (1, None),
+}
+
+
+def decode_line(raw: bytes) -> Optional[Record]:
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Crash-safe replace: write a temp file in the same dir, fsync, then os.replace()."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Logical stream: compacted segments (log_segments.py) + active file
+# ---------------------------------------------------------------------------
+
+def segments_dir(path: Path) -> Path:
+    return path.with_name(path.name + ".segments")
+
+
+_index_cache: Dict[Path, Tuple[Any, Dict[str, Any]]] = {}
+
+
+def segment_index(path: Path) -> Optional[Dict[str, Any]]:
+    """The sidecar index of compacted segments, or None if the log was never compacted."""
+    ip = segments_dir(path) / SEGMENT_INDEX
+    try:
+        st = ip.stat()
+    except FileNotFoundError:
+        return None
+    key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    hit = _index_cache.get(ip)
+    if hit is None or hit[0] != key:
+        hit = _index_cache[ip] = (key, json.loads(ip.read_text(encoding="utf-8")))
+    return hit[1]
+
+
+def _active_skip(path: Path, idx: Optional[Dict[str, Any]]) -> int:
+    """Bytes at the head of the active file that are already in segments.
+
+    Non-zero only if a compaction stopped after writing the index but before rewriting the active
+    file; the index then carries the length + tail digest of the compacted prefix.
+    """
+    trim = idx.get("trim") if idx else None
+    if not trim:
+        return 0
+    n = trim["bytes"]
+    try:
+        if path.stat().st_size < n:
+            return 0
+        with path.open("rb") as f:
+            f.seek(max(0, n - DIGEST_SPAN))
+            data = f.read(min(n, DIGEST_SPAN))
+    except FileNotFoundError:
+        return 0
+    return n if hashlib.sha1(data).hexdigest() == trim["digest"] else 0
+
+
+def log_layout(path: Path) -> Tuple[Optional[Dict[str, Any]], int, int]:
+    """(segment index, logical offset of the active file, bytes to skip at the active file head)."""
+    idx = segment_index(path)
+    return idx, (idx["base"] if idx else 0), _active_skip(path, idx)
+
+
+def logical_size(path: Path) -> int:
+    """Size of the logical log (segments + active file)."""
+    _idx, base, skip = log_layout(path)
+    size = path.stat().st_size if path.exists() else 0
+    return base + size - skip
+
+
+def read_segment_block(path: Path, seg: Dict[str, Any], block: List[Any], f=None) -> bytes:
+    """Decompressed bytes of one block ([file_offset, length, raw_offset, raw_length, ...])."""
+    if f is None:
+        with (segments_dir(path) / seg["file"]).open("rb") as fh:
+            return read_segment_block(path, seg, block, fh)
+    f.seek(block[0])
+    return DECOMPRESS[seg.get("codec", "gzip")](f.read(block[1]))
+
+
+def _iter_chunks(path: Path, offset: int) -> Iterator[bytes]:
+    """Raw bytes of the logical log from `offset` to the end, in chunks."""
+    idx, base, skip = log_layout(path)
+    if idx and offset < base:
+        for seg in idx["segments"]:
+            if seg["start"] + seg["raw_bytes"] <= offset:
+                continue
+            with (segments_dir(path) / seg["file"]).open("rb") as f:
+                for block in seg["blocks"]:
+                    lo = seg["start"] + block[2]
+                    if lo + block[3] <= offset:
+                        continue
+                    data = read_segment_block(path, seg, block, f)
+                    yield data[offset - lo:] if offset > lo else data
+    if path.exists():
+        with path.open("rb") as f:
+            f.seek(skip + max(0, offset - base))
+            while True:
+                chunk = f.read(BLOCK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+
+def _iter_raw_lines(path: Path, offset: int = 0) -> Iterator[bytes]:
+    """Lines (newline kept; the last may be partial) of the logical log from byte `offset`."""
+    idx, base, _skip = log_layout(path)
+    if idx is None:  # plain file: let the io layer split lines
+        if path.exists():
+            with path.open("rb") as f:
+                f.seek(offset)
+                yield from f
+        return
+    tail = b""
+    for chunk in _iter_chunks(path, offset):
+        for line in io.BytesIO(tail + chunk if tail else chunk):
+            if line.endswith(b"\n"):
+                yield line
+                tail = b""
+            else:
+                tail = line
+    if tail:
+        yield tail
+
+
+def read_range(path: Path, start: int, end: int) -> bytes:
+    """Logical bytes [start, end)."""
+    out = bytearray()
+    for chunk in _iter_chunks(path, start):
+        out += chunk
+        if len(out) >= end - start:
+            break
+    return bytes(out[: end - start])
+
+
+def lock_path(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+
+def spool_dir(path: Path) -> Path:
+    return path.with_name(path.name + ".spool")
+
+
+def _lock(f, blocking: bool = True) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False  # LK_LOCK retries for ~10 s, then raises: keep waiting
+
+
+def _unlock(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on `path` (created if missing), blocking until acquired."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def _with_member(line: str, member: str) -> str:
+    """Insert `member` ('"key": value') first in a compact JSON object line."""
+    return f"{{{member}, {line[1:]}" if line[1:].lstrip() != "}" else f"{{{member}}}"
+
+
+def with_seq(line: str, seq: int) -> str:
+    """Prefix a compact JSON object line with "seq" (a later "seq" key in `line` would win)."""
+    return _with_member(line, f'"seq": {seq}')
+
+
+def _spool_entry(line: str, name: str, k: int) -> str:
+    return _with_member(line, f'"{SPOOL_ID}": {json.dumps(f"{name}:{k}")}')
+
+
+def _spool_id(line: str) -> Optional[str]:
+    rec = decode_line(line.encode("utf-8")) if f'"{SPOOL_ID}"' in line else None
+    sid = rec.get(SPOOL_ID) if rec is not None else None
+    return sid if isinstance(sid, str) else None
+
+
+def last_seq(path: Path) -> int:
+    """seq of the last numbered record (0 if none); scans back past unnumbered legacy lines."""
+    return _tail_state(path, 0)[0]
+
+
+def _tail_state(path: Path, n: int) -> Tuple[int, set]:
+    """(last seq, spool_ids among the last n non-blank lines) in one reverse pass over the active
+    file; the seq falls back to the last one recorded for the compacted segments."""
+    ids: set = set()
+    seen = 0
+    seq: Optional[int] = None
+    for raw in iter_lines_reverse(path, TAIL_BLOCK, segments=False):
+        if not raw.strip():
+            continue
+        if seq is None and raw.startswith(SEQ_PREFIX.encode()):
+            rec = decode_line(raw)
+            if rec is not None and _is_int(rec.get("seq")):
+                seq = rec["seq"]
+        if seen < n:
+            seen += 1
+            sid = _spool_id(raw.decode("utf-8", "replace"))
+            if sid is not None:
+                ids.add(sid)
+        if seq is not None and seen >= n:
+            return seq, ids
+    if seq is None:
+        seq = (segment_index(path) or {}).get("last_seq") or 0
+    return seq, ids
+
+
+def _commit(path: Path, spooled: List[str], direct: List[str] = ()) -> int:
+    """Under the log lock: number the lines, append them with one write and fsync. Returns last seq."""
+    with path.open("a+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        head = b""
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                head = b"\n"  # torn line from a writer that died mid-append
+        seq, written = _tail_state(path, len(spooled))
+        # spooled lines already there: a committer died after its fsync but before removing the spool
+        lines = list(direct)
+        lines.extend(ln for ln in spooled if not written or _spool_id(ln) not in written)
+        data = "".join(f"{with_seq(ln, seq + k)}\n" for k, ln in enumerate(lines, 1))
+        f.write(head + data.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    return seq + len(lines)
+
+
+def _drain(spool: Path) -> Tuple[List[Path], List[str]]:
+    if not spool.is_dir():
+        return [], []
+    pending = sorted(p for p in spool.iterdir() if not p.name.startswith("."))
+    lines: List[str] = []
+    for p in pending:
+        lines.extend(ln for ln in p.read_text(encoding="utf-8").split("\n") if ln)
+    return pending, lines
+
+
+def _commit_pending(path: Path, direct: List[str] = ()) -> int:
+    """Under the log lock: commit the spool (and `direct`), then remove the drained spool files.
+    Returns the number of spooled lines taken."""
+    pending, spooled = _drain(spool_dir(path))
+    if spooled or direct:
+        _commit(path, spooled, direct)
+    for p in pending:
+        p.unlink()
+    return len(spooled)
+
+
+def commit_spool(path: Path) -> None:
+    """For writers that hold the log lock and append by other means (bulk ingest): commit lines
+    left in the spool first, so a crashed committer's leftovers stay at the end of the log."""
+    _commit_pending(path)
+
+
+def append_durable(path: Path, records: Iterable[Record], group: bool = True) -> int:
+    """Append records (seq-numbered, in order) and return once they are fsync'ed.
+
+    group=True shares the write + fsync with concurrent callers in any process (spool + lock);
+    group=False commits just these records under the lock. Returns the number of records this call
+    wrote (0 when another writer's batch carried them).
+    """
+    lines = [json.dumps(r, ensure_ascii=False) for r in records]
+    if not lines:
+        return 0
+    if not group:
+        with file_lock(lock_path(path)):
+            _commit_pending(path, lines)
+        return len(lines)
+    spool = spool_dir(path)
+    lock = lock_path(path)
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    with lock.open("a+b") as lf:
+        mine: Optional[Path] = None
+        if not _lock(lf, blocking=False):
+            # busy: leave the lines in the spool for the next committer
+            spool.mkdir(exist_ok=True)
+            name = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+            tmp, mine = spool / f".{name}.ndjson", spool / f"{name}.ndjson"
+            tmp.write_text("".join(_spool_entry(ln, name, k) + "\n" for k, ln in enumerate(lines)), encoding="utf-8")
+            os.replace(tmp, mine)  # committers never see a half-written spool file
+            # Poll instead of blocking on the lock: a writer whose lines went out in someone else's
+            # batch must learn it without queueing behind the other waiters for a lock turn.
+            delay = GROUP_POLL_MIN
+            while True:
+                if not mine.exists():
+                    return 0  # committed by another writer's batch
+                if _lock(lf, blocking=False):
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, GROUP_POLL_MAX)
+        try:
+            direct = lines if mine is None else []
+            spooled = _commit_pending(path, direct)
+        finally:
+            _unlock(lf)
+    return spooled + len(direct)
+
+
+def check_sequence(path: Path = LOG_FILE) -> Iterator[Tuple[int, int, int]]:
+    """Yield (byte_offset, expected_seq, found_seq) wherever seq does not follow its predecessor."""
+    prev: Optional[int] = None
+    offset = 0
+    for raw in _iter_raw_lines(path):
+        rec = decode_line(raw) if b'"seq"' in raw else None
+        seq = rec.get("seq") if rec is not None else None
+        if _is_int(seq):
+            if prev is not None and seq != prev + 1:
+                yield offset, prev + 1, seq
+            prev = seq
+        offset += len(raw)
+
+
+def iter_records(path: Path = LOG_FILE, warn: bool = False) -> Iterator[Record]:
+    """Yield attempts front-to-back, skipping blank and malformed lines."""
+    for raw in _iter_raw_lines(path):
+        rec = decode_line(raw)
+        if rec is None:
+            if warn and raw.strip():
+                print(f"[WARN] Skipping malformed line: {raw.strip()[:50]!r}", file=sys.stderr)
+            continue
+        yield rec
+
+
+def iter_appended(path: Path, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset_after_line, raw_line) for complete lines starting at byte `offset`.
+
+    Stops before a final line without trailing newline (a writer may still be appending it).
+    """
+    for raw in _iter_raw_lines(path, offset):
+        if not raw.endswith(b"\n"):
+            return
+        offset += len(raw)
+        yield offset, raw
+
+
+def _range_sha1(path: Path, start: int, end: int) -> str:
+    _idx, base, skip = log_layout(path)
+    if start < base:
+        return hashlib.sha1(read_range(path, start, end)).hexdigest()
+    with path.open("rb") as f:
+        f.seek(skip + start - base)
+        return hashlib.sha1(f.read(end - start)).hexdigest()
+
+
+def _active_mtime(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def span_digest(path: Path, offset: int) -> str:
+    """Fingerprint of the log prefix [0, offset) kept by derived state (checkpoint, exposure index,
+    analytics columns): "<sha1 of the DIGEST_SPAN bytes ending at offset>:<sha1 of the first
+    DIGEST_SPAN bytes>:<logical size>:<active file mtime_ns>", sizes as seen now.
+
+    Checking it costs two small reads, not a pass over the prefix, so it does not see everything;
+    see prefix_unchanged() for what is caught."""
+    tail = _range_sha1(path, max(0, offset - DIGEST_SPAN), offset)
+    head = _range_sha1(path, 0, min(offset, DIGEST_SPAN))
+    return f"{tail}:{head}:{logical_size(path)}:{_active_mtime(path)}"
+
+
+def prefix_unchanged(path: Path, offset: int, digest: str | None) -> bool:
+    """False if the log prefix [0, offset) covered by `digest` (span_digest) has visibly changed:
+
+    - the log is shorter than `offset` (truncated);
+    - the DIGEST_SPAN bytes before `offset` or at the head of the log differ. An edit anywhere
+      that changed a line's length shifts the bytes before `offset`, so it lands here too;
+    - the log has the size recorded with the digest but another mtime (rewritten in place).
+
+    Not caught: an edit that keeps every length, in the middle of the prefix, followed by an
+    append before the next check. Rebuild the derived state by hand after such edits (delete it,
+    `exposure_index.py rebuild`, `analytics.py --rebuild`). Digests stored before the head / size /
+    mtime fields existed (bare sha1) are compared on the tail span only.
+    """
+    if offset == 0:
+        return True
+    size = logical_size(path)
+    if size < offset or not digest:
+        return False
+    tail, _, rest = digest.partition(":")
+    if tail != _range_sha1(path, max(0, offset - DIGEST_SPAN), offset):
+        return False
+    if not rest:
+        return True  # legacy digest
+    head, _, rest = rest.partition(":")
+    recorded_size, _, mtime = rest.partition(":")
+    if size == int(recorded_size or -1) and int(mtime or 0) != _active_mtime(path):
+        return False
+    return head == _range_sha1(path, 0, min(offset, DIGEST_SPAN))
+
+
+def iter_lines_reverse(path: Path = LOG_FILE, block_size: int = BLOCK_SIZE, segments: bool = True) -> Iterator[bytes]:
+    """Yield raw lines last-to-first, reading fixed-size blocks backwards from EOF, then (unless
+    segments=False) compacted segment blocks backwards."""
+    idx, _base, skip = log_layout(path)
+    if path.exists():
+        yield from _reverse_active(path, block_size, skip)
+    if idx and segments:
+        for seg in reversed(idx["segments"]):
+            with (segments_dir(path) / seg["file"]).open("rb") as f:
+                for block in reversed(seg["blocks"]):
+                    for line in reversed(read_segment_block(path, seg, block, f).split(b"\n")):
+                        if line:
+                            yield line
+
+
+def _reverse_active(path: Path, block_size: int, skip: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > skip:
+            step = min(block_size, pos - skip)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + tail
+            lines = chunk.split(b"\n")
+            tail = lines[0]  # may continue in the previous block
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def tail_records(
+    n: int,
+    predicate: Callable[[Record], bool] | None = None,
+    path: Path = LOG_FILE,
+) -> List[Record]:
+    """Return the last `n` records (matching `predicate` if given) in log order."""
+    out: List[Record] = []
+    if n <= 0:
+        return out
+    for raw in iter_lines_reverse(path):
+        rec = decode_line(raw)
+        if rec is None:
+            continue
+        if predicate is not None and not predicate(rec):
+            continue
+        out.append(rec)
+        if len(out) >= n:
+            break
+    out.reverse()
+    return out
+
+
+def _is_int(v: Any) -> bool:
+    return type(v) is int  # bool is an int subclass; reject it
+
+
+def validate_record(rec: Any) -> List[str]:
+    """Return a list of schema problems (empty list = valid)."""
+    if not isinstance(rec, dict):
+        return ["not a JSON object"]
+    errs: List[str] = []
+    for k in REQUIRED_FIELDS:
+        if rec.get(k) in (None, ""):
+            errs.append(f"missing {k}")
+    aid = rec.get("attempt_id")
+    if aid not in (None, "") and not isinstance(aid, str):
+        errs.append("attempt_id not a string")
+    ts = rec.get("timestamp")
+    if ts not in (None, ""):
+        try:
+            datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+        except ValueError:
+            errs.append(f"bad timestamp {ts!r}")
+    skill = rec.get("skill_focus")
+    if skill not in (None, "") and skill not in SKILLS:
+        errs.append(f"unknown skill_focus {skill!r}")
+    for k, v in rec.items():
+        bounds = INT_FIELDS.get(k)
+        if bounds is None or v is None:
+            continue
+        if type(v) is not int:
+            errs.append(f"{k} not an integer")
+        elif v < bounds[0] or (bounds[1] is not None and v > bounds[1]):
+            errs.append(f"{k}={v} out of range")
+    for cor_k, tot_k in (("comp_questions_correct", "comp_questions_total"), ("vocab_items_mastered", "vocab_items_presented")):
+        cor, tot = rec.get(cor_k), rec.get(tot_k)
+        if type(cor) is int and type(tot) is int and cor > tot:
+            errs.append(f"{cor_k} > {tot_k}")
+    words = rec.get("new_words_added")
+    if words is not None and (not isinstance(words, list) or not all(isinstance(w, str) for w in words)):
+        errs.append("new_words_added not a list of strings")
+    derived = rec.get("derived")
+    if derived is not None and not isinstance(derived, dict):
+        errs.append("derived not an object")
+    errors = rec.get("errors_types")
+    if errors is not None and (
+        not isinstance(errors, dict) or not all(_is_int(v) and v >= 0 for v in errors.values())
+    ):
+        errs.append("errors_types not a mapping of non-negative integers")
+    return errs
+
+
+def _csv_row_to_record(row: Dict[str, str]) -> Record:
+    """CSV cells are strings: ints for numeric fields, words split on ';'/whitespace,
+    errors_types as JSON object or 'inference:2;detail:1'."""
+    rec: Record = {}
+    for k, v in row.items():
+        if k is None or v is None:
+            continue
+        v = v.strip()
+        if v == "":
+            continue
+        if k in INT_FIELDS:
+            try:
+                rec[k] = int(v)
+            except ValueError:
+                rec[k] = v  # reported by validate_record
+        elif k == "new_words_added":
+            rec[k] = [w for w in v.replace(";", " ").split() if w]
+        elif k == "errors_types":
+            if v.startswith("{"):
+                try:
+                    rec[k] = json.loads(v)
+                except json.JSONDecodeError:
+                    rec[k] = v
+            else:
+                errors: Dict[str, Any] = {}
+                for part in v.split(";"):
+                    name, _, cnt = part.partition(":")
+                    try:
+                        errors[name.strip()] = int(cnt)
+                    except ValueError:
+                        errors[name.strip()] = cnt
+                rec[k] = errors
+        else:
+            rec[k] = v
+    return rec
+
+
+def iter_import_file(path: Path, fmt: str | None = None) -> Iterator[Tuple[int, Optional[Record], str, Optional[str]]]:
+    """Stream (line_number, record, error, raw_json) from an NDJSON or CSV export.
+
+    record is None on a parse error; raw_json is the original NDJSON line (None for CSV) so callers
+    can append it without re-serializing. Format is taken from `fmt` or the file suffix
+    (.csv -> CSV, anything else NDJSON).
+    """
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, _csv_row_to_record(row), "", None
+            return
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield lineno, json.loads(line), "", line
+            except json.JSONDecodeError as e:
+                yield lineno, None, f"invalid JSON ({e.msg})", None
+
+
+def skill_is(skill: str) -> Callable[[Record], bool]:
+    return lambda rec: rec.get("skill_focus") == skill
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Inspect the NDJSON progress log")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("tail", help="Print the last N attempts")
+    t.add_argument("-n", type=int, default=5)
+    t.add_argument("--skill", help="Only attempts with this skill_focus (e.g., reading)")
+    sub.add_parser("seq-check", help="Report gaps / repeats in record sequence numbers")
+    ap.add_argument("--log", default=str(LOG_FILE))
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    if ns.cmd == "tail":
+        pred = skill_is(ns.skill) if ns.skill else None
+        for rec in tail_records(ns.n, pred, Path(ns.log)):
+            print(json.dumps(rec, ensure_ascii=False))
+        return 0
+    problems = 0
+    for offset, expected, found in check_sequence(Path(ns.log)):
+        problems += 1
+        kind = f"gap of {found - expected}" if found > expected else "repeat/out of order"
+        print(f"offset {offset}: expected seq {expected}, found {found} ({kind})")
+    print(f"{problems} sequence problem(s)", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -2,7 +2,8 @@
 
 Heuristic overview:
 - Determine current level from data/progress/current_level.json (default B1 if missing).
-- Build exposure counts from progress.ndjson by counting occurrences of each word in new_words_added arrays.
+- Build exposure counts from progress.ndjson by counting occurrences of each word in new_words_added arrays
+  (served by the persistent index in exposure_index.py; only lexicon words are looked up).
 - Mastery threshold: exposure_count >= 3 (treat as mastered -> lower priority unless for spaced review logic).
 - Distributions (target percentages) for selection (approximate, will degrade gracefully if insufficient pool):
     B1:    core(B1/B1+) 70%, stretch(B2) 25%, challenge(C1) 5%
@@ -11,13 +12,18 @@ Heuristic overview:
     B2+:   core(C1) 70%, review(B2) 20%, consolidation(B1 low-exp) 10%
 - CEFR labels not present in entries are inferred as 'UNK' and only used if pool is tiny.
 
-Input vocab sources: one or more JSON files containing a list of entries with fields:
-  word, cefr, meanings[], collocations[], examples[] (see project conventions)
+Input vocab sources (lexicon.py): JSON files containing a list of entries with fields
+  word, cefr, meanings[], collocations[], examples[] (see project conventions), the per-passage
+  *-vocab.tsv files (CEFR taken from the "(B2)" at the end of the definition) and "### word:"
+  Markdown lists, deduplicated by lowercase word.
+  They are compiled into a memory-mapped store (vocab_store.py, auto-recompiled when a source
+  changes); only selected entries are fully decoded. --no-store loads the lexicon directly.
 
 Selection priority within a band:
   1. Low exposure (exposures < 2)
   2. Medium exposure (2) (for reinforcement quota of up to 20% inside that band)
   3. Random fallback
+  Implemented by selection.py: a (band, exposure-tier) index sampled in O(k); --seed makes it reproducible.
 
 Outputs:
   - Prints summary table to stdout
@@ -26,11 +32,17 @@ Outputs:
 
 Usage examples:
   python scripts/recommend_vocab.py --vocab-dir vocab --count 15 --tsv recommended.tsv
+  python scripts/recommend_vocab.py --learner stu-0042 --count 15
+  python scripts/recommend_vocab.py --daemon --count 15   # ask a running daemon.py
   python scripts/recommend_vocab.py --vocab-dir vocab --json plan.json --include-mastered --count 30
 
+Spaced review:
+  - srs.py keeps SM-2 review state per logged word (from progress.ndjson timestamps).
+  - --review-share 0.3 lets words due for review fill up to 30% of each band quota (most overdue
+    first, regardless of mastery threshold). Default 0 = no review mixing.
+
 Limitations:
   - Relies on new_words_added logs; accuracy improves as you log attempts consistently.
-  - Does not space by time yet (future: decay weighting).
 """
 from __future__ import annotations
 import argparse
@@ -38,7 +50,15 @@ import json
 import random
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from contextlib import closing
+from typing import TYPE_CHECKING, Dict, Iterable, List, Any, Tuple
+
+import lexicon
+import metrics
+import selection
+
+if TYPE_CHECKING:
+    import vocab_store
 
 PROGRESS_DIR = Path("data/progress")
 LEVEL_FILE = PROGRESS_DIR / "current_level.json"
@@ -62,6 +82,14 @@ BAND_MAP = {
 }
 
 
+def use_progress_dir(progress_dir: Path) -> None:
+    """Point the module paths at another progress dir (a learner's, see learners.py)."""
+    global PROGRESS_DIR, LEVEL_FILE, LOG_FILE
+    PROGRESS_DIR = progress_dir
+    LEVEL_FILE = progress_dir / "current_level.json"
+    LOG_FILE = progress_dir / "progress.ndjson"
+
+
 def load_level() -> str:
     if LEVEL_FILE.exists():
         try:
@@ -72,37 +100,40 @@ def load_level() -> str:
     return "B1"
 
 
-def load_progress_exposures() -> Dict[str, int]:
-    exposures: Dict[str, int] = {}
+def load_progress_exposures(words: Iterable[str] | None = None) -> Dict[str, int]:
+    """Exposure counts from the persistent index (data/progress/exposures.sqlite).
+
+    The index is synced with progress.ndjson first (only newly appended lines are parsed).
+    With `words`, only those words are looked up.
+    """
     if not LOG_FILE.exists():
-        return exposures
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            words = obj.get("new_words_added") or []
-            for w in words:
-                if not isinstance(w, str):
-                    continue
-                exposures[w.lower()] = exposures.get(w.lower(), 0) + 1
-    return exposures
+        return {}
+    import exposure_index  # imported here: --daemon runs skip sqlite3
+
+    with closing(exposure_index.connect(PROGRESS_DIR)) as conn:
+        with metrics.span("index_sync"):
+            exposure_index.sync(conn, LOG_FILE)
+        with metrics.span("index_lookup"):
+            if words is None:
+                return exposure_index.all_counts(conn)
+            return exposure_index.lookup(conn, words)
+
+
+def load_due_words(limit: int) -> List[str]:
+    """Words due for review now, most overdue first."""
+    if not LOG_FILE.exists():
+        return []
+    import exposure_index
+    import srs
+
+    with closing(exposure_index.connect(PROGRESS_DIR)) as conn:
+        exposure_index.sync(conn, LOG_FILE)
+        return [w for w, _due in srs.due_words(conn, limit=limit)]
 
 
 def load_vocab_entries(vocab_dir: Path) -> List[Dict[str, Any]]:
-    entries: List[Dict[str, Any]] = []
-    for jf in vocab_dir.glob("*.json"):
-        try:
-            data = json.loads(jf.read_text(encoding="utf-8"))
-            if isinstance(data, list):
-                entries.extend([e for e in data if isinstance(e, dict)])
-        except Exception as e:  # noqa: BLE001
-            print(f"[WARN] skip {jf}: {e}", file=sys.stderr)
-    return entries
+    """Every lexicon entry (JSON, *-vocab.tsv, Markdown; see lexicon.py), deduplicated."""
+    return lexicon.load_entries(vocab_dir)
 
 
 def band_for_entry(level: str, cefr: str) -> str | None:
@@ -126,23 +157,26 @@ def categorize(entries: List[Dict[str, Any]], level: str) -> Dict[str, List[Dict
     return buckets
 
 
-def select_from_bucket(bucket: List[Dict[str, Any]], need: int, exposures: Dict[str, int], include_mastered: bool, mastery_threshold: int) -> List[Dict[str, Any]]:
+def band_needs(level: str, count: int) -> Dict[str, int]:
+    dist = DISTRIBUTIONS.get(level) or DISTRIBUTIONS["B1"]
+    needs = {band: int(count * pct) for band, pct in dist.items()}
+    # Adjust rounding remainder
+    remainder = count - sum(needs.values())
+    if remainder > 0:
+        needs["core"] += remainder
+    return needs
+
+
+def select_from_bucket(bucket: List[Dict[str, Any]], need: int, exposures: Dict[str, int], include_mastered: bool, mastery_threshold: int, rng: random.Random | None = None) -> List[Dict[str, Any]]:
     if need <= 0 or not bucket:
         return []
-    # Annotate with exposure
-    annotated: List[Tuple[int, Dict[str, Any]]] = []
-    for e in bucket:
-        w = (e.get("word") or "").lower()
-        exp = exposures.get(w, 0)
-        if not include_mastered and exp >= mastery_threshold:
-            continue
-        annotated.append((exp, e))
-    if not annotated:
-        return []
-    # Sort by exposure ascending (low first), then random shuffle within exposure tiers
-    random.shuffle(annotated)
-    annotated.sort(key=lambda x: x[0])
-    return [e for _, e in annotated[:need]]
+    exposure_of = {}
+    for i, e in enumerate(bucket):
+        exp = exposures.get((e.get("word") or "").lower(), 0)
+        if exp:
+            exposure_of[i] = exp
+    index = selection.SelectionIndex({"bucket": [range(len(bucket))]}, len(bucket), exposure_of, lambda i: "bucket", rng)
+    return [bucket[i] for i in index.select("bucket", need, include_mastered, mastery_threshold)]
 
 
 def build_definition(e: Dict[str, Any]) -> str:
@@ -164,34 +198,70 @@ def build_definition(e: Dict[str, Any]) -> str:
     return " | ".join(p for p in parts if p)
 
 
-def recommend(level: str, entries: List[Dict[str, Any]], count: int, exposures: Dict[str, int], include_mastered: bool, mastery_threshold: int) -> List[Dict[str, Any]]:
-    dist = DISTRIBUTIONS.get(level) or DISTRIBUTIONS["B1"]
-    buckets = categorize(entries, level)
-    plan: List[Dict[str, Any]] = []
-    # Calculate needs
-    needs = {band: int(count * pct) for band, pct in dist.items()}
-    # Adjust rounding remainder
-    remainder = count - sum(needs.values())
-    if remainder > 0:
-        needs["core"] += remainder
-
-    for band in ["core", "stretch", "challenge"]:
-        selected = select_from_bucket(buckets[band], needs.get(band, 0), exposures, include_mastered, mastery_threshold)
-        plan.extend(selected)
-
-    # Fallback fill if short
-    if len(plan) < count:
-        pool = [e for e in entries if e not in plan]
-        random.shuffle(pool)
-        for e in pool:
-            if len(plan) >= count:
-                break
+def recommend(level: str, entries: List[Dict[str, Any]], count: int, exposures: Dict[str, int], include_mastered: bool, mastery_threshold: int, rng: random.Random | None = None, due: List[str] | None = None, review_share: float = 0.0) -> List[Dict[str, Any]]:
+    bands: Dict[str, List[int]] = {"core": [], "stretch": [], "challenge": []}
+    exposure_of: Dict[int, int] = {}
+    band_of: Dict[int, str | None] = {}
+    due_rank = {w: r for r, w in enumerate(due or [])}
+    due_ids: List[Tuple[int, int]] = []
+    with metrics.span("categorize"):
+        for i, e in enumerate(entries):
+            b = band_for_entry(level, e.get("cefr") or e.get("CEFR") or "UNK")
+            if b:
+                bands[b].append(i)
             w = (e.get("word") or "").lower()
             exp = exposures.get(w, 0)
-            if not include_mastered and exp >= mastery_threshold:
-                continue
-            plan.append(e)
-    return plan[:count]
+            if exp or w in due_rank:
+                exposure_of[i] = exp
+                band_of[i] = b
+            if w in due_rank:
+                due_ids.append((due_rank[w], i))
+    metrics.count("entries_considered", len(entries))
+    with metrics.span("select"):
+        index = selection.SelectionIndex({b: [ids] for b, ids in bands.items()}, len(entries), exposure_of, band_of.get, rng)
+        ids = selection.plan(index, band_needs(level, count), count, include_mastered, mastery_threshold, due=[i for _, i in sorted(due_ids)], review_share=review_share)
+    metrics.count("entries_selected", len(ids))
+    return [entries[i] for i in ids]
+
+
+def categorize_store(store: vocab_store.VocabStore, level: str) -> Dict[str, List[range]]:
+    """Store counterpart of categorize(): id ranges per band (store ids are grouped by CEFR)."""
+    level_map = BAND_MAP.get(level) or BAND_MAP["B1"]
+    return {band: store.ids_for_cefr(level_map.get(band, [])) for band in ["core", "stretch", "challenge"]}
+
+
+def exposure_ids(store: vocab_store.VocabStore, exposures: Dict[str, int]) -> Dict[int, int]:
+    """Store id -> exposure count for every exposed word present in the store."""
+    exposure_of: Dict[int, int] = {}
+    for w, exp in exposures.items():
+        if exp:
+            for i in store.find(w):
+                exposure_of[i] = exp
+    return exposure_of
+
+
+def store_index(level: str, store: vocab_store.VocabStore, exposure_of: Dict[int, int], rng: random.Random | None = None) -> selection.SelectionIndex:
+    """(band, exposure-tier) index over a compiled store for `level`."""
+    return selection.SelectionIndex(
+        categorize_store(store, level),
+        len(store),
+        exposure_of,
+        lambda i: band_for_entry(level, store.cefr(i)),
+        rng,
+    )
+
+
+def recommend_store(level: str, store: vocab_store.VocabStore, count: int, exposures: Dict[str, int], include_mastered: bool, mastery_threshold: int, rng: random.Random | None = None, due: List[str] | None = None, review_share: float = 0.0) -> List[int]:
+    """recommend() over a compiled store; returns store ids. Only exposed words are resolved to ids."""
+    with metrics.span("categorize"):
+        exposure_of = exposure_ids(store, exposures)
+    metrics.count("entries_considered", len(store))
+    with metrics.span("select"):
+        index = store_index(level, store, exposure_of, rng)
+        due_ids = [i for w in (due or []) for i in store.find(w)]
+        ids = selection.plan(index, band_needs(level, count), count, include_mastered, mastery_threshold, due=due_ids, review_share=review_share)
+    metrics.count("entries_selected", len(ids))
+    return ids
 
 
 def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
@@ -203,44 +273,142 @@ def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     ap.add_argument("--tsv", help="Write TSV output path")
     ap.add_argument("--json", help="Write JSON plan path")
     ap.add_argument("--level-override", help="Override current level (e.g., B2)")
-    return ap.parse_args(argv or sys.argv[1:])
+    ap.add_argument("--no-store", action="store_true", help="Load the lexicon sources directly instead of the compiled store")
+    ap.add_argument("--seed", type=int, help="Seed the random selection for reproducible output")
+    ap.add_argument("--review-share", type=float, default=0.0, help="Max share of each band quota for due reviews (0-1)")
+    ap.add_argument("--learner", help="Learner id: read level/exposures from that learner's progress dir")
+    ap.add_argument("--daemon", nargs="?", const="", metavar="ADDR", help="Ask a running daemon.py (socket path or HOST:PORT; default data/progress/daemon.sock)")
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.learner:
+        import learners
+
+        try:
+            learners.learner_dir(ns.learner)
+        except ValueError as e:
+            ap.error(str(e))
+    return ns
 
 
 def main(argv: List[str] | None = None) -> int:
     ns = parse_args(argv)
-    level = ns.level_override or load_level()
-    exposures = load_progress_exposures()
-    entries = load_vocab_entries(Path(ns.vocab_dir))
-    if not entries:
-        print("No vocab entries found", file=sys.stderr)
+    if ns.daemon is not None:
+        return via_daemon(ns)
+    with metrics.session("recommend_vocab", ns):
+        return run(ns)
+
+
+def daemon_request(ns: argparse.Namespace) -> Dict[str, Any]:
+    """The recommend request daemon.py answers for this command line."""
+    req = {
+        "op": "recommend",
+        "count": ns.count,
+        "include_mastered": ns.include_mastered,
+        "mastery_threshold": ns.mastery_threshold,
+        "level_override": ns.level_override,
+        "seed": ns.seed,
+        "review_share": ns.review_share,
+    }
+    if ns.learner:
+        req["learner"] = ns.learner
+    return req
+
+
+def write_response(ns: argparse.Namespace, resp: Dict[str, Any]) -> None:
+    """Print / write a daemon recommend response exactly like a local run."""
+    plan = [{k: e[k] for k in ("word", "cefr") if e[k] is not None} for e in resp["plan"]]
+    exposures = {(e["word"] or "").lower(): e["exposures"] for e in resp["plan"]}
+    write_outputs(ns, resp["level"], plan, [e["definition"] for e in resp["plan"]], exposures)
+
+
+def via_daemon(ns: argparse.Namespace) -> int:
+    """Thin client mode: selection runs in the daemon; output is formatted as usual."""
+    if ns.no_store or ns.vocab_dir != "vocab":
+        print("[WARN] --daemon uses the daemon's compiled store (--vocab-dir/--no-store ignored)", file=sys.stderr)
+    import daemon_client  # imported here: socket costs every local run ~3 ms
+
+    try:
+        resp = daemon_client.request(daemon_request(ns), ns.daemon or daemon_client.DEFAULT_ADDRESS)
+    except daemon_client.DaemonError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
         return 1
-    plan = recommend(level, entries, ns.count, exposures, ns.include_mastered, ns.mastery_threshold)
+    write_response(ns, resp)
+    return 0
+
+
+def run(ns: argparse.Namespace) -> int:
+    if ns.learner:
+        import learners
+
+        use_progress_dir(learners.learner_dir(ns.learner, PROGRESS_DIR))
+    with metrics.span("load_level"):
+        level = ns.level_override or load_level()
+    rng = random.Random(ns.seed)
+    with metrics.span("load_due"):
+        due = load_due_words(ns.count * 10) if ns.review_share > 0 else []
+    with metrics.span("open_store"):
+        if ns.no_store:
+            store = None
+        else:
+            import vocab_store  # imported here: --no-store and --daemon runs skip it (~8 ms)
+
+            store = vocab_store.open_store(Path(ns.vocab_dir))
+    if store is not None:
+        with store:
+            if not len(store):
+                print("No vocab entries found", file=sys.stderr)
+                return 1
+            # logged words are far fewer than lexicon entries: fetch them all instead of decoding every word
+            with metrics.span("load_exposures"):
+                exposures = load_progress_exposures()
+            with metrics.span("recommend"):
+                ids = recommend_store(level, store, ns.count, exposures, ns.include_mastered, ns.mastery_threshold, rng, due, ns.review_share)
+            with metrics.span("decode_entries"):
+                plan = [store.entry(i) for i in ids]
+    else:
+        with metrics.span("load_vocab"):
+            entries = load_vocab_entries(Path(ns.vocab_dir))
+        if not entries:
+            print("No vocab entries found", file=sys.stderr)
+            return 1
+        with metrics.span("load_exposures"):
+            exposures = load_progress_exposures((e.get("word") or "") for e in entries)
+        with metrics.span("recommend"):
+            plan = recommend(level, entries, ns.count, exposures, ns.include_mastered, ns.mastery_threshold, rng, due, ns.review_share)
+
+    with metrics.span("build_definition"):
+        definitions = [build_definition(e) for e in plan]
 
     # Output summary
+    with metrics.span("output"):
+        write_outputs(ns, level, plan, definitions, exposures)
+    return 0
+
+
+def write_outputs(ns: argparse.Namespace, level: str, plan: List[Dict[str, Any]], definitions: List[str], exposures: Dict[str, int]) -> None:
     print(f"Level: {level} | Requested: {ns.count} | Provided: {len(plan)}")
     print("word\tcefr\texposures\tdefinition")
-    for e in plan:
+    for e, d in zip(plan, definitions):
         w = e.get("word")
         cefr = e.get("cefr", "?")
         exp = exposures.get((w or '').lower(), 0)
-        print(f"{w}\t{cefr}\t{exp}\t{build_definition(e)[:80]}")
+        print(f"{w}\t{cefr}\t{exp}\t{d[:80]}")
 
     if ns.tsv:
-        lines = [f"{e.get('word')}\t{build_definition(e)}" for e in plan]
+        lines = [f"{e.get('word')}\t{d}" for e, d in zip(plan, definitions)]
         Path(ns.tsv).write_text("\n".join(lines) + "\n", encoding="utf-8")
         print(f"[WROTE] TSV -> {ns.tsv}")
     if ns.json:
         out = []
-        for e in plan:
+        for e, d in zip(plan, definitions):
             out.append({
                 "word": e.get("word"),
                 "cefr": e.get("cefr"),
                 "exposures": exposures.get((e.get("word") or '').lower(), 0),
-                "definition": build_definition(e),
+                "definition": d,
             })
         Path(ns.json).write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
         print(f"[WROTE] JSON -> {ns.json}")
-    return 0
 
 
 if __name__ == "__main__":  # pragma: no cover
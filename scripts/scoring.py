@@ -0,0 +1,148 @@
+"""Versioned scoring formulas and derived-metric materialization for progress log records.
+
+- SCORING_WEIGHTS[v]: attempt_score weights / speed band / error penalty of formula version v.
+- SUBLEVEL_TABLES[v]: proficiency -> (sublevel_code, coarse CEFR) cut-offs of table version v.
+- Old versions stay in the tables: bump SCORING_VERSION / SUBLEVEL_VERSION and add a new entry
+  instead of editing one, so stored values can be told apart and recomputed.
+
+Log records (SCHEMA_VERSION 2) carry the per-attempt metrics computed when they were written:
+
+    "schema_version": 2,
+    "derived": {"scoring_version": 1, "comprehension_pct": 70.0, "vocab_retention_pct": 60.0,
+                "wpm": 22.7, "speed_norm": 0.0, "attempt_score": 58.08...}
+
+derived(rec) returns that block when the record's schema and scoring versions are current and
+recomputes it from the raw fields otherwise (older records, compacted segments, formula change).
+migrate_log.py rewrites stale records in place.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+
+SCHEMA_VERSION = 2  # 1: raw fields only; 2: + schema_version / derived
+SCORING_VERSION = 1
+SUBLEVEL_VERSION = 1
+
+SCORING_WEIGHTS: Dict[int, Dict[str, float]] = {
+    1: {
+        "comp": 0.5,
+        "vocab": 0.3,
+        "speed": 0.2,
+        "comp_no_speed": 0.625,  # speed weight redistributed when tokens/time are missing
+        "vocab_no_speed": 0.375,
+        "wpm_floor": 90,  # speed_norm = 0 at or below, 100 at or above the ceiling
+        "wpm_ceiling": 180,
+        "inference_penalty": 4,
+        "other_penalty": 2,
+        "penalty_scale": 15,
+    },
+}
+
+# (upper bound exclusive, sublevel_code, coarse CEFR); the last row has no bound
+SUBLEVEL_TABLES: Dict[int, Tuple[Tuple[Optional[float], str, str], ...]] = {
+    1: (
+        (35, "B1.0", "B1"),
+        (50, "B1.3", "B1"),
+        (60, "B1.8", "B1+"),
+        (70, "B2.1", "B2"),
+        (80, "B2.4", "B2"),
+        (87, "B2.7", "B2+"),
+        (94, "C1.1", "C1"),
+        (None, "C1.4", "C1"),
+    ),
+}
+
+
+def compute_comprehension(a: Dict[str, Any]) -> float:
+    tot = a.get("comp_questions_total") or 0
+    cor = a.get("comp_questions_correct") or 0
+    return (cor / tot) * 100 if tot else 0.0
+
+
+def compute_vocab_retention(a: Dict[str, Any]) -> float:
+    pres = a.get("vocab_items_presented") or 0
+    mast = a.get("vocab_items_mastered") or 0
+    return (mast / pres) * 100 if pres else 0.0
+
+
+def reading_speed(a: Dict[str, Any], version: int = SCORING_VERSION) -> Tuple[Optional[float], Optional[float]]:
+    """(wpm, speed_norm 0-100), or (None, None) without tokens / time."""
+    w = SCORING_WEIGHTS[version]
+    tokens = a.get("input_tokens") or 0
+    time_sec = a.get("time_spent_sec") or 0
+    # Words per minute (approx tokens as words)
+    if tokens > 0 and time_sec and time_sec > 0:
+        wpm = (tokens / time_sec) * 60
+        floor, ceiling = w["wpm_floor"], w["wpm_ceiling"]
+        return wpm, max(0.0, min(1.0, (wpm - floor) / (ceiling - floor))) * 100  # clamp
+    return None, None
+
+
+def _score(a: Dict[str, Any], comp: float, vocab: float, speed_norm: Optional[float], version: int) -> float:
+    w = SCORING_WEIGHTS[version]
+    if speed_norm is not None:
+        base = w["comp"] * comp + w["vocab"] * vocab + w["speed"] * speed_norm
+    else:
+        base = w["comp_no_speed"] * comp + w["vocab_no_speed"] * vocab
+    # error penalty (if errors_types present)
+    errors = a.get("errors_types") or {}
+    inf_err = errors.get("inference", 0)
+    other_err = sum(v for k, v in errors.items() if k != "inference")
+    total_q = a.get("comp_questions_total") or 1
+    error_pen = ((inf_err * w["inference_penalty"]) + (other_err * w["other_penalty"])) / total_q * w["penalty_scale"]
+    return max(0.0, base - error_pen)
+
+
+def attempt_score(a: Dict[str, Any], version: int = SCORING_VERSION) -> float:
+    """0-100: weighted comprehension / retention / speed minus the error penalty (raw fields)."""
+    return _score(a, compute_comprehension(a), compute_vocab_retention(a), reading_speed(a, version)[1], version)
+
+
+def map_sublevel(score: float, version: int = SUBLEVEL_VERSION) -> Tuple[str, str]:
+    """(sublevel_code, coarse_cefr) for a proficiency score."""
+    for bound, code, coarse in SUBLEVEL_TABLES[version]:
+        if bound is None or score < bound:
+            return code, coarse
+    raise ValueError(f"sublevel table {version} has no catch-all row")
+
+
+def derive(a: Dict[str, Any], version: int = SCORING_VERSION) -> Dict[str, Any]:
+    """The derived block for a record, computed from its raw fields."""
+    comp = compute_comprehension(a)
+    vocab = compute_vocab_retention(a)
+    wpm, speed_norm = reading_speed(a, version)
+    return {
+        "scoring_version": version,
+        "comprehension_pct": comp,
+        "vocab_retention_pct": vocab,
+        "wpm": wpm,
+        "speed_norm": speed_norm,
+        "attempt_score": _score(a, comp, vocab, speed_norm, version),
+    }
+
+
+def stored_derived(a: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The record's derived block if it was written with the current schema + scoring version."""
+    d = a.get("derived")
+    if a.get("schema_version") == SCHEMA_VERSION and isinstance(d, dict) and d.get("scoring_version") == SCORING_VERSION:
+        return d
+    return None
+
+
+def derived(a: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored derived metrics when current, else recomputed from the raw fields."""
+    d = stored_derived(a)
+    return d if d is not None else derive(a)
+
+
+def materialize(a: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of the record with schema_version and a freshly computed derived block (placed last)."""
+    out = {k: v for k, v in a.items() if k not in ("schema_version", "derived")}
+    out["schema_version"] = SCHEMA_VERSION
+    out["derived"] = derive(out)
+    return out
+
+
+def is_current(a: Dict[str, Any]) -> bool:
+    """True if the record's stored block is current and matches its raw fields."""
+    d = stored_derived(a)
+    return d is not None and d == derive(a)
@@ -0,0 +1,225 @@
+"""Indexed O(k) selection engine for recommend_vocab.py.
+
+Replaces "annotate, shuffle, sort the whole bucket" with a (band, exposure-tier) index:
+
+- Entries are plain integer ids (position in the entry list, or compiled store id).
+- A band is a list of id sequences (ranges for the compiled store, lists otherwise).
+- Only exposed ids (words that appear in the log) are materialized into tiers; tier 0
+  (never exposed) is the band minus the exposed ids and is sampled by rejection, so picking k
+  words from a 500k-entry band costs O(k) expected time and O(exposed) memory.
+
+Semantics match the original select_from_bucket(): take the lowest exposure tier first, uniformly
+random within a tier, skip exposure >= mastery threshold unless include_mastered. Chosen ids are
+tracked in a set, so the fallback fill never repeats an entry. Pass a seeded random.Random for
+reproducible output.
+
+A long-lived caller (daemon.py) keeps one index: reset() between requests, set_exposure() when a
+word is logged. Dense candidate lists (unexposed ids of a mostly-exposed band, unmastered ids of a
+mostly-mastered lexicon) are cached until the next set_exposure().
+
+Due reviews (srs.py) can take up to `review_share` of each band quota before sampling; they are
+used most-overdue first and bypass the mastery threshold.
+"""
+from __future__ import annotations
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Container, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+MAX_REJECTION_FACTOR = 8  # rejection draws per requested item before enumerating instead
+
+
+class _Concat:
+    """Index into several sequences as if they were one (no copying)."""
+
+    def __init__(self, parts: Sequence[Sequence[int]]):
+        self.parts = [p for p in parts if len(p)]
+        self.ends = list(accumulate(len(p) for p in self.parts))
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, k: int) -> int:
+        j = bisect_right(self.ends, k)
+        start = self.ends[j - 1] if j else 0
+        return self.parts[j][k - start]
+
+    def __iter__(self):
+        for p in self.parts:
+            yield from p
+
+
+class _Either:
+    """Membership in any of several sets, without building their union."""
+
+    def __init__(self, *sets: Set[int]):
+        self.sets = sets
+
+    def __contains__(self, i: int) -> bool:
+        return any(i in s for s in self.sets)
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.sets)
+
+
+def sample_excluding(pool: Sequence[int], k: int, excluded: Container[int], rng: random.Random, excluded_in_pool: int | None = None) -> List[int]:
+    """Up to k distinct ids from `pool` not in `excluded`, uniformly at random, in random order.
+
+    `excluded_in_pool` (how many excluded ids are in the pool, if known) sharpens the choice
+    between rejection sampling and enumeration; defaults to len(excluded).
+    """
+    n = len(pool)
+    if k <= 0 or n == 0:
+        return []
+    # Rejection sampling while exclusions are a minority of the pool
+    if (len(excluded) if excluded_in_pool is None else excluded_in_pool) * 2 < n:
+        picked: List[int] = []
+        seen: Set[int] = set()
+        for _ in range(k * MAX_REJECTION_FACTOR + 32):
+            i = pool[rng.randrange(n)]
+            if i in excluded or i in seen:
+                continue
+            seen.add(i)
+            picked.append(i)
+            if len(picked) == k:
+                return picked
+    eligible = [i for i in pool if i not in excluded]
+    return rng.sample(eligible, min(k, len(eligible)))
+
+
+class SelectionIndex:
+    """(band, exposure-tier) index over entry ids."""
+
+    def __init__(
+        self,
+        bands: Dict[str, Sequence[Sequence[int]]],
+        size: int,
+        exposure_of: Dict[int, int],
+        band_of: Callable[[int], Optional[str]],
+        rng: random.Random | None = None,
+    ):
+        self.bands = {b: _Concat(parts) for b, parts in bands.items()}
+        self.size = size
+        self.exposure_of = exposure_of
+        self.band_of = band_of
+        self.rng = rng or random.Random()
+        self.taken: Set[int] = set()
+        # band -> exposure -> ids (exposed ids only)
+        self.tiers: Dict[Optional[str], Dict[int, List[int]]] = {}
+        for i, exp in exposure_of.items():
+            if exp <= 0:
+                continue
+            self.tiers.setdefault(band_of(i), {}).setdefault(exp, []).append(i)
+        self.exposed: Set[int] = {i for i, exp in exposure_of.items() if exp > 0}
+        self.exposed_in_band: Dict[Optional[str], int] = {b: sum(map(len, t.values())) for b, t in self.tiers.items()}
+        # derived candidate sets, kept across reset() (long-lived callers), dropped on set_exposure()
+        self._cache: Dict[Tuple[Any, ...], Any] = {}
+
+    def _cached(self, key: Tuple[Any, ...], build: Callable[[], Any]) -> Any:
+        val = self._cache.get(key)
+        if val is None:
+            val = self._cache[key] = build()
+        return val
+
+    def reset(self, rng: random.Random | None = None) -> None:
+        """Forget chosen ids so the index can serve another request (long-lived callers)."""
+        self.taken = set()
+        if rng is not None:
+            self.rng = rng
+
+    def set_exposure(self, i: int, exp: int) -> None:
+        """Move id `i` to the tier for its new exposure count (incremental update)."""
+        old = self.exposure_of.get(i, 0)
+        if old == exp:
+            return
+        band = self.band_of(i)
+        tiers = self.tiers.setdefault(band, {})
+        if old > 0:
+            tiers[old].remove(i)
+            if not tiers[old]:
+                del tiers[old]
+        else:
+            self.exposed.add(i)
+            self.exposed_in_band[band] = self.exposed_in_band.get(band, 0) + 1
+        self.exposure_of[i] = exp
+        tiers.setdefault(exp, []).append(i)
+        self._cache.clear()
+
+    def _eligible(self, exp: int, include_mastered: bool, mastery_threshold: int) -> bool:
+        return include_mastered or exp < mastery_threshold
+
+    def select(self, band: str, need: int, include_mastered: bool, mastery_threshold: int) -> List[int]:
+        """Pick `need` ids from band, lowest exposure tier first."""
+        pool = self.bands.get(band)
+        if need <= 0 or pool is None or not len(pool):
+            return []
+        out: List[int] = []
+        if self._eligible(0, include_mastered, mastery_threshold):
+            n_exposed = self.exposed_in_band.get(band, 0)
+            if n_exposed * 2 < len(pool):
+                out = sample_excluding(pool, need, _Either(self.exposed, self.taken), self.rng, n_exposed + len(self.taken))
+            else:  # mostly exposed band: rejection would mostly miss, sample the unexposed rest
+                unexposed = self._cached(("unexposed", band), lambda: [i for i in pool if i not in self.exposed])
+                out = sample_excluding(unexposed, need, self.taken, self.rng)
+        for exp in sorted(self.tiers.get(band, {})):
+            if len(out) >= need or not self._eligible(exp, include_mastered, mastery_threshold):
+                break
+            out.extend(sample_excluding(self.tiers[band][exp], need - len(out), self.taken, self.rng))
+        self.taken.update(out)
+        return out
+
+    def take(self, ids: Iterable[int], k: int) -> List[int]:
+        """First k ids (in the given priority order) not chosen yet."""
+        out: List[int] = []
+        for i in ids:
+            if len(out) >= k:
+                break
+            if i not in self.taken:
+                self.taken.add(i)
+                out.append(i)
+        return out
+
+    def fill(self, need: int, include_mastered: bool, mastery_threshold: int) -> List[int]:
+        """Fallback: `need` random eligible ids from the whole lexicon (any band), unseen so far."""
+        if need <= 0:
+            return []
+        if include_mastered:
+            out = sample_excluding(range(self.size), need, self.taken, self.rng)
+        else:
+            t = mastery_threshold
+            mastered = self._cached(("mastered", t), lambda: {i for i in self.exposed if self.exposure_of[i] >= t})
+            if len(mastered) * 2 < self.size:
+                out = sample_excluding(range(self.size), need, _Either(mastered, self.taken), self.rng, len(mastered) + len(self.taken))
+            else:
+                rest = self._cached(("unmastered", t), lambda: [i for i in range(self.size) if i not in mastered])
+                out = sample_excluding(rest, need, self.taken, self.rng)
+        self.taken.update(out)
+        return out
+
+
+def plan(
+    index: SelectionIndex,
+    needs: Dict[str, int],
+    count: int,
+    include_mastered: bool,
+    mastery_threshold: int,
+    bands: Iterable[str] = ("core", "stretch", "challenge"),
+    due: Sequence[int] = (),
+    review_share: float = 0.0,
+) -> List[int]:
+    """Band quotas (due reviews first, up to review_share of each), then random fallback fill."""
+    due_by_band: Dict[Optional[str], List[int]] = {}
+    for i in due:
+        due_by_band.setdefault(index.band_of(i), []).append(i)
+    out: List[int] = []
+    for band in bands:
+        need = needs.get(band, 0)
+        if review_share > 0 and need > 0:
+            reviews = index.take(due_by_band.get(band, []), min(need, math.ceil(need * review_share)))
+            out.extend(reviews)
+            need -= len(reviews)
+        out.extend(index.select(band, need, include_mastered, mastery_threshold))
+    if len(out) < count:
+        out.extend(index.fill(count - len(out), include_mastered, mastery_threshold))
+    return out[:count]
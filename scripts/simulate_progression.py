@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""Monte Carlo level progression: how many reading attempts until the learner reaches a target?
+
+Starts every trajectory from the learner's current state (checkpoint ring of recent reading
+attempts, reading count, current_cefr) and simulates further reading attempts until the target
+level (B2) or sublevel (B2.1) is reached or --max-attempts runs out. Prints the distribution of
+attempts (and calendar days at the learner's median reading cadence) until the target.
+
+- Attempt model, fitted on the learner's last --window reading attempts in progress.ndjson:
+  comprehension and retention rates ~ Beta (method of moments) drawn per attempt, correct /
+  mastered ~ Binomial(total) with totals resampled from the log, WPM ~ log-normal on the share of
+  attempts with tokens/time, inference / other errors ~ Poisson. --model bootstrap resamples
+  whole logged attempts instead.
+- Batch engine (NumPy): all trajectories advance one attempt per step as arrays (ring of the last
+  7 attempts per trajectory); finished trajectories drop out of the active set. It applies
+  scoring.attempt_score, the 0.85-decay rolling proficiency, infer_level's promote / demote rules,
+  map_sublevel and decide_level's score override with the same operations in the same order as
+  update_progress.py, so levels, sublevels and proficiency scores are identical, not approximate.
+- Scalar engine (--engine scalar, and the fallback without NumPy): replays each trajectory through
+  update_progress.fold_attempt() + decide_level() themselves.
+- --self-check N is the property test for that claim: N trajectories with randomized attempt
+  models and start levels run through both engines on the same draws; every step must agree
+  exactly (level, sublevel, proficiency).
+
+Usage:
+  python scripts/simulate_progression.py --target B2
+  python scripts/simulate_progression.py --learner stu-0042 --target B2.1 --trajectories 100000 --json sim.json
+  python scripts/simulate_progression.py --self-check 2000
+"""
+from __future__ import annotations
+import argparse
+import copy
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import learners
+import metrics
+import update_progress as up
+from analytics import DEN, LAG_W, WINDOW, attempt_metrics_numpy
+from progress_log import skill_is, tail_records
+from scoring import SUBLEVEL_TABLES, SUBLEVEL_VERSION
+
+try:
+    import numpy as np
+except ImportError:  # optional: scalar engine only
+    np = None
+
+DRAW_FIELDS = ("comp_total", "comp_correct", "vocab_presented", "vocab_mastered", "tokens", "time_sec", "inf_err", "other_err")
+RANKS = ["A1", "A2", "B1", "B1+", "B2", "B2+", "C1", "C2"]  # decide_level's rank list
+SUBLEVELS = SUBLEVEL_TABLES[SUBLEVEL_VERSION]
+SUB_CODES = [code for _b, code, _cefr in SUBLEVELS]
+SUB_BOUNDS = [b for b, _code, _cefr in SUBLEVELS if b is not None]
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def rank(level: str) -> int:
+    return RANKS.index(level.replace("+", ""))
+
+
+def level_order(level: str) -> Tuple[int, bool]:
+    """Ordering for targets: B1 < B1+ < B2 < B2+ < C1."""
+    return rank(level), level.endswith("+")
+
+
+# ---------------------------------------------------------------------------
+# Attempt model
+# ---------------------------------------------------------------------------
+
+def _beta(rates: Sequence[float]) -> Tuple[float, float]:
+    """Method-of-moments Beta(a, b) for rates in [0, 1] (near-degenerate when they barely vary)."""
+    mu = min(max(statistics.fmean(rates), 0.001), 0.999)
+    var = statistics.pvariance(rates) if len(rates) > 1 else 0.0
+    kappa = mu * (1 - mu) / var - 1 if var > 0 else 1000.0
+    kappa = min(max(kappa, 2.0), 1000.0)
+    return mu * kappa, (1 - mu) * kappa
+
+
+def record_draw(rec: Dict[str, Any]) -> Dict[str, int]:
+    errors = rec.get("errors_types") or {}
+    return {
+        "comp_total": rec.get("comp_questions_total") or 0,
+        "comp_correct": rec.get("comp_questions_correct") or 0,
+        "vocab_presented": rec.get("vocab_items_presented") or 0,
+        "vocab_mastered": rec.get("vocab_items_mastered") or 0,
+        "tokens": rec.get("input_tokens") or 0,
+        "time_sec": rec.get("time_spent_sec") or 0,
+        "inf_err": errors.get("inference", 0),
+        "other_err": sum(v for k, v in errors.items() if k != "inference"),
+    }
+
+
+def fit_model(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-metric distributions from logged reading attempts (see module docstring)."""
+    draws = [record_draw(r) for r in records]
+    comp = [d for d in draws if d["comp_total"] > 0]
+    vocab = [d for d in draws if d["vocab_presented"] > 0]
+    speed = [d for d in draws if d["tokens"] > 0 and d["time_sec"] > 0]
+    log_wpm = [math.log(d["tokens"] / d["time_sec"] * 60) for d in speed]
+    stamps = sorted(datetime.fromisoformat(r["timestamp"].replace("Z", "+00:00")) for r in records if isinstance(r.get("timestamp"), str))
+    gaps = [(b - a).total_seconds() / 86400 for a, b in zip(stamps, stamps[1:])]
+    return {
+        "attempts": len(draws),
+        "comp_totals": [d["comp_total"] for d in draws],
+        "comp_beta": _beta([d["comp_correct"] / d["comp_total"] for d in comp]) if comp else (1.0, 1000.0),
+        "vocab_presented": [d["vocab_presented"] for d in draws],
+        "vocab_beta": _beta([d["vocab_mastered"] / d["vocab_presented"] for d in vocab]) if vocab else (1.0, 1000.0),
+        "speed_share": len(speed) / len(draws),
+        "tokens": [d["tokens"] for d in speed] or [0],
+        "wpm_lognormal": (statistics.fmean(log_wpm), statistics.pstdev(log_wpm)) if log_wpm else (0.0, 0.0),
+        "inf_rate": statistics.fmean(d["inf_err"] for d in draws),
+        "other_rate": statistics.fmean(d["other_err"] for d in draws),
+        "days_per_attempt": statistics.median(gaps) if gaps else None,
+        "bootstrap": draws,
+    }
+
+
+@lru_cache(maxsize=256)
+def _beta_binomial_cdf(size: int, a: float, b: float):
+    """P(K <= k) for k = 0..size, K ~ Beta-Binomial(size, a, b)."""
+    lbeta = lambda x, y: math.lgamma(x) + math.lgamma(y) - math.lgamma(x + y)  # noqa: E731
+    pmf = [math.comb(size, k) * math.exp(lbeta(k + a, size - k + b) - lbeta(a, b)) for k in range(size + 1)]
+    cdf = np.cumsum(pmf)
+    cdf[-1] = 1.0
+    return cdf
+
+
+def _counts(rng, sizes: Sequence[int], ab: Tuple[Any, Any], n: int):
+    """(sizes resampled from the log, successes ~ Beta-Binomial(size, a, b)) for n draws."""
+    size = rng.choice(np.asarray(sizes, dtype=np.int64), n)
+    a, b = ab
+    if np.ndim(a):  # per-trajectory parameters (self-check)
+        return size, rng.binomial(size, rng.beta(a, b, n))
+    # scalar parameters: invert the tabulated CDF, one uniform per draw instead of beta + binomial
+    u = rng.random(n)
+    k = np.zeros(n, dtype=np.int64)
+    for v in set(sizes):
+        if v > 0:
+            sel = size == v
+            k[sel] = np.searchsorted(_beta_binomial_cdf(v, float(a), float(b)), u[sel])
+    return size, k
+
+
+def sample_numpy(model: Dict[str, Any], rng, n: int, bootstrap: bool = False) -> Dict[str, Any]:
+    """One attempt for each of n trajectories (int64 arrays). Model entries may be per-trajectory arrays."""
+    if bootstrap:
+        pool = model["bootstrap"]
+        pick = rng.integers(0, len(pool), n)
+        return {k: np.array([d[k] for d in pool], dtype=np.int64)[pick] for k in DRAW_FIELDS}
+    tot, cor = _counts(rng, model["comp_totals"], model["comp_beta"], n)
+    pres, mast = _counts(rng, model["vocab_presented"], model["vocab_beta"], n)
+    has_speed = rng.random(n) < model["speed_share"]
+    tokens = np.where(has_speed, rng.choice(np.asarray(model["tokens"], dtype=np.int64), n), 0)
+    mu, sigma = model["wpm_lognormal"]
+    wpm = rng.lognormal(mu, sigma, n)
+    secs = np.where(tokens > 0, np.maximum(1, np.rint(tokens * 60 / wpm)), 0).astype(np.int64)
+    return {
+        "comp_total": tot,
+        "comp_correct": cor,
+        "vocab_presented": pres,
+        "vocab_mastered": mast,
+        "tokens": tokens,
+        "time_sec": secs,
+        "inf_err": rng.poisson(model["inf_rate"], n),
+        "other_err": rng.poisson(model["other_rate"], n),
+    }
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    limit, k, p = math.exp(-lam), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def sample_py(model: Dict[str, Any], rng: random.Random, bootstrap: bool = False) -> Dict[str, int]:
+    """sample_numpy for one attempt, stdlib only (scalar engine without NumPy)."""
+    if bootstrap:
+        return dict(rng.choice(model["bootstrap"]))
+    tot = rng.choice(model["comp_totals"])
+    p = rng.betavariate(*model["comp_beta"])
+    pres = rng.choice(model["vocab_presented"])
+    q = rng.betavariate(*model["vocab_beta"])
+    tokens = rng.choice(model["tokens"]) if rng.random() < model["speed_share"] else 0
+    secs = max(1, round(tokens * 60 / rng.lognormvariate(*model["wpm_lognormal"]))) if tokens > 0 else 0
+    return {
+        "comp_total": tot,
+        "comp_correct": sum(rng.random() < p for _ in range(tot)),
+        "vocab_presented": pres,
+        "vocab_mastered": sum(rng.random() < q for _ in range(pres)),
+        "tokens": tokens,
+        "time_sec": secs,
+        "inf_err": _poisson(rng, model["inf_rate"]),
+        "other_err": _poisson(rng, model["other_rate"]),
+    }
+
+
+def draw_record(d: Dict[str, int]) -> Dict[str, Any]:
+    """A reading attempt record as update_progress would fold it."""
+    return {
+        "skill_focus": "reading",
+        "comp_questions_total": d["comp_total"],
+        "comp_questions_correct": d["comp_correct"],
+        "vocab_items_presented": d["vocab_presented"],
+        "vocab_items_mastered": d["vocab_mastered"],
+        "input_tokens": d["tokens"],
+        "time_spent_sec": d["time_sec"],
+        "errors_types": {"inference": d["inf_err"], "detail": d["other_err"]},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+class BatchState:
+    """n trajectories advancing in lockstep from one start state, as arrays.
+
+    The last-7-attempts ring is circular: column `pos` holds the latest attempt, (pos - k) % 7 the
+    one k attempts earlier. Ring fill and reading count are the same for every trajectory.
+    """
+
+    def __init__(self, cp: Dict[str, Any], levels: Sequence[str], n: int):
+        self.names = ["B1", "B1+", "B2", "B2+", "C1"]
+        for name in list(levels) + [cefr for _b, _c, cefr in SUBLEVELS]:
+            if name not in self.names:
+                self.names.append(name)
+        self.rank = np.array([rank(x) for x in self.names])
+        self.b1 = np.isin(np.arange(len(self.names)), [self.names.index(x) for x in ("B1", "B1-") if x in self.names])
+        self.b2_from = np.isin(np.arange(len(self.names)), [self.names.index(x) for x in ("B1+", "B1")])
+        self.coarse = np.array([self.names.index(cefr) for _b, _c, cefr in SUBLEVELS])
+        self.bounds = np.asarray(SUB_BOUNDS, dtype=float)
+        ring = cp["recent_reading"][-WINDOW:]
+        cols = {
+            "comp": [up.compute_comprehension(a) for a in ring],
+            "ret": [up.compute_vocab_retention(a) for a in ring],
+            "score": [a["attempt_score"] for a in ring],
+            "inf": [(a.get("errors_types", {}) or {}).get("inference", 0) for a in ring],
+            "err": [sum((a.get("errors_types", {}) or {}).values()) for a in ring],
+        }
+        pad = WINDOW - len(ring)
+        for k, vals in cols.items():
+            dtype = np.int64 if k in ("inf", "err") else np.float64
+            row = np.array(vals + [0] * pad, dtype=dtype)
+            setattr(self, k, np.tile(row, (n, 1)))
+        self.pos = (len(ring) - 1) % WINDOW
+        self.m = len(ring)
+        self.total = cp["reading_total"]
+        lv = list(levels) if len(levels) == n else list(levels) * n
+        self.cur = np.array([self.names.index(x) for x in lv], dtype=np.int64)
+        self.prof = np.zeros(n)
+        self.sub = np.zeros(n, dtype=np.int64)
+
+    def keep(self, mask) -> None:
+        for k in ("comp", "ret", "score", "inf", "err", "cur", "prof", "sub"):
+            setattr(self, k, getattr(self, k)[mask])
+
+    def lag(self, k: int) -> int:
+        return (self.pos - k) % WINDOW
+
+    def step(self, d: Dict[str, Any]) -> None:
+        """Fold one attempt per trajectory and re-decide the level (update_progress.decide_level)."""
+        f = {k: d[k].astype(np.float64) for k in DRAW_FIELDS}
+        am = attempt_metrics_numpy(f)
+        self.pos = (self.pos + 1) % WINDOW
+        self.m = min(self.m + 1, WINDOW)
+        self.total += 1
+        p, m, lag = self.pos, self.m, self.lag
+        self.comp[:, p] = c0 = am["comp"]
+        self.ret[:, p] = r0 = am["vocab"]
+        self.score[:, p] = am["score"]
+        self.inf[:, p] = d["inf_err"]
+        self.err[:, p] = d["inf_err"] + d["other_err"]
+        # rolling_proficiency: oldest term first
+        acc = 0.0
+        for k in range(m - 1, -1, -1):
+            acc = acc + self.score[:, lag(k)] * LAG_W[k]
+        prof = acc / DEN[m]
+        sub = np.searchsorted(self.bounds, prof, side="right")
+        # infer_level
+        c, r, cur = self.comp, self.ret, self.cur
+        new = cur.copy()
+        if m >= 2:
+            demote = (c0 < 50) & (c[:, lag(1)] < 50) & ~self.b1[cur]
+            new[demote] = self.names.index("B1")
+            rest = ~demote
+        else:
+            rest = np.ones(len(cur), dtype=bool)
+        p1 = np.zeros(len(cur), dtype=bool)
+        if m >= 3:
+            p1 = rest & self.b1[cur] & (c0 >= 70) & (c[:, lag(1)] >= 70) & (c[:, lag(2)] >= 70) \
+                & (r0 >= 50) & (r[:, lag(1)] >= 50) & (r[:, lag(2)] >= 50)
+            new[p1] = self.names.index("B1+")
+        if m >= 5:
+            cand = rest & ~p1 & self.b2_from[cur]
+            cols = [lag(k) for k in range(4, -1, -1)]  # oldest first, as sum() adds them
+            comp_avg = ((((0.0 + c[:, cols[0]]) + c[:, cols[1]]) + c[:, cols[2]]) + c[:, cols[3]] + c[:, cols[4]]) / 5
+            ret_avg = ((((0.0 + r[:, cols[0]]) + r[:, cols[1]]) + r[:, cols[2]]) + r[:, cols[3]] + r[:, cols[4]]) / 5
+            inf5 = self.inf[:, cols].sum(axis=1)
+            err5 = self.err[:, cols].sum(axis=1)
+            p2 = cand & (comp_avg >= 75) & (ret_avg >= 60) & (inf5 / np.where(err5 == 0, 1, err5) <= 0.2)
+            new[p2] = self.names.index("B2")
+        # score-based coarse level wins when higher and not provisional
+        if self.total >= 3:
+            coarse = self.coarse[sub]
+            up_ = self.rank[coarse] > self.rank[new]
+            new[up_] = coarse[up_]
+        self.cur, self.prof, self.sub = new, prof, sub
+
+
+def start_state(progress_dir: Path) -> Tuple[Dict[str, Any], str]:
+    """(checkpoint synced with the log, current_cefr); read-only."""
+    up.use_progress_dir(progress_dir)
+    cp = up.sync_checkpoint(up.load_checkpoint())
+    return cp, up.load_level().get("current_cefr", "B1")
+
+
+def target_reached(target: str) -> Tuple[str, Any]:
+    """('sub', index) for a sublevel code, ('cefr', order) for a coarse level."""
+    if target in SUB_CODES:
+        return "sub", SUB_CODES.index(target)
+    return "cefr", level_order(target)
+
+
+def simulate_batch(cp: Dict[str, Any], level: str, model: Dict[str, Any], target: str, n: int, max_attempts: int, seed: int, bootstrap: bool) -> List[Optional[int]]:
+    """Attempts until the target per trajectory (None = not within max_attempts)."""
+    rng = np.random.default_rng(seed)
+    st = BatchState(cp, [level], n)
+    kind, goal = target_reached(target)
+    order = np.array([level_order(x) >= goal for x in st.names]) if kind == "cefr" else None
+    out = np.full(n, -1, dtype=np.int64)
+    ids = np.arange(n)
+    for step in range(1, max_attempts + 1):
+        st.step(sample_numpy(model, rng, len(ids), bootstrap))
+        hit = order[st.cur] if kind == "cefr" else st.sub >= goal
+        if hit.any():
+            out[ids[hit]] = step
+            ids = ids[~hit]
+            st.keep(~hit)
+            if not len(ids):
+                break
+    return [int(x) if x >= 0 else None for x in out]
+
+
+def simulate_scalar(cp: Dict[str, Any], level: str, model: Dict[str, Any], target: str, n: int, max_attempts: int, seed: int, bootstrap: bool) -> List[Optional[int]]:
+    rng = random.Random(seed)
+    kind, goal = target_reached(target)
+    out: List[Optional[int]] = []
+    for _ in range(n):
+        c = copy.deepcopy(cp)
+        cur, res = level, None
+        for step in range(1, max_attempts + 1):
+            up.fold_attempt(c, draw_record(sample_py(model, rng, bootstrap)))
+            cur, sub_code, _prof, _prov = up.decide_level(c["recent_reading"], c["reading_total"], cur)
+            if (SUB_CODES.index(sub_code) >= goal) if kind == "sub" else level_order(cur) >= goal:
+                res = step
+                break
+        out.append(res)
+    return out
+
+
+def self_check(n: int, steps: int, seed: int) -> int:
+    """Batch vs scalar on identical draws with randomized models / start levels; returns mismatches."""
+    rng = np.random.default_rng(seed)
+    levels = [str(x) for x in rng.choice(["B1", "B1+", "B2", "B2+", "C1"], n)]
+    model = {
+        "comp_totals": [0, 5, 10, 13, 14],
+        "comp_beta": (rng.uniform(0.5, 8, n), rng.uniform(0.3, 4, n)),
+        "vocab_presented": [0, 5, 10, 25, 40],
+        "vocab_beta": (rng.uniform(0.5, 8, n), rng.uniform(0.3, 4, n)),
+        "speed_share": rng.uniform(0, 1, n),
+        "tokens": [250, 600, 1200],
+        "wpm_lognormal": (rng.uniform(3.5, 5.5, n), rng.uniform(0.05, 0.6, n)),
+        "inf_rate": rng.uniform(0, 2, n),
+        "other_rate": rng.uniform(0, 2, n),
+    }
+    cp = up.empty_checkpoint()
+    warm = sample_numpy(model, rng, n)
+    for i in range(int(rng.integers(0, 10))):  # shared history before the trajectories split
+        up.fold_attempt(cp, draw_record({k: int(warm[k][i]) for k in DRAW_FIELDS}))
+    st = BatchState(cp, levels, n)
+    scalar = [(copy.deepcopy(cp), lv) for lv in levels]
+    bad = 0
+    for step in range(steps):
+        d = sample_numpy(model, rng, n)
+        st.step(d)
+        for i in range(n):
+            c, cur = scalar[i]
+            up.fold_attempt(c, draw_record({k: int(d[k][i]) for k in DRAW_FIELDS}))
+            cur, sub_code, prof, _prov = up.decide_level(c["recent_reading"], c["reading_total"], cur)
+            scalar[i] = (c, cur)
+            if (cur, sub_code, prof) != (st.names[st.cur[i]], SUB_CODES[st.sub[i]], st.prof[i]):
+                bad += 1
+                if bad <= 5:
+                    print(f"[ERROR] trajectory {i} step {step + 1}: scalar {cur} {sub_code} {prof!r}, "
+                          f"batch {st.names[st.cur[i]]} {SUB_CODES[st.sub[i]]} {st.prof[i]!r}", file=sys.stderr)
+    return bad
+
+
+def summarize(results: List[Optional[int]], days_per_attempt: Optional[float]) -> Dict[str, Any]:
+    done = sorted(x for x in results if x is not None)
+    out: Dict[str, Any] = {"trajectories": len(results), "reached": len(done), "reached_share": len(done) / len(results) if results else 0.0}
+    if done:
+        q = statistics.quantiles(done, n=100, method="inclusive") if len(done) > 1 else [done[0]] * 99
+        out["attempts"] = {f"p{p}": q[p - 1] for p in PERCENTILES}
+        out["attempts"]["mean"] = statistics.fmean(done)
+        if days_per_attempt:
+            out["days"] = {k: round(v * days_per_attempt, 1) for k, v in out["attempts"].items()}
+        hist: Dict[str, int] = {}
+        width = max(1, math.ceil((done[-1] + 1) / 20))
+        for x in done:
+            lo = (x // width) * width
+            key = f"{lo}-{lo + width - 1}"
+            hist[key] = hist.get(key, 0) + 1
+        out["histogram"] = hist
+    return out
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Monte Carlo: reading attempts until a target level / sublevel")
+    ap.add_argument("--progress-dir", default=str(up.PROGRESS_DIR))
+    ap.add_argument("--learner", help="Learner id (see learners.py)")
+    ap.add_argument("--target", default="B2", help="Coarse level (B1+, B2, B2+, C1) or sublevel code (B2.1)")
+    ap.add_argument("--trajectories", type=int, default=20000)
+    ap.add_argument("--max-attempts", type=int, default=300)
+    ap.add_argument("--window", type=int, default=50, help="Fit the attempt model on the last N reading attempts")
+    ap.add_argument("--model", choices=["fit", "bootstrap"], default="fit")
+    ap.add_argument("--engine", choices=["batch", "scalar"], help="Default: batch with NumPy, else scalar")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", metavar="FILE", help="Write the summary as JSON")
+    ap.add_argument("--self-check", type=int, metavar="N", help="Compare batch vs scalar engines on N random trajectories and exit")
+    ap.add_argument("--self-check-steps", type=int, default=60)
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.target not in SUB_CODES and ns.target.replace("+", "") not in RANKS:
+        ap.error(f"unknown target {ns.target!r}")
+    if ns.learner:
+        try:
+            ns.progress_dir = str(learners.learner_dir(ns.learner, Path(ns.progress_dir)))
+        except ValueError as e:
+            ap.error(str(e))
+    return ns
+
+
+def run(ns: argparse.Namespace) -> int:
+    if ns.self_check:
+        if np is None:
+            print("[ERROR] --self-check needs NumPy (it checks the batch engine)", file=sys.stderr)
+            return 1
+        with metrics.span("self_check"):
+            bad = self_check(ns.self_check, ns.self_check_steps, ns.seed)
+        print(f"self-check: {ns.self_check} trajectories x {ns.self_check_steps} attempts, {bad} mismatch(es)")
+        return 1 if bad else 0
+    engine = ns.engine or ("batch" if np is not None else "scalar")
+    if engine == "batch" and np is None:
+        print("[ERROR] --engine batch needs NumPy", file=sys.stderr)
+        return 1
+    with metrics.span("fit"):
+        cp, level = start_state(Path(ns.progress_dir))
+        records = tail_records(ns.window, skill_is("reading"), up.LOG_FILE)
+        if len(records) < 3:
+            print(f"[ERROR] Need at least 3 reading attempts in {up.LOG_FILE} to fit a model (found {len(records)})", file=sys.stderr)
+            return 1
+        model = fit_model(records)
+    prof, _prov = up.rolling_proficiency(cp["recent_reading"], cp["reading_total"])
+    print(f"Start: {level} ({up.map_sublevel(prof)[0]}) prof={prof:.1f} after {cp['reading_total']} reading attempts; "
+          f"model from the last {model['attempts']} ({ns.model})")
+    sim = simulate_batch if engine == "batch" else simulate_scalar
+    t = time.perf_counter()
+    with metrics.span("simulate"):
+        results = sim(cp, level, model, ns.target, ns.trajectories, ns.max_attempts, ns.seed, ns.model == "bootstrap")
+    elapsed = time.perf_counter() - t
+    metrics.count("trajectories", ns.trajectories)
+    summary = summarize(results, model["days_per_attempt"])
+    summary.update(target=ns.target, start_level=level, engine=engine, model=ns.model, max_attempts=ns.max_attempts, seconds=round(elapsed, 3))
+    print(f"Target {ns.target}: {summary['reached_share']:.1%} of {ns.trajectories} trajectories within {ns.max_attempts} attempts "
+          f"[{engine}, {elapsed:.2f}s]")
+    if "attempts" in summary:
+        print("          " + " ".join(f"{k:>7}" for k in summary["attempts"]))
+        print("attempts  " + " ".join(f"{v:>7.1f}" for v in summary["attempts"].values()))
+        if "days" in summary:
+            print("days      " + " ".join(f"{v:>7.1f}" for v in summary["days"].values()))
+        peak = max(summary["histogram"].values())
+        for k, v in summary["histogram"].items():
+            print(f"  {k:>9} {'#' * max(1, round(40 * v / peak)) if v else ''} {v}")
+    if ns.json:
+        Path(ns.json).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("simulate_progression", ns):
+        return run(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Spaced-repetition scheduling (SM-2 style) for logged vocabulary.
+
+Each time a word appears in an attempt's `new_words_added`, that attempt counts as a review of the
+word. Review quality (0–5) comes from the attempt's vocab retention
+(vocab_items_mastered / vocab_items_presented); attempts without vocab counts grade as 4.
+
+Per-word state: ease (difficulty, >= 1.3), interval_days (stability), reps, lapses, last_review and
+due (epoch seconds). State is updated incrementally by exposure_index.add_attempt() and persisted in
+the review_state table of data/progress/exposures.sqlite (indexed on due), so "what's due now" is an
+ordered index range scan; daemon.py and recommend_vocab.py both read it with due_words().
+
+Reviews are applied in log order, which is assumed to be timestamp order (true for attempts logged
+as they happen). A record appended late with an older timestamp (update_progress.py --ingest of an
+old export) still counts as the latest review: its interval starts from its own timestamp, so the
+word can come due earlier than SM-2 on the sorted history would say. Ingest old exports before
+logging newer attempts to keep the schedule exact.
+
+Usage:
+  python scripts/srs.py due -n 20
+"""
+from __future__ import annotations
+import argparse
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DAY = 86400.0
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+DEFAULT_QUALITY = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_state (
+    word TEXT PRIMARY KEY,
+    ease REAL NOT NULL,
+    interval_days REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    last_review REAL,
+    due REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS review_due ON review_state (due);
+"""
+
+State = Dict[str, Any]
+
+
+def parse_ts(ts: Any) -> Optional[float]:
+    """ISO-8601 timestamp -> epoch seconds (naive timestamps treated as UTC)."""
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def attempt_quality(attempt: Dict[str, Any]) -> int:
+    pres = attempt.get("vocab_items_presented") or 0
+    mast = attempt.get("vocab_items_mastered") or 0
+    if not pres:
+        return DEFAULT_QUALITY
+    return max(0, min(5, int((mast / pres) * 100 // 20)))
+
+
+def new_state() -> State:
+    return {"ease": INITIAL_EASE, "interval_days": 0.0, "reps": 0, "lapses": 0, "last_review": None, "due": 0.0}
+
+
+def review(state: State, quality: int, at: float) -> State:
+    """SM-2 update of one word's state for a review graded `quality` at epoch `at`."""
+    s = dict(state)
+    if quality < 3:
+        s["reps"] = 0
+        s["lapses"] += 1
+        s["interval_days"] = 1.0
+    else:
+        s["reps"] += 1
+        if s["reps"] == 1:
+            s["interval_days"] = 1.0
+        elif s["reps"] == 2:
+            s["interval_days"] = 6.0
+        else:
+            s["interval_days"] = round(s["interval_days"] * s["ease"], 2)
+    s["ease"] = max(MIN_EASE, s["ease"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    s["last_review"] = at
+    s["due"] = at + s["interval_days"] * DAY
+    return s
+
+
+# ---------------------------------------------------------------------------
+# sqlite persistence (tables live in the exposure index database)
+# ---------------------------------------------------------------------------
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA)
+
+
+def load_state(conn: sqlite3.Connection, word: str) -> State:
+    row = conn.execute(
+        "SELECT ease, interval_days, reps, lapses, last_review, due FROM review_state WHERE word = ?", (word,)
+    ).fetchone()
+    if row is None:
+        return new_state()
+    return dict(zip(("ease", "interval_days", "reps", "lapses", "last_review", "due"), row))
+
+
+def record_review(conn: sqlite3.Connection, words: Iterable[str], attempt: Dict[str, Any]) -> None:
+    """Apply one logged attempt to the review state of its words (no-op without timestamp).
+
+    Called in log order; an attempt older than a word's last_review is not re-sorted (see above).
+    """
+    at = parse_ts(attempt.get("timestamp"))
+    if at is None:
+        return
+    q = attempt_quality(attempt)
+    for w in words:
+        s = review(load_state(conn, w), q, at)
+        conn.execute(
+            "INSERT OR REPLACE INTO review_state (word, ease, interval_days, reps, lapses, last_review, due) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (w, s["ease"], s["interval_days"], s["reps"], s["lapses"], s["last_review"], s["due"]),
+        )
+
+
+def clear(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM review_state")
+
+
+def due_words(conn: sqlite3.Connection, now: float | None = None, limit: int = 50) -> List[Tuple[str, float]]:
+    """Most overdue first: [(word, due_epoch)] with due <= now (index range scan)."""
+    now = time.time() if now is None else now
+    return conn.execute(
+        "SELECT word, due FROM review_state WHERE due <= ? ORDER BY due LIMIT ?", (now, limit)
+    ).fetchall()
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Spaced-repetition review queue")
+    ap.add_argument("--progress-dir", default="data/progress")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("due", help="List words due for review")
+    d.add_argument("-n", type=int, default=20)
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    import exposure_index  # local: exposure_index imports this module
+
+    ns = parse_args(argv)
+    progress_dir = Path(ns.progress_dir)
+    exposure_index.sync_dir(progress_dir)
+    with closing(exposure_index.connect(progress_dir)) as conn:
+        now = time.time()
+        rows = due_words(conn, now, ns.n)
+    for word, due in rows:
+        overdue = (now - due) / DAY
+        print(f"{word}\toverdue {overdue:.1f}d")
+    if not rows:
+        print("Nothing due")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
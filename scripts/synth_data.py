@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Synthetic, seeded test data for benchmarks (offline, pure stdlib).
+
+- progress: progress.ndjson attempts with increasing timestamps, mixed skill_focus, errors_types
+  and new_words_added drawn (Zipf-like) from the lexicon word list.
+- lexicon:  vocab/*.json entry lists with a configurable CEFR distribution.
+- passages: <slug>-vocab.tsv / <slug>-collocations.tsv pairs in the generated-passage format
+  (--texts DIR: also texts/<slug>.md passages with front-matter that use those terms).
+
+Usage:
+  python scripts/synth_data.py progress --attempts 100000 --out /tmp/ws/data/progress/progress.ndjson
+  python scripts/synth_data.py lexicon --entries 200000 --files 20 --out /tmp/ws/vocab
+  python scripts/synth_data.py passages --files 2000 --rows 60 --out /tmp/ws/vocab --texts /tmp/ws/texts
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_SEED = 20250811
+CEFR_DISTRIBUTION: Dict[str, float] = {"A2": 0.08, "B1": 0.25, "B1+": 0.10, "B2": 0.27, "B2+": 0.08, "C1": 0.15, "C2": 0.05, "UNK": 0.02}
+SKILL_DISTRIBUTION: Dict[str, float] = {"reading": 0.6, "vocab": 0.25, "grammar": 0.07, "writing": 0.05, "mixed": 0.03}
+POS = ["noun", "verb", "adjective", "adverb", "phrasal verb"]
+SYLLABLES = ["ab", "ac", "al", "an", "ar", "ba", "ce", "co", "de", "di", "em", "en", "ex", "fa", "ge", "in", "la", "lu", "ma", "mi", "ne", "no", "or", "pa", "pre", "pro", "ra", "re", "si", "sta", "te", "ti", "tra", "un", "ve", "vi"]
+
+
+def word_list(n: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """n distinct pseudo-words (deterministic for a seed)."""
+    rng = random.Random(seed)
+    seen = set()
+    out: List[str] = []
+    while len(out) < n:
+        w = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if w in seen:
+            w = f"{w}{len(out)}"
+        seen.add(w)
+        out.append(w)
+    return out
+
+
+def _weighted(dist: Dict[str, float]):
+    labels = list(dist)
+    cum = list(accumulate(dist.values()))
+    return lambda rng: labels[min(len(labels) - 1, bisect.bisect(cum, rng.random() * cum[-1]))]
+
+
+def _zipf_picker(n: int, s: float = 1.1):
+    cum = list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+    return lambda rng: bisect.bisect(cum, rng.random() * cum[-1])
+
+
+def write_progress(path: Path, attempts: int, words: List[str], seed: int = DEFAULT_SEED) -> int:
+    rng = random.Random(seed)
+    skill = _weighted(SKILL_DISTRIBUTION)
+    pick = _zipf_picker(len(words))
+    t = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ability = rng.uniform(0.45, 0.7)  # slowly improving learner
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        for i in range(attempts):
+            t += timedelta(seconds=rng.randint(600, 40000))
+            ability = min(0.95, ability + rng.uniform(-0.002, 0.0025))
+            sk = skill(rng)
+            rec = {
+                "timestamp": t.isoformat(timespec="seconds"),
+                "attempt_id": f"{sk[:4]}-{t:%Y-%m-%dT%H%M%S}-{i}",
+                "skill_focus": sk,
+                "source_id": f"passage-{rng.randint(0, 4999):05d}",
+            }
+            if sk in ("reading", "mixed"):
+                total = rng.choice([5, 10, 13, 14])
+                presented = rng.randint(5, 40)
+                rec.update({
+                    "input_tokens": rng.randint(250, 1200),
+                    "time_spent_sec": rng.randint(300, 1500),
+                    "comp_questions_total": total,
+                    "comp_questions_correct": max(0, min(total, round(rng.gauss(ability, 0.12) * total))),
+                    "vocab_items_presented": presented,
+                    "vocab_items_mastered": max(0, min(presented, round(rng.gauss(ability, 0.15) * presented))),
+                    "self_rating_difficulty": rng.randint(1, 5),
+                })
+                if rng.random() < 0.7:
+                    rec["errors_types"] = {"inference": rng.randint(0, 3), "detail": rng.randint(0, 3), "vocab": rng.randint(0, 2)}
+            if rng.random() < 0.8:
+                rec["new_words_added"] = [words[pick(rng)] for _ in range(rng.randint(1, 8))]
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    return attempts
+
+
+def write_lexicon(out_dir: Path, entries: int, files: int, words: List[str], seed: int = DEFAULT_SEED) -> List[Path]:
+    rng = random.Random(seed + 1)
+    cefr = _weighted(CEFR_DISTRIBUTION)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    per_file = -(-entries // max(1, files))
+    for k in range(max(1, files)):
+        chunk = []
+        for i in range(k * per_file, min(entries, (k + 1) * per_file)):
+            w = words[i % len(words)]
+            chunk.append({
+                "word": w,
+                "pos": rng.choice(POS),
+                "cefr": cefr(rng),
+                "meanings": [f"meaning of {w}"],
+                "collocations": [f"{w} {words[rng.randrange(len(words))]}" for _ in range(rng.randint(0, 3))],
+                "examples": [f"An example with {w}."],
+            })
+        p = out_dir / f"synthetic-{k:04d}.json"
+        p.write_text(json.dumps(chunk, ensure_ascii=False), encoding="utf-8")
+        paths.append(p)
+    return paths
+
+
+def write_passages(out_dir: Path, files: int, rows: int, words: List[str], seed: int = DEFAULT_SEED, texts_dir: Path | None = None) -> List[Path]:
+    rng = random.Random(seed + 2)
+    cefr = _weighted(CEFR_DISTRIBUTION)
+    pick = _zipf_picker(len(words), 0.9)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if texts_dir is not None:
+        texts_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for k in range(files):
+        slug = f"synthetic-passage-{k:05d}"
+        vp, cp = out_dir / f"{slug}-vocab.tsv", out_dir / f"{slug}-collocations.tsv"
+        terms: List[str] = []
+        with vp.open("w", encoding="utf-8") as f:
+            for _ in range(rows):
+                w = words[pick(rng)]
+                terms.append(w)
+                f.write(f"{w}\tnghĩa của {w} – example with {w} ({cefr(rng)})\n")
+        with cp.open("w", encoding="utf-8") as f:
+            for _ in range(max(1, rows // 3)):
+                a, b = words[pick(rng)], words[pick(rng)]
+                terms.append(f"{a} {b}")
+                f.write(f"{a} {b}\t cụm từ – pattern [{a}] + [{b}]\n")
+        paths += [vp, cp]
+        if texts_dir is not None:
+            body: List[str] = []
+            for term in terms:  # each listed term once (sometimes inflected) between filler words
+                body.extend(words[pick(rng)] for _ in range(rng.randint(2, 6)))
+                body.append(term + rng.choice(["", "", "s", "ed"]))
+            tp = texts_dir / f"{slug}.md"
+            tp.write_text(f"---\nsource: synthetic passage {k}\nlength: {len(body)}\nfocus: benchmark\n---\n\n{' '.join(body)}.\n", encoding="utf-8")
+            paths.append(tp)
+    return paths
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Generate synthetic benchmark data")
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    ap.add_argument("--words", type=int, default=50000, help="Size of the pseudo-word vocabulary")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("progress")
+    p.add_argument("--attempts", type=int, default=10000)
+    p.add_argument("--out", default="data/progress/progress.ndjson")
+    lx = sub.add_parser("lexicon")
+    lx.add_argument("--entries", type=int, default=50000)
+    lx.add_argument("--files", type=int, default=10)
+    lx.add_argument("--out", default="vocab")
+    ps = sub.add_parser("passages")
+    ps.add_argument("--files", type=int, default=1000)
+    ps.add_argument("--rows", type=int, default=60)
+    ps.add_argument("--out", default="vocab")
+    ps.add_argument("--texts", help="Also write passage texts (<slug>.md) to this dir")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    words = word_list(ns.words, ns.seed)
+    if ns.cmd == "progress":
+        n = write_progress(Path(ns.out), ns.attempts, words, ns.seed)
+        print(f"Wrote {n} attempts -> {ns.out}")
+    elif ns.cmd == "lexicon":
+        paths = write_lexicon(Path(ns.out), ns.entries, ns.files, words, ns.seed)
+        print(f"Wrote {ns.entries} entries in {len(paths)} files -> {ns.out}")
+    else:
+        paths = write_passages(Path(ns.out), ns.files, ns.rows, words, ns.seed, Path(ns.texts) if ns.texts else None)
+        print(f"Wrote {len(paths)} files -> {ns.out}" + (f", {ns.texts}" if ns.texts else ""))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
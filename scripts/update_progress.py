@@ -9,42 +9,140 @@ Granular proficiency:
 - Compute attempt_score (0–100) combining comprehension, vocab retention, speed (if tokens/time available) and error penalty.
 - Rolling proficiency_score = exp-decay weighted mean of last up to 7 reading attempt_scores.
 - Map to sublevel_code (e.g., B1.3, B2.1) + coarse CEFR.
+- Formulas, weights and the sublevel table are versioned in scoring.py. Each appended record
+  carries schema_version + a "derived" block (comprehension %, retention %, WPM, speed_norm,
+  attempt_score) that readers use while its scoring version is current. The checkpoint and
+  current_level.json record the versions they were computed with; after a version bump the
+  checkpoint ring is rescored and the level re-decided on the next run (migrate_log.py upgrades
+  the log itself).
+
+Checkpoint:
+- The rules above only look at the last 3/5/7 reading attempts, so the full log is not replayed on
+  every run. data/progress/progress.checkpoint.json stores the byte offset it covers, a ring buffer of
+  recent reading attempts (with precomputed attempt_score) and running totals; each run only parses
+  the bytes appended since then.
+- The checkpoint is rebuilt from scratch when the log shrank or its digest no longer matches (log
+  truncated / edited by hand; progress_log.prefix_unchanged() lists which edits are seen). Delete
+  the checkpoint after hand edits that keep every line's length.
+
+Bulk ingest (--ingest FILE):
+- Streams NDJSON or CSV attempts (columns = schema field names), validates each against the schema
+  in data/progress/README.md, appends the valid ones through one buffered writer and replays the
+  level rules after every attempt of the batch (any skill, as logging them one by one would);
+  rejected lines are reported with their line number. --self-check N compares the two on N random
+  attempt sequences.
+  Records are stored with a freshly derived block (an incoming one is kept only if it matches).
+- Prints the CEFR transitions seen during the batch; --transitions-out FILE writes every
+  CEFR/sublevel transition as NDJSON.
+
+Cohorts (--learner ID, see learners.py):
+- Every learner has a sharded progress dir data/progress/learners/<sha1[:2]>/<id>/ holding the
+  same files; --learner points all paths there for this run.
+- --recompute-all replays every learner's log from scratch (rules applied after each attempt,
+  starting from B1) in a process pool (--jobs), rewriting level + checkpoint. Workers
+  print nothing; the parent prints one line per changed learner and relays warnings prefixed
+  with the learner id.
+- Level and checkpoint files are replaced atomically (temp file + fsync + rename).
+
+Concurrent writers:
+- Attempts are appended with progress_log.append_durable(): under the log lock, numbered with a
+  "seq" field and group-committed (concurrent writers share one write + fsync).
+- The checkpoint / level / exposure-index update after an append runs under a second lock
+  (current_level.json.lock), re-reading the level inside it, so parallel runs cannot overwrite a
+  newer level with one computed from an older view of the log.
+- sync_checkpoint() warns about seq gaps (lost or duplicated records) as it folds new lines.
 
 Usage:
     python scripts/update_progress.py --skill reading --attempt-id read-2025-08-11-002 \
         --source cam16-test2-p1 --comp-total 10 --comp-correct 8 \
         --vocab-presented 10 --vocab-mastered 7 --time 650 --difficulty 3 \
         --new-words pivotal emerge --tokens 300
+    python scripts/update_progress.py --ingest classroom-export.csv --transitions-out transitions.ndjson
+    python scripts/update_progress.py --learner stu-0042 --skill reading --attempt-id read-001 ...
+    python scripts/update_progress.py --recompute-all --jobs 8
+    python scripts/update_progress.py --self-check 200
+    python scripts/update_progress.py --daemon --skill reading --attempt-id read-002 ...   # via daemon.py
 
 Extend as needed; pure stdlib.
 """
 from __future__ import annotations
 import argparse
+import contextlib
+import io
 import json
+import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
+
+import metrics
+from progress_log import (
+    SKILLS,
+    append_durable,
+    atomic_write_text,
+    commit_spool,
+    file_lock,
+    iter_appended,
+    iter_import_file,
+    iter_records,
+    last_seq,
+    lock_path,
+    logical_size,
+    prefix_unchanged,
+    span_digest,
+    tail_records,
+    validate_record,
+    with_seq,
+)
+from scoring import (
+    SCORING_VERSION,
+    SUBLEVEL_VERSION,
+    attempt_score,
+    compute_comprehension,
+    compute_vocab_retention,
+    derived,
+    is_current,
+    map_sublevel,
+    materialize,
+)
 
 PROGRESS_DIR = Path("data/progress")
 LOG_FILE = PROGRESS_DIR / "progress.ndjson"
 LEVEL_FILE = PROGRESS_DIR / "current_level.json"
+CHECKPOINT_FILE = PROGRESS_DIR / "progress.checkpoint.json"
+
+CHECKPOINT_VERSION = 1
+INGEST_BUFFER = 1 << 20  # bytes buffered by the bulk-ingest writer
+RING_SIZE = 7  # rolling_proficiency window (infer_level needs at most 5)
+RING_FIELDS = (
+    "attempt_id",
+    "timestamp",
+    "skill_focus",
+    "input_tokens",
+    "time_spent_sec",
+    "comp_questions_total",
+    "comp_questions_correct",
+    "vocab_items_presented",
+    "vocab_items_mastered",
+    "errors_types",
+)
+
+
+def use_progress_dir(progress_dir: Path) -> None:
+    """Point the module paths at another progress dir (a learner's, see learners.py)."""
+    global PROGRESS_DIR, LOG_FILE, LEVEL_FILE, CHECKPOINT_FILE
+    PROGRESS_DIR = progress_dir
+    LOG_FILE = progress_dir / "progress.ndjson"
+    LEVEL_FILE = progress_dir / "current_level.json"
+    CHECKPOINT_FILE = progress_dir / "progress.checkpoint.json"
 
 
 def load_attempts(limit: int | None = None) -> List[Dict[str, Any]]:
-    if not LOG_FILE.exists():
-        return []
-    attempts: List[Dict[str, Any]] = []
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                attempts.append(json.loads(line))
-            except json.JSONDecodeError:
-                print(f"[WARN] Skipping malformed line: {line[:50]}", file=sys.stderr)
-    return attempts[-limit:] if limit else attempts
+    """All attempts, or only the last `limit` via the reverse tail reader (no full scan)."""
+    if limit:
+        return tail_records(limit, path=LOG_FILE)
+    return list(iter_records(LOG_FILE, warn=True))
 
 
 def load_level() -> Dict[str, Any]:
@@ -57,59 +155,212 @@ def load_level() -> Dict[str, Any]:
 
 
 def save_level(level: Dict[str, Any]) -> None:
-    LEVEL_FILE.write_text(json.dumps(level, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-
-def compute_comprehension(a: Dict[str, Any]) -> float:
-    tot = a.get("comp_questions_total") or 0
-    cor = a.get("comp_questions_correct") or 0
-    return (cor / tot) * 100 if tot else 0.0
+    atomic_write_text(LEVEL_FILE, json.dumps(level, ensure_ascii=False, indent=2) + "\n")
+
+
+def level_record(cefr: str, sub_code: str, prof_score: float, provisional: bool, when: str) -> Dict[str, Any]:
+    return {
+        "current_cefr": cefr,
+        "sublevel_code": sub_code,
+        "proficiency_score": round(prof_score, 2),
+        "provisional": provisional,
+        "last_update": when,
+        "scoring_version": SCORING_VERSION,
+        "sublevel_version": SUBLEVEL_VERSION,
+    }
 
 
-def compute_vocab_retention(a: Dict[str, Any]) -> float:
-    pres = a.get("vocab_items_presented") or 0
-    mast = a.get("vocab_items_mastered") or 0
-    return (mast / pres) * 100 if pres else 0.0
+def level_is_stale(level: Dict[str, Any]) -> bool:
+    """Level computed with other scoring / sublevel versions (files without them: version 1)."""
+    return (level.get("scoring_version", 1), level.get("sublevel_version", 1)) != (SCORING_VERSION, SUBLEVEL_VERSION)
 
 
 def infer_level(attempts: List[Dict[str, Any]], current: str) -> str:
     reading_attempts = [a for a in attempts if a.get("skill_focus") == "reading"]
-    last3 = reading_attempts[-3:]
     last5 = reading_attempts[-5:]
-
-    def avg(metric_fn, arr):
-        return sum(metric_fn(a) for a in arr) / len(arr) if arr else 0.0
+    last3 = last5[-3:]
+    # each rule only looks at the last 2/3/5 attempts: compute the metrics once
+    comp5 = [compute_comprehension(a) for a in last5]
+    comp3 = comp5[-3:]
 
     # Demotion check
-    if len(reading_attempts) >= 2 and all(compute_comprehension(a) < 50 for a in reading_attempts[-2:]):
+    if len(comp5) >= 2 and all(c < 50 for c in comp5[-2:]):
         if current not in {"B1", "B1-"}:
             return "B1"  # reset to safer baseline
 
     # Promotion rules
     if current in {"B1", "B1-"} and len(last3) == 3:
-        if all(compute_comprehension(a) >= 70 for a in last3) and all(compute_vocab_retention(a) >= 50 for a in last3):
+        if all(c >= 70 for c in comp3) and all(compute_vocab_retention(a) >= 50 for a in last3):
             return "B1+"
     if current in {"B1+", "B1"} and len(last5) == 5:
-        comp_avg = avg(compute_comprehension, last5)
-        vocab_avg = avg(compute_vocab_retention, last5)
-        # inference errors proportion
-        total_inf = sum((a.get("errors_types", {}) or {}).get("inference", 0) for a in last5)
-        total_err = sum(sum((a.get("errors_types", {}) or {}).values()) for a in last5) or 1
-        inference_ratio = total_inf / total_err
-        if comp_avg >= 75 and vocab_avg >= 60 and inference_ratio <= 0.2:
-            return "B2"
+        comp_avg = sum(comp5) / 5
+        if comp_avg >= 75 and sum(compute_vocab_retention(a) for a in last5) / 5 >= 60:
+            # inference errors proportion
+            errors = [a.get("errors_types", {}) or {} for a in last5]
+            total_inf = sum(e.get("inference", 0) for e in errors)
+            total_err = sum(sum(e.values()) for e in errors) or 1
+            if total_inf / total_err <= 0.2:
+                return "B2"
     return current
 
 
+def rolling_proficiency(r_attempts: List[Dict[str, Any]], total: int | None = None) -> Tuple[float, bool]:
+    """Exp-decay mean of the last up to 7 reading attempt scores.
+
+    `total` is the number of reading attempts ever logged when `r_attempts` is only the recent
+    window (checkpoint ring); defaults to len(r_attempts). Uses a precomputed `attempt_score` key
+    when the record carries one.
+    """
+    if not r_attempts:
+        return 0.0, True
+    # last up to 7
+    last = r_attempts[-7:]
+    weights = []
+    w = 1.0
+    for _ in range(len(last)):
+        weights.append(w)
+        w *= 0.85  # decay
+    weights = list(reversed(weights))  # align earliest with lowest index
+    scores = [a["attempt_score"] if "attempt_score" in a else attempt_score(a) for a in last]
+    total_w = sum(weights) or 1
+    prof = sum(s * wt for s, wt in zip(scores, weights)) / total_w
+    provisional = (len(r_attempts) if total is None else total) < 3
+    return prof, provisional
+
+
+def decide_level(recent: List[Dict[str, Any]], reading_total: int, current: str) -> Tuple[str, str, float, bool]:
+    """Apply heuristic + score mapping. Returns (new_level, sublevel_code, proficiency, provisional)."""
+    prof_score, provisional = rolling_proficiency(recent, reading_total)
+    new_level = infer_level(recent, current)
+    sub_code, coarse_from_score = map_sublevel(prof_score)
+    # If heuristic coarse CEFR and score-based coarse disagree, keep higher only if not provisional
+    if not provisional:
+        # coarse_from_score may refine within band; choose higher by simple ranking
+        rank = ["A1","A2","B1","B1+","B2","B2+","C1","C2"]
+        if rank.index(coarse_from_score.replace("+","")) > rank.index(new_level.replace("+","")):
+            new_level = coarse_from_score
+    return new_level, sub_code, prof_score, provisional
+
+
 def append_attempt(data: Dict[str, Any]) -> None:
-    with LOG_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+    """Durable, seq-numbered append (group-committed with concurrent writers) of the record with
+    its derived metrics materialized."""
+    append_durable(LOG_FILE, [materialize(data)])
+
+
+def state_lock():
+    """Serializes checkpoint / level / exposure-index updates across processes."""
+    return file_lock(lock_path(LEVEL_FILE))
+
+
+# ---------------------------------------------------------------------------
+# Incremental aggregate checkpoint
+# ---------------------------------------------------------------------------
+
+def empty_checkpoint() -> Dict[str, Any]:
+    return {
+        "version": CHECKPOINT_VERSION,
+        "offset": 0,
+        "digest": "",
+        "attempts_total": 0,
+        "reading_total": 0,
+        "malformed_total": 0,
+        "last_seq": None,
+        "scoring_version": SCORING_VERSION,
+        "recent_reading": [],
+    }
+
+
+def load_checkpoint() -> Dict[str, Any]:
+    """Load checkpoint if it still describes a prefix of the log, else return an empty one."""
+    if not CHECKPOINT_FILE.exists():
+        return empty_checkpoint()
+    try:
+        cp = json.loads(CHECKPOINT_FILE.read_text(encoding="utf-8"))
+        offset = int(cp["offset"])
+        if cp.get("version") != CHECKPOINT_VERSION:
+            raise ValueError("version mismatch")
+    except Exception as e:  # noqa: BLE001
+        print(f"[WARN] Ignoring unreadable checkpoint ({e}); rebuilding", file=sys.stderr)
+        return empty_checkpoint()
+    if not prefix_unchanged(LOG_FILE, offset, cp.get("digest")):
+        print("[INFO] Progress log truncated or edited before checkpoint offset; rebuilding", file=sys.stderr)
+        return empty_checkpoint()
+    if cp.get("scoring_version", 1) != SCORING_VERSION:
+        # ring entries keep their raw fields: rescore just those instead of replaying the log
+        print(f"[INFO] Scoring version {cp.get('scoring_version', 1)} -> {SCORING_VERSION}; rescoring checkpoint", file=sys.stderr)
+        for rec in cp["recent_reading"]:
+            rec["attempt_score"] = attempt_score(rec)
+        cp["scoring_version"] = SCORING_VERSION
+    return cp
+
+
+def fold_attempt(cp: Dict[str, Any], a: Dict[str, Any]) -> None:
+    """Fold one parsed attempt into the running totals / recent reading ring."""
+    cp["attempts_total"] += 1
+    if a.get("skill_focus") != "reading":
+        return
+    cp["reading_total"] += 1
+    rec = {k: a.get(k) for k in RING_FIELDS if a.get(k) is not None}
+    rec["attempt_score"] = derived(a)["attempt_score"]
+    ring = cp["recent_reading"]
+    ring.append(rec)
+    if len(ring) > RING_SIZE:
+        del ring[: len(ring) - RING_SIZE]
+
+
+def sync_checkpoint(cp: Dict[str, Any], on_attempt: Callable[[Dict[str, Any]], None] | None = None) -> Dict[str, Any]:
+    """Parse only the complete lines appended after cp['offset'] and fold them in.
+
+    `on_attempt(cp)` is called after each folded attempt of any skill (level replay: the CLI
+    re-decides the level after every append, and decide_level depends on the previous level).
+    """
+    if not LOG_FILE.exists():
+        return cp
+    offset = cp["offset"]
+    parsed = malformed = gaps = 0
+    prev_seq = cp.get("last_seq")
+    for offset, raw in iter_appended(LOG_FILE, offset):
+        line = raw.strip()
+        if not line:
+            continue
+        parsed += 1
+        try:
+            a = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            a = None
+        if not isinstance(a, dict):
+            malformed += 1
+            print(f"[WARN] Skipping malformed line: {line[:50]!r}", file=sys.stderr)
+            continue
+        seq = a.get("seq")
+        if type(seq) is int:
+            if prev_seq is not None and seq != prev_seq + 1:
+                gaps += 1
+                print(f"[WARN] Sequence gap in log: expected seq {prev_seq + 1}, found {seq} ({a.get('attempt_id')})", file=sys.stderr)
+            prev_seq = seq
+        fold_attempt(cp, a)
+        if on_attempt is not None:
+            on_attempt(cp)
+    cp["malformed_total"] += malformed
+    cp["last_seq"] = prev_seq
+    metrics.count("log_lines_parsed", parsed)
+    metrics.count("log_malformed_skipped", malformed)
+    metrics.count("log_seq_gaps", gaps)
+    if offset != cp["offset"]:
+        cp["offset"] = offset
+        cp["digest"] = span_digest(LOG_FILE, offset)
+    return cp
+
+
+def save_checkpoint(cp: Dict[str, Any]) -> None:
+    atomic_write_text(CHECKPOINT_FILE, json.dumps(cp, ensure_ascii=False) + "\n")
 
 
 def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     ap = argparse.ArgumentParser(description="Append learner attempt & update CEFR")
-    ap.add_argument("--skill", required=True, choices=["reading", "vocab", "grammar", "writing", "mixed"], dest="skill")
-    ap.add_argument("--attempt-id", required=True)
+    ap.add_argument("--skill", choices=list(SKILLS), dest="skill")
+    ap.add_argument("--attempt-id")
     ap.add_argument("--source", dest="source_id")
     ap.add_argument("--comp-total", type=int, dest="comp_total")
     ap.add_argument("--comp-correct", type=int, dest="comp_correct")
@@ -120,22 +371,294 @@ def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     ap.add_argument("--new-words", nargs="*", dest="new_words")
     ap.add_argument("--baseline", dest="baseline_cefr")
     ap.add_argument("--tokens", type=int, dest="input_tokens", help="Token (word) count for reading speed calc")
-    return ap.parse_args(argv or sys.argv[1:])
+    ap.add_argument("--ingest", metavar="FILE", help="Bulk-append attempts from an NDJSON or CSV file")
+    ap.add_argument("--format", choices=["ndjson", "csv"], dest="ingest_format", help="Ingest format (default: by suffix)")
+    ap.add_argument("--transitions-out", metavar="FILE", help="With --ingest: write level transitions as NDJSON")
+    ap.add_argument("--learner", help="Learner id: use data/progress/learners/<shard>/<id>/ (see learners.py)")
+    ap.add_argument("--recompute-all", action="store_true", help="Rebuild level + checkpoint of every learner from their logs")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="With --recompute-all: worker processes")
+    ap.add_argument("--self-check", type=int, metavar="N", help="Compare --ingest with logging the same attempts one by one, on N random sequences")
+    ap.add_argument("--daemon", nargs="?", const="", metavar="ADDR", help="Send the attempt to a running daemon.py (socket path or HOST:PORT; default data/progress/daemon.sock)")
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.daemon is not None and (ns.ingest or ns.recompute_all):
+        ap.error("--daemon only logs single attempts")
+    if ns.recompute_all and (ns.learner or ns.ingest):
+        ap.error("--recompute-all covers every learner; drop --learner/--ingest")
+    if not (ns.ingest or ns.recompute_all or ns.self_check) and (not ns.skill or not ns.attempt_id):
+        ap.error("--skill and --attempt-id are required unless --ingest, --recompute-all or --self-check is given")
+    if ns.learner:
+        import learners
+
+        try:
+            learners.learner_dir(ns.learner)
+        except ValueError as e:
+            ap.error(str(e))
+    return ns
+
+
+def ingest(path: Path, fmt: str | None = None, transitions_out: Path | None = None) -> int:
+    """Validate + append a batch of attempts, replaying the level rules once over the batch.
+
+    Holds the state and log locks for the whole batch, so it lands contiguously and in order.
+    """
+    with state_lock(), file_lock(lock_path(LOG_FILE)):
+        return _ingest(path, fmt, transitions_out)
+
+
+def _ingest(path: Path, fmt: str | None, transitions_out: Path | None) -> int:
+    commit_spool(LOG_FILE)  # concurrent group-commit leftovers go in before the batch
+    with metrics.span("sync_checkpoint"):
+        cp = sync_checkpoint(load_checkpoint())
+    level = load_level()
+    current = level.get("current_cefr", "B1")
+    sub_code = level.get("sublevel_code")
+    prof_score = level.get("proficiency_score", 0.0)
+    provisional = level.get("provisional", True)
+    accepted = rejected = 0
+    transitions: List[Dict[str, Any]] = []
+    trans_f = transitions_out.open("w", encoding="utf-8") if transitions_out else None
+    size = logical_size(LOG_FILE)
+    seq = last_seq(LOG_FILE)
+    try:
+        with metrics.span("ingest"), LOG_FILE.open("ab", buffering=INGEST_BUFFER) as out:
+            if size > cp["offset"]:
+                # log ends in a partial line: terminate it so the batch starts on a fresh line
+                out.write(b"\n")
+                cp["malformed_total"] += 1
+            for lineno, rec, err, raw in iter_import_file(path, fmt):
+                problems = [err] if rec is None else validate_record(rec)
+                if problems:
+                    rejected += 1
+                    print(f"[WARN] {path}:{lineno}: {'; '.join(problems)}", file=sys.stderr)
+                    continue
+                if raw is None or "seq" in rec or not is_current(rec):
+                    rec.pop("seq", None)  # renumbered in this log
+                    rec = materialize(rec)  # stored metrics are only trusted if they match
+                    raw = json.dumps(rec, ensure_ascii=False)
+                seq += 1
+                out.write((with_seq(raw, seq) + "\n").encode("utf-8"))
+                accepted += 1
+                fold_attempt(cp, rec)
+                # every attempt, as the CLI does: decide_level depends on the previous level
+                new_level, new_sub, prof_score, provisional = decide_level(cp["recent_reading"], cp["reading_total"], current)
+                if new_level != current or new_sub != sub_code:
+                    t = {
+                        "attempt_id": rec.get("attempt_id"),
+                        "timestamp": rec.get("timestamp"),
+                        "from_cefr": current,
+                        "to_cefr": new_level,
+                        "from_sublevel": sub_code,
+                        "to_sublevel": new_sub,
+                        "proficiency_score": round(prof_score, 2),
+                    }
+                    if trans_f:
+                        trans_f.write(json.dumps(t, ensure_ascii=False) + "\n")
+                    if new_level != current:
+                        transitions.append(t)
+                    current, sub_code = new_level, new_sub
+            out.flush()
+            os.fsync(out.fileno())
+            cp["offset"] = logical_size(LOG_FILE)
+            if accepted:
+                cp["last_seq"] = seq
+    finally:
+        if trans_f:
+            trans_f.close()
+    metrics.count("ingest_accepted", accepted)
+    metrics.count("ingest_rejected", rejected)
+    cp["digest"] = span_digest(LOG_FILE, cp["offset"])
+    with metrics.span("save_checkpoint"):
+        save_checkpoint(cp)
+    with metrics.span("exposure_index_sync"):
+        sync_exposure_index()
+
+    for t in transitions:
+        print(f"{t['timestamp']} {t['attempt_id']}: {t['from_cefr']} -> {t['to_cefr']} ({t['to_sublevel']})")
+    if accepted:
+        level = level_record(current, sub_code, prof_score, provisional, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        save_level(level)
+    print(f"Ingested {accepted} attempts ({rejected} rejected) -> {current} ({sub_code}) score={prof_score:.1f}")
+    return 0 if accepted or not rejected else 1
 
 
 def main(argv: List[str] | None = None) -> int:
     ns = parse_args(argv)
-    PROGRESS_DIR.mkdir(parents=True, exist_ok=True)
-    attempts = load_attempts()
-    level = load_level()
+    if ns.daemon is not None:
+        return via_daemon(ns)
+    with metrics.session("update_progress", ns):
+        return run(ns)
+
+
+def recompute_learner(job: Tuple[str, str]) -> Dict[str, Any]:
+    """Pool worker: replay one learner's log from scratch; writes level + checkpoint.
+
+    The level is re-decided after every attempt, as appending them one by one would. Output to
+    stderr is captured and returned so the parent can print it in order. Module paths are restored
+    afterwards (the serial path runs in the caller's process).
+    """
+    learner_id, progress_dir = job
+    previous_dir = PROGRESS_DIR
+    use_progress_dir(Path(progress_dir))
+    try:
+        return _recompute_learner(learner_id)
+    finally:
+        use_progress_dir(previous_dir)
+
+
+def _recompute_learner(learner_id: str) -> Dict[str, Any]:
+    err = io.StringIO()
+    state = {"current": "B1", "decision": None}
+
+    def replay(cp: Dict[str, Any]) -> None:
+        state["decision"] = decide_level(cp["recent_reading"], cp["reading_total"], state["current"])
+        state["current"] = state["decision"][0]
+
+    with contextlib.redirect_stderr(err), state_lock():
+        old = load_level()
+        cp = sync_checkpoint(empty_checkpoint(), replay)
+        new_level, sub_code, prof_score, provisional = state["decision"] or decide_level([], 0, "B1")
+        save_checkpoint(cp)
+        level = level_record(new_level, sub_code, prof_score, provisional, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        save_level(level)
+    return {
+        "learner": learner_id,
+        "attempts": cp["attempts_total"],
+        "old": (old.get("current_cefr"), old.get("sublevel_code")),
+        "new": (new_level, sub_code),
+        "score": level["proficiency_score"],
+        "stderr": err.getvalue(),
+    }
+
+
+def recompute_all(jobs: int) -> int:
+    import learners
+
+    todo = [(lid, str(d)) for lid, d in learners.iter_learners(PROGRESS_DIR)]
+    if not todo:
+        print(f"No learners under {PROGRESS_DIR / learners.LEARNERS_DIRNAME}")
+        return 0
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # imported here: costs every other run ~15 ms
+
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(recompute_learner, todo, chunksize=max(1, len(todo) // (jobs * 16)))
+    else:
+        pool = None
+        results = map(recompute_learner, todo)
+    changed = attempts = 0
+    try:
+        for r in results:  # in learner-id order
+            for line in r["stderr"].splitlines():
+                print(f"[{r['learner']}] {line}", file=sys.stderr)
+            attempts += r["attempts"]
+            if r["new"] != r["old"]:
+                changed += 1
+                print(f"{r['learner']}\t{r['old'][0]} ({r['old'][1]}) -> {r['new'][0]} ({r['new'][1]})\tscore={r['score']:.1f}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(f"Recomputed {len(todo)} learners ({attempts} attempts), {changed} levels changed")
+    return 0
+
+
+ATTEMPT_FIELDS = (
+    "attempt_id",
+    "skill_focus",
+    "source_id",
+    "baseline_cefr_estimate",
+    "time_spent_sec",
+    "input_tokens",
+    "comp_questions_total",
+    "comp_questions_correct",
+    "vocab_items_presented",
+    "vocab_items_mastered",
+    "new_words_added",
+)
+
+
+def record_attempt(fields: Dict[str, Any], cp: Dict[str, Any], level: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+    """Append one attempt (ATTEMPT_FIELDS, timestamped now), fold it and re-decide the level.
+
+    `cp` is the caller's checkpoint (synced forward here) and `level` its current level (used for
+    the baseline estimate; re-read under the state lock). Saves checkpoint + level + exposure index;
+    returns (checkpoint, level, summary lines to print). Shared by the CLI and daemon.py.
+    """
     now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    attempt = {"timestamp": now_iso}
+    attempt.update((k, fields.get(k)) for k in ATTEMPT_FIELDS)
+    if not attempt["baseline_cefr_estimate"]:
+        attempt["baseline_cefr_estimate"] = level.get("current_cefr")
+    with metrics.span("append_attempt"):
+        append_attempt(attempt)
+    with state_lock():
+        return _update_state(cp, now_iso)
+
+
+def _update_state(cp: Dict[str, Any], now_iso: str) -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+    # another writer may have moved the log / level on since the caller loaded them
+    level = load_level()
+    with metrics.span("save_checkpoint"):
+        cp = sync_checkpoint(cp)
+        save_checkpoint(cp)
+    # keep the word-exposure index in step (parses only the bytes appended since its last sync)
+    with metrics.span("exposure_index_sync"):
+        sync_exposure_index()
+
+    # Granular proficiency only needs the recent reading window kept in the checkpoint
+    recent = cp["recent_reading"]
+    with metrics.span("decide_level"):
+        new_level, sub_code, prof_score, provisional = decide_level(recent, cp["reading_total"], level.get("current_cefr", "B1"))
+
+    lines: List[str] = []
+    if (new_level != level.get("current_cefr")) or ("proficiency_score" not in level) or abs(level.get("proficiency_score",0)-prof_score) > 0.01 or level_is_stale(level):
+        level = level_record(new_level, sub_code, prof_score, provisional, now_iso)
+        save_level(level)
+        lines.append(f"Level updated -> {new_level} ({sub_code}) score={prof_score:.1f} provisional={provisional}")
+    else:
+        save_level(level)
+        lines.append(f"Level unchanged ({level.get('current_cefr')}) ({level.get('sublevel_code')}) score={prof_score:.1f}")
 
-    attempt = {
-        "timestamp": now_iso,
+    # Quick summary
+    last5 = recent[-5:]
+    if last5:
+        comp_avg = sum(compute_comprehension(a) for a in last5) / len(last5)
+        vocab_attempts = [a for a in last5 if (a.get("vocab_items_presented") or 0) > 0]
+        vocab_avg = sum(compute_vocab_retention(a) for a in vocab_attempts) / (len(vocab_attempts) or 1)
+        lines.append(f"Last {len(last5)} reading attempts: comp_avg={comp_avg:.1f}% vocab_avg={vocab_avg:.1f}% prof={prof_score:.1f}")
+    return cp, level, lines
+
+
+def sync_exposure_index() -> None:
+    """Bring exposures.sqlite up to date with the log (imported here: --daemon runs skip sqlite3)."""
+    import exposure_index
+
+    exposure_index.sync_dir(PROGRESS_DIR)
+
+
+def refresh_state(redecide: bool = False) -> List[str]:
+    """Sync checkpoint + exposure index with the log without appending, and re-decide the level
+    from the current one if it was computed with other scoring / sublevel versions (after
+    migrate_log.py) or `redecide` is set (validate_log.py --repair removed folded attempts)."""
+    with state_lock():
+        level = load_level()
+        cp = sync_checkpoint(load_checkpoint())
+        save_checkpoint(cp)
+        sync_exposure_index()
+        if not (redecide or level_is_stale(level)):
+            return []
+        new_level, sub_code, prof_score, provisional = decide_level(cp["recent_reading"], cp["reading_total"], level.get("current_cefr", "B1"))
+        save_level(level_record(new_level, sub_code, prof_score, provisional, datetime.now(timezone.utc).isoformat(timespec="seconds")))
+    why = "repaired log" if redecide else f"scoring v{SCORING_VERSION}, sublevels v{SUBLEVEL_VERSION}"
+    return [f"Level re-decided ({why}) -> {new_level} ({sub_code}) score={prof_score:.1f}"]
+
+
+def attempt_fields(ns: argparse.Namespace) -> Dict[str, Any]:
+    return {
         "attempt_id": ns.attempt_id,
         "skill_focus": ns.skill,
         "source_id": ns.source_id,
-        "baseline_cefr_estimate": ns.baseline_cefr or level.get("current_cefr"),
+        "baseline_cefr_estimate": ns.baseline_cefr,
         "time_spent_sec": ns.time_spent_sec,
         "input_tokens": ns.input_tokens,
         "comp_questions_total": ns.comp_total,
@@ -144,102 +667,110 @@ def main(argv: List[str] | None = None) -> int:
         "vocab_items_mastered": ns.vocab_mastered,
         "new_words_added": ns.new_words,
     }
-    append_attempt(attempt)
-    attempts.append(attempt)
 
-    # Calculate granular proficiency for reading attempts
-    reading_attempts = [a for a in attempts if a.get("skill_focus") == "reading"]
 
-    def attempt_score(a: Dict[str, Any]) -> float:
-        comp = compute_comprehension(a)
-        vocab = compute_vocab_retention(a)
-        tokens = a.get("input_tokens") or 0
-        time_sec = a.get("time_spent_sec") or 0
-        # Words per minute (approx tokens as words)
-        if tokens > 0 and time_sec and time_sec > 0:
-            wpm = (tokens / time_sec) * 60
-            speed_norm = max(0.0, min(1.0, (wpm - 90) / (180 - 90))) * 100  # clamp
-            comp_w, vocab_w, speed_w = 0.5, 0.3, 0.2
-            base = comp_w * comp + vocab_w * vocab + speed_w * speed_norm
-        else:
-            # redistribute speed weight
-            comp_w, vocab_w = 0.625, 0.375
-            base = comp_w * comp + vocab_w * vocab
-        # error penalty (if errors_types present)
-        errors = a.get("errors_types") or {}
-        inf_err = errors.get("inference", 0)
-        other_err = sum(v for k, v in errors.items() if k != "inference")
-        total_q = a.get("comp_questions_total") or 1
-        error_pen = ((inf_err * 4) + (other_err * 2)) / total_q * 15
-        return max(0.0, base - error_pen)
-
-    def rolling_proficiency(r_attempts: List[Dict[str, Any]]) -> Tuple[float, bool]:
-        if not r_attempts:
-            return 0.0, True
-        # last up to 7
-        last = r_attempts[-7:]
-        weights = []
-        w = 1.0
-        for _ in range(len(last)):
-            weights.append(w)
-            w *= 0.85  # decay
-        weights = list(reversed(weights))  # align earliest with lowest index
-        scores = [attempt_score(a) for a in last]
-        total_w = sum(weights) or 1
-        prof = sum(s * wt for s, wt in zip(scores, weights)) / total_w
-        provisional = len(r_attempts) < 3
-        return prof, provisional
-
-    def map_sublevel(score: float) -> Tuple[str, str]:
-        # returns (sublevel_code, coarse_cefr)
-        if score < 35:
-            return "B1.0", "B1"
-        if score < 50:
-            return "B1.3", "B1"
-        if score < 60:
-            return "B1.8", "B1+"
-        if score < 70:
-            return "B2.1", "B2"
-        if score < 80:
-            return "B2.4", "B2"
-        if score < 87:
-            return "B2.7", "B2+"
-        if score < 94:
-            return "C1.1", "C1"
-        return "C1.4", "C1"
-
-    prof_score, provisional = rolling_proficiency(reading_attempts)
-
-    new_level = infer_level(attempts, level.get("current_cefr", "B1"))
-    sub_code, coarse_from_score = map_sublevel(prof_score)
-    # If heuristic coarse CEFR and score-based coarse disagree, keep higher only if not provisional
-    if not provisional:
-        # coarse_from_score may refine within band; choose higher by simple ranking
-        rank = ["A1","A2","B1","B1+","B2","B2+","C1","C2"]
-        if rank.index(coarse_from_score.replace("+","")) > rank.index(new_level.replace("+","")):
-            new_level = coarse_from_score
+def daemon_request(ns: argparse.Namespace) -> Dict[str, Any]:
+    """The log_attempt request daemon.py answers for this command line."""
+    req = {"op": "log_attempt", "attempt": attempt_fields(ns)}
+    if ns.learner:
+        req["learner"] = ns.learner
+    return req
 
-    if (new_level != level.get("current_cefr")) or ("proficiency_score" not in level) or abs(level.get("proficiency_score",0)-prof_score) > 0.01:
-        level = {
-            "current_cefr": new_level,
-            "sublevel_code": sub_code,
-            "proficiency_score": round(prof_score, 2),
-            "provisional": provisional,
-            "last_update": now_iso,
-        }
-        save_level(level)
-        print(f"Level updated -> {new_level} ({sub_code}) score={prof_score:.1f} provisional={provisional}")
-    else:
-        save_level(level)
-        print(f"Level unchanged ({level.get('current_cefr')}) ({level.get('sublevel_code')}) score={prof_score:.1f}")
 
-    # Quick summary
-    last5 = [a for a in reading_attempts][-5:]
-    if last5:
-        comp_avg = sum(compute_comprehension(a) for a in last5) / len(last5)
-        vocab_attempts = [a for a in last5 if (a.get("vocab_items_presented") or 0) > 0]
-        vocab_avg = sum(compute_vocab_retention(a) for a in vocab_attempts) / (len(vocab_attempts) or 1)
-        print(f"Last {len(last5)} reading attempts: comp_avg={comp_avg:.1f}% vocab_avg={vocab_avg:.1f}% prof={prof_score:.1f}")
+def via_daemon(ns: argparse.Namespace) -> int:
+    """Thin client mode: the daemon appends and updates level/checkpoint/index."""
+    import daemon_client  # imported here: socket costs every local run ~3 ms
+
+    try:
+        resp = daemon_client.request(daemon_request(ns), ns.daemon or daemon_client.DEFAULT_ADDRESS)
+    except daemon_client.DaemonError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    for line in resp["lines"]:
+        print(line)
+    return 0
+
+
+def self_check(n: int, seed: int = 0) -> int:
+    """Ingest vs one record_attempt per attempt (the CLI path) on the same attempts, each in a fresh
+    temp progress dir; returns the sequences whose final level (CEFR, sublevel, score,
+    provisional) differs. The first sequence is a fixed one where skipping the re-decide after a
+    non-reading attempt used to end on another level."""
+    import random
+    import tempfile
+
+    def random_attempts(count: int) -> List[Dict[str, Any]]:
+        out = []
+        for i in range(count):
+            comp, vocab = rng.choice([0, 5, 10, 13]), rng.choice([0, 10, 20])
+            a = {**dict.fromkeys(ATTEMPT_FIELDS), "attempt_id": f"check-{i:04d}",
+                 "skill_focus": rng.choice(["reading", "reading", "reading", "vocab", "grammar"]),
+                 "comp_questions_total": comp, "comp_questions_correct": rng.randint(comp // 3, comp),
+                 "vocab_items_presented": vocab, "vocab_items_mastered": rng.randint(0, vocab)}
+            if rng.random() < 0.5:
+                a.update(input_tokens=rng.choice([300, 600, 900]), time_spent_sec=rng.randint(60, 900))
+            out.append(a)
+        return out
+
+    def reading(correct: int) -> Dict[str, Any]:
+        return {**dict.fromkeys(ATTEMPT_FIELDS), "skill_focus": "reading", "comp_questions_total": 10,
+                "comp_questions_correct": correct, "vocab_items_presented": 10, "vocab_items_mastered": 6,
+                "input_tokens": 300, "time_spent_sec": 600}
+
+    fixed = [reading(c) for c in (10, 6, 8, 8, 8)] + [{**dict.fromkeys(ATTEMPT_FIELDS), "skill_focus": "vocab",
+                                                       "vocab_items_presented": 10, "vocab_items_mastered": 6}]
+    for i, a in enumerate(fixed):
+        a["attempt_id"] = f"check-{i:04d}"
+    rng = random.Random(seed)
+    previous_dir = PROGRESS_DIR
+    bad = 0
+    try:
+        for k in range(n):
+            attempts = fixed if k == 0 else random_attempts(rng.randint(1, 40))
+            results = []
+            with tempfile.TemporaryDirectory(prefix="ielts-check-") as tmp:
+                batch = Path(tmp) / "batch.ndjson"
+                batch.write_text("".join(json.dumps({"timestamp": "2025-01-01T00:00:00+00:00", **a}) + "\n" for a in attempts), encoding="utf-8")
+                for mode in ("ingest", "sequential"):
+                    use_progress_dir(Path(tmp) / mode)
+                    PROGRESS_DIR.mkdir()
+                    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                        if mode == "ingest":
+                            ingest(batch)
+                        else:
+                            cp, level = load_checkpoint(), load_level()
+                            for a in attempts:
+                                cp, level, _lines = record_attempt(a, cp, level)
+                    level = load_level()
+                    results.append(tuple(level.get(f) for f in ("current_cefr", "sublevel_code", "proficiency_score", "provisional")))
+            if results[0] != results[1]:
+                bad += 1
+                if bad <= 5:
+                    print(f"[ERROR] sequence {k} ({len(attempts)} attempts): ingest {results[0]}, sequential {results[1]}", file=sys.stderr)
+    finally:
+        use_progress_dir(previous_dir)
+    return bad
+
+
+def run(ns: argparse.Namespace) -> int:
+    if ns.self_check:
+        bad = self_check(ns.self_check)
+        print(f"Self-check: {ns.self_check} sequences, {bad} ingest/sequential mismatches")
+        return 1 if bad else 0
+    if ns.recompute_all:
+        return recompute_all(max(1, ns.jobs))
+    if ns.learner:
+        import learners
+
+        use_progress_dir(learners.learner_dir(ns.learner, PROGRESS_DIR))
+    PROGRESS_DIR.mkdir(parents=True, exist_ok=True)
+    if ns.ingest:
+        return ingest(Path(ns.ingest), ns.ingest_format, Path(ns.transitions_out) if ns.transitions_out else None)
+    with metrics.span("sync_checkpoint"):
+        cp = sync_checkpoint(load_checkpoint())
+    _cp, _level, lines = record_attempt(attempt_fields(ns), cp, load_level())
+    for line in lines:
+        print(line)
     return 0
 
 
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""Stream-validate the progress log and optionally repair it (bad lines moved to a quarantine file).
+
+Readers (iter_records, the exposure index) skip malformed lines silently; this finds them. One
+forward pass over the logical log (compacted segments + active file) checks every line:
+
+- malformed: not a JSON object (invalid JSON, a bare value, undecodable bytes).
+- invalid: fails progress_log.validate_record(), the schema in data/progress/README.md (required
+  timestamp / string attempt_id / skill_focus, integer fields and their ranges, correct <= total, ...).
+- duplicate: attempt_id already used by an earlier valid record.
+- torn: final line without a trailing newline (a crashed writer, or an append still in progress).
+Blank lines are counted but are not problems. Every problem is reported with its logical byte
+offset (the offsets the checkpoint and indexes use) and line number.
+
+Speed / memory:
+- The active file is read in CHUNK_BYTES pieces cut at line ends; each piece is decoded to text once
+  and every line goes straight to the JSON scanner (a line it does not take whole falls back to
+  json.loads, so the verdict is exactly decode_line()'s). Parsing dominates; --jobs N checks pieces
+  in N worker processes (at most 2N pieces in flight) while this process keeps the duplicate table.
+- Memory does not grow with line count or line length, only with distinct attempt_ids:
+  FingerprintSet is an open-addressing table of 64-bit attempt_id fingerprints (blake2b) plus the
+  offset of their first use, in two array('Q') (16 bytes per slot, 37-75% full -> 21-43 bytes
+  per attempt_id). A fingerprint hit is confirmed by re-reading the earlier line, so a collision
+  never flags a valid record.
+
+Repair (--repair):
+- Holds the state lock and the append lock for the scan and the rewrite. The active file minus the
+  problem lines is copied to a temp file in the same dir, fsync'ed and os.replace()d over the log
+  (as migrate_log.py does), so a crash leaves the old or the new file. Problem lines are appended
+  byte for byte to progress.ndjson.quarantine (fsync'ed first): fix them by hand and re-add them
+  with `update_progress.py --ingest progress.ndjson.quarantine`. Of duplicates, the first is kept.
+- Offsets move, so the checkpoint, exposure index and analytics columns are dropped and rebuilt
+  (migrate_log.drop_derived_state, then update_progress.refresh_state). current_level.json is
+  kept unless a removed line was a reading record the checkpoint had folded in (a duplicate, or
+  an invalid record that still parsed): then the level is re-decided from the current one on the
+  rebuilt checkpoint, as the next append would. Stop daemon.py while repairing.
+- Compacted segments are immutable: problems inside them are reported but left in place.
+
+--report FILE writes every problem as a JSON line (offset, length, line, kind, attempt_id, errors,
+in_segment); stdout shows the first --limit of them. Exit status 1 if problems remain.
+
+Usage:
+  python scripts/validate_log.py
+  python scripts/validate_log.py --learner stu-0042 --report problems.ndjson
+  python scripts/validate_log.py --jobs 8
+  python scripts/validate_log.py --repair
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import learners
+import metrics
+import update_progress
+from progress_log import decode_line, file_lock, iter_appended, lock_path, log_layout, read_range, validate_record
+
+CHUNK_BYTES = 8 << 20
+SEGMENT_CHUNK_LINES = 20000
+QUARANTINE_SUFFIX = ".quarantine"
+PROBLEM_KINDS = ("malformed", "invalid", "duplicate", "torn")
+
+# (offset, length, line index in its chunk, kind, attempt_id, errors)
+Problem = Tuple[int, int, int, str, Any, List[str]]
+# (counts, fingerprints, offsets and chunk line indexes of the valid records, problems)
+ChunkResult = Tuple[Dict[str, int], array, array, array, List[Problem]]
+
+_scan_once = json.JSONDecoder().scan_once
+_MISS = object()
+
+
+def fingerprint(attempt_id: Any) -> int:
+    """Stable 64-bit fingerprint of an attempt_id (same in every worker process; never 0)."""
+    digest = hashlib.blake2b(repr(attempt_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class FingerprintSet:
+    """Open-addressing hash set of 64-bit fingerprints, each with a 64-bit value (a byte offset).
+
+    Linear probing over two array('Q'); slot = top bits of the fingerprint, 0 marks an empty slot.
+    Doubles when 75% full.
+    """
+
+    def __init__(self, bits: int = 16):
+        self.bits = bits
+        self.keys = array("Q", bytes(8 << bits))
+        self.values = array("Q", bytes(8 << bits))
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def nbytes(self) -> int:
+        return (len(self.keys) + len(self.values)) * 8
+
+    def setdefault(self, fp: int, value: int) -> Optional[int]:
+        """Insert fp -> value unless present; return the stored value if fp was already there."""
+        keys = self.keys
+        mask = len(keys) - 1
+        i = fp >> (64 - self.bits)
+        while True:
+            k = keys[i]
+            if k == 0:
+                keys[i] = fp
+                self.values[i] = value
+                self.size += 1
+                if self.size * 4 > len(keys) * 3:
+                    self._grow()
+                return None
+            if k == fp:
+                return self.values[i]
+            i = (i + 1) & mask
+
+    def _grow(self) -> None:
+        old_keys, old_values = self.keys, self.values
+        self.__init__(self.bits + 1)
+        for k, v in zip(old_keys, old_values):
+            if k:
+                self.setdefault(k, v)
+
+
+def check_lines(lines: List[bytes], offset: int, torn: bytes = b"") -> ChunkResult:
+    """Parse + validate lines (newline removed) starting at logical `offset`.
+
+    `torn` is a final line without newline. Duplicates are checked later, in order (LogScan.feed).
+    """
+    counts = dict.fromkeys(("lines", "blank", "valid", *PROBLEM_KINDS), 0)
+    fps, offs, idxs = array("Q"), array("Q"), array("L")
+    problems: List[Problem] = []
+    try:
+        texts: Optional[List[str]] = b"\n".join(lines).decode("utf-8").split("\n")
+    except UnicodeDecodeError:
+        texts = None
+    for i, raw in enumerate(lines):
+        size = len(raw) + 1
+        rec: Any = _MISS
+        if texts is not None:
+            text = texts[i]
+            if text[:1] == "{":
+                try:
+                    rec, end = _scan_once(text, 0)
+                except (StopIteration, ValueError, RecursionError):
+                    rec = _MISS
+                else:
+                    if end != len(text) and text[end:].strip(" \t\r"):
+                        rec = _MISS
+        if rec is _MISS:  # not a plain one-object line: decide exactly like decode_line()
+            line = raw.strip()
+            if not line:
+                counts["blank"] += 1
+                offset += size
+                continue
+            try:
+                rec = json.loads(line)
+            except (ValueError, RecursionError) as e:  # JSONDecodeError, UnicodeDecodeError
+                problems.append((offset, size, i, "malformed", None, [f"invalid JSON: {e}"]))
+                offset += size
+                continue
+            if not isinstance(rec, dict):
+                problems.append((offset, size, i, "malformed", None, ["not a JSON object"]))
+                offset += size
+                continue
+        errs = validate_record(rec)
+        if errs:
+            problems.append((offset, size, i, "invalid", rec.get("attempt_id"), errs))
+        else:
+            fps.append(fingerprint(rec["attempt_id"]))
+            offs.append(offset)
+            idxs.append(i)
+        offset += size
+    counts["lines"] = len(lines)
+    if torn:
+        counts["lines"] += 1
+        if torn.strip():
+            problems.append((offset, len(torn), len(lines), "torn", None, ["final line has no newline"]))
+        else:
+            counts["blank"] += 1
+    for p in problems:
+        counts[p[3]] += 1
+    counts["valid"] = len(fps)
+    return counts, fps, offs, idxs, problems
+
+
+def check_file_range(job: Tuple[str, int, int, int]) -> ChunkResult:
+    """Pool worker: check physical bytes [start, end) of the active file (logical offset `logical`)."""
+    path, start, end, logical = job
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = f.read(end - start).split(b"\n")
+    torn = lines.pop()  # b"" unless the piece ends without a newline (end of file)
+    return check_lines(lines, logical, torn)
+
+
+def file_ranges(log: Path, skip: int, size: int, chunk: int = CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    """[start, end) pieces of the active file, each ending after a newline (or at `size`)."""
+    with log.open("rb") as f:
+        start = skip
+        while start < size:
+            end = start + chunk
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            yield start, end
+            start = end
+
+
+def segment_chunks(log: Path, base: int) -> Iterator[Tuple[List[bytes], int]]:
+    """(lines, logical start) batches of the compacted segments (logical bytes [0, base))."""
+    batch: List[bytes] = []
+    start = offset = 0
+    for end, raw in iter_appended(log, 0):  # segments hold whole lines only
+        if offset >= base:
+            break
+        batch.append(raw[:-1])
+        offset = end
+        if len(batch) >= SEGMENT_CHUNK_LINES:
+            yield batch, start
+            batch, start = [], offset
+    if batch:
+        yield batch, start
+
+
+class LogScan:
+    """One validation pass: totals, the duplicate table, problem output."""
+
+    def __init__(self, log: Path, report: Optional[BinaryIO], limit: int):
+        self.log = log
+        self.report = report
+        self.limit = limit
+        self.seen = FingerprintSet()
+        self.counts = dict.fromkeys(("lines", "blank", "valid", *PROBLEM_KINDS, "in_segments"), 0)
+        self.spans: List[Tuple[int, int]] = []  # (offset, length) of active-file problems
+        self.bytes = 0
+
+    def line_at(self, offset: int) -> bytes:
+        want = 4096
+        while True:
+            data = read_range(self.log, offset, offset + want)
+            end = data.find(b"\n")
+            if end >= 0 or len(data) < want:
+                return data[:end] if end >= 0 else data
+            want *= 2
+
+    def feed(self, result: ChunkResult, in_segment: bool) -> None:
+        """Take the next checked chunk: look up its attempt_ids, report its problems in order."""
+        counts, fps, offs, idxs, problems = result
+        setdefault = self.seen.setdefault
+        dups: List[Problem] = []
+        for fp, off, i in zip(fps, offs, idxs):
+            first = setdefault(fp, off)
+            if first is not None:
+                raw = self.line_at(off)
+                aid = json.loads(raw)["attempt_id"]
+                if json.loads(self.line_at(first))["attempt_id"] == aid:
+                    dups.append((off, len(raw) + 1, i, "duplicate", aid, [f"attempt_id first used at offset {first}"]))
+        if dups:
+            counts["valid"] -= len(dups)
+            counts["duplicate"] += len(dups)
+            problems = sorted(problems + dups, key=lambda p: p[0])
+        lines = self.counts["lines"]
+        for p in problems:
+            self.problem(p, lines + p[2] + 1, in_segment)
+        for k, v in counts.items():
+            self.counts[k] += v
+
+    def problem(self, p: Problem, lineno: int, in_segment: bool) -> None:
+        offset, length, _i, kind, aid, errs = p
+        if in_segment:
+            self.counts["in_segments"] += 1
+        else:
+            self.spans.append((offset, length))
+        n = self.counts["in_segments"] + len(self.spans)
+        if not self.limit or n <= self.limit:
+            where = " [compacted segment]" if in_segment else ""
+            label = f" attempt_id {aid!r}" if aid is not None else ""
+            print(f"offset {offset} (line {lineno}){where}: {kind}{label}: {'; '.join(errs)}")
+        if self.report is not None:
+            self.report.write((json.dumps({
+                "offset": offset, "length": length, "line": lineno, "kind": kind,
+                "attempt_id": aid, "errors": errs, "in_segment": in_segment,
+            }, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+
+    def problems(self) -> int:
+        return sum(self.counts[k] for k in PROBLEM_KINDS)
+
+
+def scan(log: Path, scanner: LogScan, jobs: int = 1) -> None:
+    """Check the whole logical log; chunks reach `scanner` in log order."""
+    idx, base, skip = log_layout(log)
+    if idx:
+        with metrics.span("segments"):
+            for lines, start in segment_chunks(log, base):
+                scanner.feed(check_lines(lines, start), True)
+    size = log.stat().st_size  # lines appended during the scan are left for the next run
+    todo = ((str(log), start, end, base + start - skip) for start, end in file_ranges(log, skip, size))
+    with metrics.span("active"):
+        if jobs > 1 and size - skip > CHUNK_BYTES:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                pending: deque = deque()
+                for job in todo:
+                    pending.append(pool.submit(check_file_range, job))
+                    if len(pending) >= 2 * jobs:
+                        scanner.feed(pending.popleft().result(), False)
+                while pending:
+                    scanner.feed(pending.popleft().result(), False)
+        else:
+            for job in todo:
+                scanner.feed(check_file_range(job), False)
+    scanner.bytes = base + size - skip
+
+
+def copy_except(src: BinaryIO, dst: BinaryIO, start: int, end: int, skip_ranges: List[Tuple[int, int]]) -> None:
+    """Copy physical bytes [start, end) of src to dst, leaving out the sorted (start, length) ranges."""
+    pos = start
+    for cut, length in skip_ranges + [(end, 0)]:
+        src.seek(pos)
+        while pos < cut:
+            data = src.read(min(CHUNK_BYTES, cut - pos))
+            dst.write(data)
+            pos += len(data)
+        pos = cut + length
+
+
+def repair(progress_dir: Path, scanner: LogScan, jobs: int = 1) -> Tuple[int, bool]:
+    """Scan under the locks and replace the log without its problem lines.
+
+    Returns (lines moved, whether one of them was a reading attempt that sync_checkpoint folds).
+    """
+    import migrate_log  # drop_derived_state / _fsync_dir; pulls in analytics
+
+    log = update_progress.LOG_FILE
+    quarantine_path = log.with_name(log.name + QUARANTINE_SUFFIX)
+    tmp = log.with_name(f".{log.name}.repair.tmp")
+    with update_progress.state_lock(), file_lock(lock_path(log)):
+        scan(log, scanner, jobs)
+        if not scanner.spans:
+            return 0, False
+        _idx, base, skip = log_layout(log)
+        cuts = [(offset - base + skip, length) for offset, length in scanner.spans]
+        folded = False
+        with metrics.span("rewrite"), log.open("rb") as src:
+            with quarantine_path.open("ab") as q:
+                for pos, length in cuts:
+                    src.seek(pos)
+                    line = src.read(length)
+                    q.write(line if line.endswith(b"\n") else line + b"\n")
+                    if line.endswith(b"\n"):  # a torn final line was never folded
+                        rec = decode_line(line)
+                        folded = folded or (rec is not None and rec.get("skill_focus") == "reading")
+                q.flush()
+                os.fsync(q.fileno())
+            with tmp.open("wb") as dst:
+                copy_except(src, dst, skip, log.stat().st_size, cuts)
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.replace(tmp, log)
+        migrate_log._fsync_dir(log.parent)
+        migrate_log.drop_derived_state(progress_dir, log)
+    print(f"[WROTE] {len(cuts)} line(s) -> {quarantine_path}", file=sys.stderr)
+    return len(cuts), folded
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Validate the progress log (schema, duplicates, torn lines) and optionally repair it")
+    ap.add_argument("--progress-dir", default=str(update_progress.PROGRESS_DIR))
+    ap.add_argument("--learner", help="Learner id (see learners.py)")
+    ap.add_argument("--repair", action="store_true", help="Rewrite the log without problem lines (moved to progress.ndjson.quarantine)")
+    ap.add_argument("--report", metavar="FILE", help="Write every problem as NDJSON")
+    ap.add_argument("--limit", type=int, default=20, help="Problems printed to stdout (0 = all)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes parsing the active file")
+    metrics.add_arguments(ap)
+    ns = ap.parse_args(argv or sys.argv[1:])
+    if ns.learner:
+        try:
+            ns.progress_dir = str(learners.learner_dir(ns.learner, Path(ns.progress_dir)))
+        except ValueError as e:
+            ap.error(str(e))
+    return ns
+
+
+def run(ns: argparse.Namespace) -> int:
+    progress_dir = Path(ns.progress_dir)
+    update_progress.use_progress_dir(progress_dir)
+    log = update_progress.LOG_FILE
+    if not log.exists():
+        print(f"[ERROR] {log} not found", file=sys.stderr)
+        return 2
+    t0 = time.perf_counter()
+    with (open(ns.report, "wb") if ns.report else nullcontext()) as report:
+        scanner = LogScan(log, report, ns.limit)
+        if ns.repair:
+            moved, folded = repair(progress_dir, scanner, max(1, ns.jobs))
+        else:
+            moved, folded = 0, False
+            scan(log, scanner, max(1, ns.jobs))
+    elapsed = time.perf_counter() - t0
+    c = scanner.counts
+    for k, v in c.items():
+        metrics.count(f"validate_{k}", v)
+    print(
+        f"{log}: {c['lines']} lines, {c['valid']} valid, {c['malformed']} malformed, {c['invalid']} invalid, "
+        f"{c['duplicate']} duplicate, {c['torn']} torn; {scanner.bytes / 1e6:.1f} MB in {elapsed:.2f}s "
+        f"({scanner.bytes / 1e6 / max(elapsed, 1e-9):.0f} MB/s), {len(scanner.seen)} attempt_ids in "
+        f"{scanner.seen.nbytes() / 1e6:.1f} MB"
+    )
+    if c["in_segments"]:
+        print(f"[WARN] {c['in_segments']} problem(s) are in compacted segments and were left as is", file=sys.stderr)
+    if moved:
+        with metrics.span("refresh_state"):
+            lines = update_progress.refresh_state(redecide=folded)
+        for line in lines or ["Level kept: no removed line had been counted toward it"]:
+            print(line)
+        return 1 if c["in_segments"] else 0
+    return 1 if scanner.problems() else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    with metrics.session("validate_log", ns):
+        return run(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
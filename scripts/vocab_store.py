@@ -0,0 +1,382 @@
+"""Compiled, memory-mapped vocabulary store for recommend_vocab.py.
+
+`compile` turns the lexicon (vocab/*.json, *-vocab.tsv and Markdown word lists, normalized and
+deduplicated by lexicon.py) into one columnar binary file so a recommendation run does not parse
+every lexicon file:
+
+  header (JSON)   section offsets (relative to the 8-byte aligned body), CEFR/POS label tables,
+                  per-CEFR id ranges, byte order
+  strtab          interned UTF-8 strings (each distinct word stored once)
+  word_off/len    uint32 / uint32 per entry -> slice of strtab
+  cefr            uint8 per entry  -> index into header["cefr_labels"]
+  pos             uint16 per entry -> index into header["pos_labels"]
+  payload_off     uint32[n+1] -> slice of payload blob (full entry JSON, decoded lazily)
+  by_word         uint32 ids sorted by lowercase word (binary-search lookup)
+
+Entries are ordered by CEFR code, so each label is a contiguous id range and band membership
+needs no per-entry work. Meanings/collocations are only decoded for entries actually selected.
+
+Invalidation: manifest.json next to the store records path (relative to the vocab dir), mtime_ns,
+size and sha1 of every source file (and lexicon.PARSER_VERSION). open_store() trusts the store when
+path/mtime/size match;
+otherwise it hashes the changed files and recompiles only if a hash differs (touch-only changes just
+refresh the manifest). A recompile reparses only the changed sources (lexicon.py per-file cache).
+Generations: every compile writes a new store file (store-<time_ns>-<pid>.bin, via a unique temp file
+and os.replace()) and then the manifest, which names it; the last manifest written wins. A store
+file is never replaced or rewritten, so a compile never touches a file a reader (daemon.py) has
+memory-mapped, which Windows would refuse. After writing the manifest, a compile unlinks the older
+generations written more than GENERATION_GRACE_SEC ago (readers open the file right after reading
+the manifest); one still mapped on Windows stays until a later compile removes it. A reader that
+still finds its generation gone re-reads the manifest.
+
+Files: <vocab-dir>/.lexicon/store-*.bin + manifest.json (derived; safe to delete).
+
+Usage:
+  python scripts/vocab_store.py compile --vocab-dir vocab [--force]
+  python scripts/vocab_store.py info --vocab-dir vocab
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import lexicon
+
+MAGIC = b"IELTSLX1"
+STORE_VERSION = 1
+CACHE_DIRNAME = ".lexicon"
+STORE_PREFIX = "store"  # generations: store-<time_ns>-<pid>.bin (store.bin before generations)
+STORE_SUFFIX = ".bin"
+MANIFEST_NAME = "manifest.json"
+OPEN_ATTEMPTS = 3
+GENERATION_GRACE_SEC = 60.0  # older generations are kept this long for readers that just read the manifest
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_files(vocab_dir: Path) -> List[Path]:
+    return lexicon.source_files(vocab_dir)
+
+
+def _source_key(vocab_dir: Path, path: Path) -> str:
+    return path.relative_to(vocab_dir).as_posix()
+
+
+def _stat_key(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _align(buf: bytearray) -> int:
+    buf.extend(b"\0" * (-len(buf) % 8))
+    return len(buf)
+
+
+def compile_store(vocab_dir: Path) -> Path:
+    """Compile the lexicon (lexicon.load_entries: JSON, TSV and Markdown sources) into the binary
+    store; returns the store path."""
+    cache = vocab_dir / CACHE_DIRNAME
+    cache.mkdir(parents=True, exist_ok=True)
+    files = source_files(vocab_dir)
+    entries = lexicon.load_entries(vocab_dir, files)
+
+    cefr_labels: List[str] = []
+    cefr_index: Dict[str, int] = {}
+    pos_labels: List[str] = [""]
+    pos_index: Dict[str, int] = {"": 0}
+    keyed = []
+    for order, e in enumerate(entries):
+        cefr = str(e.get("cefr") or e.get("CEFR") or "UNK")
+        if cefr not in cefr_index:
+            cefr_index[cefr] = len(cefr_labels)
+            cefr_labels.append(cefr)
+        keyed.append((cefr_index[cefr], order, e))
+    if len(cefr_labels) > 255:
+        raise ValueError("more than 255 distinct CEFR labels")
+    keyed.sort(key=lambda t: (t[0], t[1]))
+
+    strtab = bytearray()
+    interned: Dict[str, Tuple[int, int]] = {}
+    word_off, word_len = array("I"), array("I")
+    cefr_col, pos_col = array("B"), array("H")
+    payload_off = array("I", [0])
+    blob = bytearray()
+    cefr_ranges: Dict[str, List[int]] = {}
+    lowered: List[str] = []
+    for i, (code, _order, e) in enumerate(keyed):
+        word = str(e.get("word") or "")
+        span = interned.get(word)
+        if span is None:
+            raw = word.encode("utf-8")
+            span = (len(strtab), len(raw))
+            interned[word] = span
+            strtab.extend(raw)
+        word_off.append(span[0])
+        word_len.append(span[1])
+        cefr_col.append(code)
+        pos = str(e.get("pos") or "")
+        if pos not in pos_index:
+            pos_index[pos] = len(pos_labels)
+            pos_labels.append(pos)
+        pos_col.append(pos_index[pos])
+        blob.extend(json.dumps(e, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        payload_off.append(len(blob))
+        label = cefr_labels[code]
+        rng = cefr_ranges.setdefault(label, [i, i])
+        rng[1] = i + 1
+        lowered.append(word.lower())
+    by_word = array("I", sorted(range(len(keyed)), key=lowered.__getitem__))
+
+    body = bytearray()
+    sections: Dict[str, List[int]] = {}
+    for name, data in (
+        ("strtab", bytes(strtab)),
+        ("word_off", word_off.tobytes()),
+        ("word_len", word_len.tobytes()),
+        ("cefr", cefr_col.tobytes()),
+        ("pos", pos_col.tobytes()),
+        ("payload_off", payload_off.tobytes()),
+        ("payload", bytes(blob)),
+        ("by_word", by_word.tobytes()),
+    ):
+        start = _align(body)
+        body.extend(data)
+        sections[name] = [start, len(data)]
+    header = {
+        "version": STORE_VERSION,
+        "byteorder": sys.byteorder,
+        "count": len(keyed),
+        "cefr_labels": cefr_labels,
+        "pos_labels": pos_labels,
+        "cefr_ranges": cefr_ranges,
+        "sections": sections,
+    }
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + len(head).to_bytes(4, "little") + head
+    prefix += b"\0" * (-len(prefix) % 8)  # body (section offsets are relative to it) starts aligned
+
+    store_path = cache / f"{STORE_PREFIX}-{time.time_ns():020d}-{os.getpid()}{STORE_SUFFIX}"
+    lexicon._replace_atomic(store_path, prefix, body)
+    manifest = {
+        "version": STORE_VERSION,
+        "parser": lexicon.PARSER_VERSION,
+        "store": store_path.name,
+        "sources": {
+            _source_key(vocab_dir, p): {"mtime_ns": _stat_key(p)[0], "size": _stat_key(p)[1], "sha1": _sha1(p)}
+            for p in files
+        },
+    }
+    _write_manifest(cache, manifest)
+    _drop_generations(cache, store_path.name)
+    return store_path
+
+
+def _drop_generations(cache: Path, keep: str) -> None:
+    """Unlink store files other than `keep` written over GENERATION_GRACE_SEC ago; one still mapped
+    (Windows) is left for a later compile."""
+    cutoff = time.time() - GENERATION_GRACE_SEC
+    for p in cache.glob(f"{STORE_PREFIX}*{STORE_SUFFIX}"):
+        try:
+            if p.name != keep and p.stat().st_mtime < cutoff:
+                p.unlink()
+        except OSError:
+            pass
+
+
+def _read_manifest(cache: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((cache / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def current_store(vocab_dir: Path) -> Optional[Path]:
+    """The store generation the manifest names (None without a manifest)."""
+    cache = vocab_dir / CACHE_DIRNAME
+    name = (_read_manifest(cache) or {}).get("store")
+    return cache / name if name else None
+
+
+def _write_manifest(cache: Path, manifest: Dict[str, Any]) -> None:
+    lexicon._replace_atomic(cache / MANIFEST_NAME, (json.dumps(manifest, indent=2) + "\n").encode("utf-8"))
+
+
+def is_fresh(vocab_dir: Path) -> bool:
+    """True if the compiled store matches the current sources (refreshing touch-only changes)."""
+    cache = vocab_dir / CACHE_DIRNAME
+    manifest = _read_manifest(cache)
+    if manifest is None or not manifest.get("store") or not (cache / manifest["store"]).exists():
+        return False
+    if manifest.get("version") != STORE_VERSION or manifest.get("parser") != lexicon.PARSER_VERSION:
+        return False
+    recorded: Dict[str, Dict[str, Any]] = manifest.get("sources") or {}
+    files = source_files(vocab_dir)
+    if sorted(recorded) != sorted(_source_key(vocab_dir, p) for p in files):
+        return False
+    touched = False
+    for p in files:
+        rec = recorded[_source_key(vocab_dir, p)]
+        mtime, size = _stat_key(p)
+        if (rec.get("mtime_ns"), rec.get("size")) == (mtime, size):
+            continue
+        if size != rec.get("size") or _sha1(p) != rec.get("sha1"):
+            return False
+        rec["mtime_ns"] = mtime
+        touched = True
+    if touched:
+        _write_manifest(cache, manifest)
+    return True
+
+
+class VocabStore:
+    """Read-only view over a compiled store (memory-mapped)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = path.open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(self._mm)
+        if bytes(mv[: len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a vocab store")
+        hlen = int.from_bytes(mv[len(MAGIC) : len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(mv[start : start + hlen]).decode("utf-8"))
+        if header.get("version") != STORE_VERSION or header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path}: incompatible store (version/byte order)")
+        self.header = header
+        body = start + hlen + (-(start + hlen) % 8)
+        self.count: int = header["count"]
+        self.cefr_labels: List[str] = header["cefr_labels"]
+        self.pos_labels: List[str] = header["pos_labels"]
+        self.cefr_ranges: Dict[str, Tuple[int, int]] = {k: (v[0], v[1]) for k, v in header["cefr_ranges"].items()}
+
+        def section(name: str, fmt: str | None = None):
+            off, length = header["sections"][name]
+            view = mv[body + off : body + off + length]
+            return view.cast(fmt) if fmt else view
+
+        self._strtab = section("strtab")
+        self._word_off = section("word_off", "I")
+        self._word_len = section("word_len", "I")
+        self._cefr = section("cefr", "B")
+        self._pos = section("pos", "H")
+        self._payload_off = section("payload_off", "I")
+        self._payload = section("payload")
+        self._by_word = section("by_word", "I")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        for name in ("_strtab", "_word_off", "_word_len", "_cefr", "_pos", "_payload_off", "_payload", "_by_word"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> "VocabStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def word(self, i: int) -> str:
+        off = self._word_off[i]
+        return str(self._strtab[off : off + self._word_len[i]], "utf-8")
+
+    def cefr(self, i: int) -> str:
+        return self.cefr_labels[self._cefr[i]]
+
+    def pos(self, i: int) -> str:
+        return self.pos_labels[self._pos[i]]
+
+    def entry(self, i: int) -> Dict[str, Any]:
+        """Full entry dict (meanings, collocations, ...) decoded on demand."""
+        return json.loads(str(self._payload[self._payload_off[i] : self._payload_off[i + 1]], "utf-8"))
+
+    def ids_for_cefr(self, labels: Sequence[str]) -> List[range]:
+        return [range(*self.cefr_ranges[c]) for c in labels if c in self.cefr_ranges]
+
+    def find(self, word: str) -> List[int]:
+        """Ids whose lowercase word equals `word` (binary search over by_word)."""
+        key = word.lower()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.word(self._by_word[mid]).lower() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        out = []
+        while lo < self.count and self.word(self._by_word[lo]).lower() == key:
+            out.append(self._by_word[lo])
+            lo += 1
+        return out
+
+
+def _fresh_store(vocab_dir: Path, force: bool) -> Path:
+    if force or not is_fresh(vocab_dir):
+        return compile_store(vocab_dir)
+    return current_store(vocab_dir)
+
+
+def open_store(vocab_dir: Path, force: bool = False) -> Optional[VocabStore]:
+    """Open the compiled store, (re)compiling when sources changed. None if no sources."""
+    if not source_files(vocab_dir):
+        return None
+    for _ in range(OPEN_ATTEMPTS - 1):
+        try:
+            return VocabStore(_fresh_store(vocab_dir, force))
+        except FileNotFoundError:  # a concurrent compile removed that generation: look again
+            force = False
+    return VocabStore(_fresh_store(vocab_dir, False))
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Compile the vocab lexicon (JSON/TSV/Markdown) into a memory-mapped store")
+    ap.add_argument("cmd", choices=["compile", "info"])
+    ap.add_argument("--vocab-dir", default="vocab")
+    ap.add_argument("--force", action="store_true", help="Recompile even if sources are unchanged")
+    return ap.parse_args(argv or sys.argv[1:])
+
+
+def main(argv: List[str] | None = None) -> int:
+    ns = parse_args(argv)
+    vocab_dir = Path(ns.vocab_dir)
+    if ns.cmd == "compile":
+        if not source_files(vocab_dir):
+            print(f"No lexicon sources under {vocab_dir}", file=sys.stderr)
+            return 1
+        if ns.force or not is_fresh(vocab_dir):
+            path = compile_store(vocab_dir)
+            print(f"Compiled -> {path}")
+        else:
+            print("Store up to date")
+    store = open_store(vocab_dir)
+    if store is None:
+        print(f"No lexicon sources under {vocab_dir}", file=sys.stderr)
+        return 1
+    with store:
+        ranges = ", ".join(f"{k}={v[1] - v[0]}" for k, v in store.cefr_ranges.items())
+        print(f"{store.path}: {len(store)} entries ({ranges}); {store.path.stat().st_size} bytes")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())